@@ -0,0 +1,97 @@
+"""
+在同一个进程内托管多个 PlayerAgent，代替 start_all_players.py 为每个玩家单独启动一个进程。
+
+所有玩家共享一个模型后端（AsyncOpenAI 客户端的 HTTP 连接池，见 LLM_BACKEND），同一局的玩家通过 get_environment(game_id)
+共享同一个 Environment（Redis 连接池）。
+
+用法：
+    python -m agents.player_host [--players 6] [--game-id default]
+"""
+import argparse
+import asyncio
+import resource
+import sys
+import time
+from typing import List
+
+from openagents.models.agent_config import AgentConfig
+
+from agents.player import PlayerAgent, provider, api_key, base_url, model_name
+from environment.environment import get_environment, DEFAULT_GAME_ID
+from llm.backend import create_llm_backend, llm_metrics
+from logs.logging_config import setup_logger
+
+logger = setup_logger('player_host')
+
+
+def player_ids(count: int) -> List[str]:
+    """playerA, playerB, ...，超过 26 个时使用数字编号"""
+    if count <= 26:
+        return [f'player{chr(ord("A") + i)}' for i in range(count)]
+    return [f'player{i + 1}' for i in range(count)]
+
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存（MB），无法读取 /proc 时退回到峰值常驻内存"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+async def host_players(count: int, game_id: str, network_host: str, network_port: int, network_id: str):
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+
+    client = create_llm_backend()
+    await get_environment(game_id).connect()
+    agents = []
+    for agent_id in player_ids(count):
+        agent_config = AgentConfig(
+            model_name=model_name,
+            instruction='你是一个狼人杀玩家，请根据角色和游戏规则进行游戏。',
+            provider=provider,
+            api_base=base_url,
+            api_key=api_key
+        )
+        agents.append(PlayerAgent(agent_config, game_id, agent_id=agent_id, client=client))
+
+    await asyncio.gather(*(
+        agent.async_start(network_host=network_host, network_port=network_port, network_id=network_id)
+        for agent in agents
+    ))
+    startup = time.perf_counter() - start
+    rss = current_rss_mb()
+    report = (f'{count}个玩家启动完成，耗时{startup:.3f}s，进程常驻内存{rss:.1f}MB'
+              f'（启动前{baseline_rss:.1f}MB，每个玩家约{(rss - baseline_rss) / count:.2f}MB，'
+              f'平均每个玩家{rss / count:.1f}MB）')
+    logger.info(report)
+    print(report)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await asyncio.gather(*(agent.async_stop() for agent in agents), return_exceptions=True)
+        logger.info('模型请求统计：%s', llm_metrics(client))
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在同一个进程内托管多个玩家')
+    parser.add_argument('--players', type=int, default=6, help='托管的玩家数量')
+    parser.add_argument('--game-id', default=DEFAULT_GAME_ID)
+    parser.add_argument('--network-host', default='localhost')
+    parser.add_argument('--network-port', type=int, default=8700)
+    parser.add_argument('--network-id', default='default-network-1')
+    args = parser.parse_args()
+    try:
+        asyncio.run(host_players(args.players, args.game_id, args.network_host, args.network_port, args.network_id))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,595 @@
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+import ast
+import json
+import os
+from string import Template
+from dotenv import load_dotenv, find_dotenv
+
+from environment.settings import Role
+from environment.environment import game_context, DEFAULT_GAME_ID
+from environment.summary import history_token_budget
+from llm.backend import LLMBackend, get_llm_backend
+from llm.cache import ReplayMissError
+from llm.dispatcher import take_queue_wait
+from llm.responses import STOP_TAGS
+from tools.tools_loader import ToolRegistry, load_tool_registry
+from prompts.prompts_loader import load_prompts
+from prompts.prompt_function_calling import function_calling_prompt
+from logs.logging_config import setup_logger
+from logs.tracing import record_span, span
+
+load_dotenv(find_dotenv())
+provider = os.getenv('PROVIDER')
+api_key = os.getenv('OPENAI_API_KEY')
+base_url = os.getenv('BASE_URL')
+model_name = os.getenv('MODEL_NAME')
+stream_mode = os.getenv('LLM_STREAM', 'false').lower() == 'true'   #流式请求，读到动作结束标签后立即停止
+context_mode = os.getenv('PLAYER_CONTEXT', 'true').lower() == 'true'   #在提示词中注入持续更新的局势上下文
+llm_timeout = float(os.getenv('LLM_TIMEOUT') or 30)     #单次模型请求的超时时间（秒）
+tool_mode = os.getenv('LLM_TOOL_MODE', 'react')     #react：解析文本中的 <action> 标签；native：使用 API 的函数调用
+
+#函数调用模式下模型把调用写进了回复文本，例如 kill("playerA")
+_TEXT_CALL = re.compile(r'^(?:<action>)?\s*(\w+)\((.*)\)\s*(?:</action>)?$', re.DOTALL)
+
+_role_prompts: Dict[Role, str] = {}    #角色 -> 渲染后的系统提示词，同一进程内的玩家共享，保证前缀逐字节一致
+
+
+def _find_stop_tag(text: str, start: int = 0):
+    """返回第一个动作结束标签末尾的位置，没有时返回 None"""
+    positions = [pos + len(tag) for tag in STOP_TAGS if (pos := text.find(tag, start)) != -1]
+    return min(positions) if positions else None
+
+def _prompt_token_usage(usage) -> Tuple[int, int]:
+    """
+    从 API 返回的 usage 中取出 (命中缓存的提示词 token, 未命中的提示词 token)。
+    OpenAI 使用 prompt_tokens_details.cached_tokens，DeepSeek 使用 prompt_cache_hit_tokens / prompt_cache_miss_tokens。
+    """
+    if usage is None:
+        return 0, 0
+    prompt_tokens = usage.prompt_tokens or 0
+    hit = getattr(usage, 'prompt_cache_hit_tokens', None)
+    if hit is None:
+        details = getattr(usage, 'prompt_tokens_details', None)
+        hit = getattr(details, 'cached_tokens', None) or 0
+    return hit, prompt_tokens - hit
+
+
+
+class ParseError(RuntimeError):
+    """模型多次输出无法解析的内容，放弃本次请求"""
+
+
+class ReActPlayer:
+    """
+    与通信方式无关的 ReAct 玩家：根据角色构造提示词，循环请求模型并执行工具，返回最终回答。
+    PlayerAgent 通过 OpenAgents 网络使用它，engine.policies.LLMPolicy 在进程内使用它。
+    """
+
+    def __init__(
+        self,
+        player_id: str,
+        game_id: str = DEFAULT_GAME_ID,
+        client: Optional[LLMBackend] = None,
+        logger=None,
+    ):
+        self.player_id = player_id
+        self.game_id = game_id   #工具调用时据此定位本局的 Environment
+        self.logger = logger or setup_logger(player_id)
+
+        #默认使用进程内共享的模型后端（HTTP 连接池、并发和限速都在进程内统一管理）
+        self._client = client or get_llm_backend()
+        self.model = model_name
+
+        #每回合模型请求的统计：time_to_action 为拿到完整动作的累计耗时，tail_tokens 为停止标签之后浪费的 token
+        #cached_prompt_tokens / uncached_prompt_tokens 为服务端前缀缓存命中 / 未命中的提示词 token
+        self.llm_stats = {
+            'turns': 0, 'early_stops': 0, 'time_to_first_token': 0.0, 'time_to_action': 0.0,
+            'completion_tokens': 0, 'tail_tokens': 0, 'cached_prompt_tokens': 0, 'uncached_prompt_tokens': 0,
+            'parse_failures': 0, 'parse_retries': 0,
+        }
+
+        self.tool_calls = 0
+        self._context: List[str] = []    #按到达顺序追加的历史记录和记忆，只增不改，保持提示词前缀稳定
+        self._history_count = 0           #已并入上下文的历史记录条数，与 get_history 工具的读取游标相互独立
+        self._memory_count = 0            #已并入上下文的记忆条数
+
+        self.role = Role.SEER
+        self.role_instructions = None   #系统提示词
+        self._tools: Optional[ToolRegistry] = None
+
+    def set_role(self, role: Role) -> str:
+        """设置角色，加载对应的工具并返回渲染后的系统提示词"""
+        self.role = role
+        self._tools = load_tool_registry(self.role)
+        role_prompt = _role_prompts.get(self.role)
+        if role_prompt is None:
+            role_prompt = _role_prompts[self.role] = self.render_system_prompt(load_prompts(self.role))
+        self.role_instructions = role_prompt
+        return role_prompt
+
+    async def respond(self, kind: str, instructions: str) -> str:
+        """
+        处理 God 的一次请求，返回需要回复的内容。
+
+        Args:
+            kind: 'Execute'、'Speech' 或 'Vote'
+            instructions: 去掉 'Execute:' 等前缀之后的请求内容
+        Returns:
+            str: 发言内容或投票目标（已去掉 'Speech:' / 'Vote:' 前缀），Execute 请求返回最终回答原文；
+                 多次解析失败时返回空字符串，由 God 按不合法的回复处理
+        """
+        self.logger.info('获取%s:%s', kind, instructions)
+        messages = await self.build_messages(instructions)
+        if kind == 'Speech':
+            self.logger.info('%s开始发言。', self.player_id)
+        elif kind == 'Vote':
+            self.logger.info('%s开始投票。', self.player_id)
+        try:
+            result = await self.run(messages)
+        except ParseError as e:
+            #不能让异常中断回复，否则 God 会一直等待
+            self.logger.error('%s请求处理失败：%s', kind, e)
+            return ''
+        if kind in ('Speech', 'Vote') and result.startswith(kind):
+            return result.split(':', 1)[1].strip()
+        return result
+
+    async def build_messages(self, instructions: str) -> List[dict]:
+        """
+        按前缀缓存友好的顺序组织消息：同一角色的所有玩家共享完全相同的系统提示词，
+        玩家身份放在其后，然后是只增不改的局势上下文，每次请求的内容放在最后，ReAct 循环中只在末尾追加消息。
+        """
+        messages = [{'role': 'system', 'content': self.role_instructions}]
+        if tool_mode == 'native':
+            messages.append({'role': 'system', 'content': function_calling_prompt})
+        messages.append({'role': 'system', 'content': f'你是{self.player_id}。'})
+        if context_mode:
+            context, alive_players = await self._refresh_context()
+            if context:
+                messages.append({'role': 'user', 'content': '截至目前你已知的游戏记录和记忆（无需再调用 get_history、get_player_memory 查询）：\n'
+                                                            + '\n'.join(context)})
+            instructions = f'当前存活玩家：{", ".join(alive_players)}\n{instructions}'
+        messages.append({'role': 'user', 'content': instructions})
+        return messages
+
+    async def _refresh_context(self) -> Tuple[List[str], List[str]]:
+        """
+        把上次之后新增的历史记录和记忆追加到上下文中，返回 (注入提示词的上下文, 当前存活玩家)。
+        设置了 HISTORY_TOKEN_BUDGET 时，超出预算的较早轮次以摘要形式注入。
+        """
+        with game_context(self.game_id) as env:
+            async with env.cache_snapshot():
+                history = await env.get_history(start=self._history_count)
+                self._history_count += len(history)
+                self._context.extend(history)
+                memory = await env.get_player_memory(self.player_id, start=self._memory_count)
+                self._memory_count += len(memory)
+                self._context.extend(f'（你的记忆）{entry}' for entry in memory)
+                context = self._context
+                token_budget = history_token_budget()
+                if token_budget:
+                    context = await env.compact_history(context, token_budget)
+                return context, sorted(await env.get_alive_players())
+
+    def get_tool_list(self) -> str:
+        """生成工具列表字符串，包含函数签名和简要说明"""
+        return self._tools.tool_list
+
+    def render_system_prompt(self, system_prompt_template: str) -> str:
+        """渲染系统提示模板，替换变量。模板中不包含玩家名，同一角色渲染结果完全相同"""
+        tool_list = self.get_tool_list()
+        return Template(system_prompt_template).substitute(
+            player_name=self.player_id,
+            tool_list=tool_list
+        )
+
+    async def run(self, messages: List[dict]) -> str:
+        """ReAct 循环：请求模型、执行工具、追加观察结果，直到得到最终回答"""
+        if tool_mode == 'native':
+            return await self._run_native(messages)
+        max_parse_retries = 3
+        parse_retry_count = 0
+        
+        while True:
+            #1.请求模型，并发控制、限速和重试由 LLMDispatcher 负责
+            self.logger.info('请求模型')
+            try:
+                if stream_mode:
+                    response = await self._stream_completion(messages)
+                else:
+                    response = await self._completion(messages)
+            except ReplayMissError:
+                raise   #严格回放时缺少录制的回复，不能当作普通的请求失败
+            except Exception as e:
+                self.logger.error('API 请求失败: %s', e)
+                return f'错误：无法连接到 AI 服务 ({e})，请稍后重试。'
+
+            #2.检测Thought
+            self.logger.info('检查Thought')
+            thought_match = re.search(r'<thought>(.*?)</thought>', response, re.DOTALL)
+            if thought_match:
+                thought = thought_match.group(1)
+                self.logger.info('Thought: %s', thought)
+
+            #3.检测Final Answer
+            self.logger.info('检测Final Answer')
+            if '<final_answer>' in response:
+                final_answer = re.search(r'<final_answer>(.*?)</final_answer>', response, re.DOTALL)
+                if final_answer:
+                    self.logger.info('Final Answer: %s', final_answer.group(1))
+                    return final_answer.group(1)
+
+            #4.检测Action
+            self.logger.info('检测Action')
+            action_match = re.search(r'<action>(.*?)</action>', response, re.DOTALL)
+            if not action_match:
+                # 检查是否是直接输出的投票格式
+                vote_match = re.search(r'Vote:\s*(\w+)', response, re.IGNORECASE)
+                if vote_match:
+                    vote_target = vote_match.group(1)
+                    self.logger.info('检测到直接投票格式（无标签）: Vote:%s', vote_target)
+                    return f'Vote:{vote_target}'
+                
+                # 检查是否是直接输出的发言格式
+                speech_match = re.search(r'Speech:\s*(.+)', response, re.IGNORECASE | re.DOTALL)
+                if speech_match:
+                    speech_content = speech_match.group(1).strip()
+                    self.logger.info('检测到直接发言格式（无标签）: Speech:%s', speech_content)
+                    return f'Speech:{speech_content}'
+                
+                # 解析失败，尝试重试
+                parse_retry_count += 1
+                self.llm_stats['parse_failures'] += 1
+                if parse_retry_count <= max_parse_retries:
+                    self.llm_stats['parse_retries'] += 1
+                    self.logger.warning('模型输出格式不正确，尝试重新请求 (第 %d/%d 次)', parse_retry_count, max_parse_retries)
+                    # 添加提示信息，要求模型使用正确的格式
+                    error_msg = (
+                        '你的输出格式不正确。请使用以下格式之一：\n'
+                        '1. <final_answer>你的答案</final_answer>\n'
+                        '2. <action>工具名称(参数)</action>\n'
+                        '3. 直接输出 Vote:玩家id 或 Speech:发言内容\n'
+                        '请重新输出正确的格式。'
+                    )
+                    messages.append({"role": "user", "content": f"<error>{error_msg}</error>"})
+                    continue  # 重新请求模型
+                else:
+                    self.logger.error('解析失败，已重试 %d 次，放弃', max_parse_retries)
+                    raise ParseError('模型未输出<action>、<final_answer>或有效的投票/发言格式，已重试多次')
+            
+            # 成功解析 action，重置重试计数
+            parse_retry_count = 0
+            action = action_match.group(1)
+            
+            try:
+                tool_name, args = self._parse_action(action)
+            except Exception as e:
+                # 解析 action 字符串失败，也尝试重试
+                parse_retry_count += 1
+                self.llm_stats['parse_failures'] += 1
+                if parse_retry_count <= max_parse_retries:
+                    self.llm_stats['parse_retries'] += 1
+                    self.logger.warning('Action 字符串解析失败: %s，尝试重新请求 (第 %d/%d 次)', str(e), parse_retry_count, max_parse_retries)
+                    error_msg = (
+                        f'你的 action 格式不正确：{action}\n'
+                        '正确格式应该是：<action>工具名称(参数1, 参数2)</action>\n'
+                        '例如：<action>check_alive_players()</action> 或 <action>check_identity("playerA")</action>\n'
+                        '请重新输出正确的格式。'
+                    )
+                    messages.append({"role": "user", "content": f"<error>{error_msg}</error>"})
+                    continue  # 重新请求模型
+                else:
+                    self.logger.error('Action 解析失败，已重试 %d 次: %s', max_parse_retries, str(e))
+                    raise ParseError(f'无法解析 action 字符串: {action}，已重试多次')
+            
+            self.logger.info('Action: %s:%s', tool_name, args)
+            observation = await self._execute_tool(tool_name, args)
+            obs_msg = f"<observation>{observation}</observation>"
+            messages.append({"role": "user", "content": obs_msg})
+
+    async def _run_native(self, messages: List[dict]) -> str:
+        """函数调用模式的 ReAct 循环：工具调用通过 API 的 tools / tool_calls 字段传递，不需要解析文本"""
+        max_parse_retries = 3
+        parse_retry_count = 0
+
+        while True:
+            self.logger.info('请求模型（函数调用）')
+            try:
+                message = await self._tool_completion(messages)
+            except ReplayMissError:
+                raise
+            except Exception as e:
+                self.logger.error('API 请求失败: %s', e)
+                return f'错误：无法连接到 AI 服务 ({e})，请稍后重试。'
+
+            content = message.content or ''
+            thought_match = re.search(r'<thought>(.*?)</thought>', content, re.DOTALL)
+            if thought_match:
+                self.logger.info('Thought: %s', thought_match.group(1))
+
+            if message.tool_calls:
+                messages.append({
+                    'role': 'assistant', 'content': content,
+                    'tool_calls': [{'id': call.id, 'type': 'function',
+                                    'function': {'name': call.function.name, 'arguments': call.function.arguments}}
+                                   for call in message.tool_calls],
+                })
+                #每个 tool_call 都必须有对应的 tool 消息
+                for call in message.tool_calls:
+                    try:
+                        kwargs = json.loads(call.function.arguments or '{}')
+                        if not isinstance(kwargs, dict):
+                            raise ValueError('参数必须是 JSON 对象')
+                    except ValueError as e:
+                        self.llm_stats['parse_failures'] += 1
+                        self.llm_stats['parse_retries'] += 1
+                        self.logger.warning('函数调用参数解析失败: %s: %s', call.function.arguments, e)
+                        observation = f'参数不是合法的 JSON 对象：{call.function.arguments}，请重新调用。'
+                    else:
+                        self.logger.info('Action: %s:%s', call.function.name, kwargs)
+                        observation = await self._execute_tool(call.function.name, kwargs=kwargs)
+                    messages.append({'role': 'tool', 'tool_call_id': call.id, 'content': observation})
+                continue
+
+            #没有函数调用时，回复内容就是最终回答，<final_answer> 标签可有可无
+            final_answer = re.search(r'<final_answer>(.*?)(?:</final_answer>|$)', content, re.DOTALL)
+            answer = final_answer.group(1) if final_answer else re.sub(r'<thought>.*?</thought>', '', content, flags=re.DOTALL)
+            answer = answer.strip()
+            text_call = _TEXT_CALL.match(answer)
+            if answer and (text_call is None or self._tools.get(text_call.group(1)) is None):
+                self.logger.info('Final Answer: %s', answer)
+                return answer
+
+            parse_retry_count += 1
+            self.llm_stats['parse_failures'] += 1
+            if parse_retry_count > max_parse_retries:
+                self.logger.error('解析失败，已重试 %d 次，放弃', max_parse_retries)
+                raise ParseError('模型既没有调用函数也没有给出最终回答，已重试多次')
+            self.llm_stats['parse_retries'] += 1
+            if text_call is not None:
+                self.logger.warning('模型把函数调用写在了回复文本中：%s，尝试重新请求 (第 %d/%d 次)',
+                                    answer, parse_retry_count, max_parse_retries)
+                messages.append({'role': 'assistant', 'content': content})
+                messages.append({'role': 'user', 'content': '<error>你把工具调用写在了回复文本中，没有实际执行。请通过函数调用使用工具。</error>'})
+                continue
+            self.logger.warning('模型输出为空，尝试重新请求 (第 %d/%d 次)', parse_retry_count, max_parse_retries)
+            messages.append({'role': 'user', 'content': '<error>你没有调用函数，也没有给出最终回答。请调用函数，或输出 <final_answer>你的答案</final_answer>。</error>'})
+
+    async def _execute_tool(self, tool_name: str, args=(), kwargs: Optional[dict] = None) -> str:
+        """在本局的 game_context 中执行工具，返回观察结果"""
+        self.tool_calls += 1
+        with span('tool', tool_name, self.game_id, player=self.player_id) as attrs:
+            try:
+                tool = self._tools.get(tool_name)
+                if tool is None:
+                    #调用了不存在的工具也算一次格式错误，模型需要根据观察结果重新调用
+                    self.llm_stats['parse_failures'] += 1
+                    self.llm_stats['parse_retries'] += 1
+                    observation = f'工具 {tool_name} 不存在'
+                    attrs['error'] = 'unknown_tool'
+                else:
+                    #签名和 self_id 的注入位置已在注册表中预先计算
+                    with game_context(self.game_id) as env:
+                        async with env.cache_snapshot():
+                            observation = await tool.call(self.player_id, args, kwargs)
+            except Exception as e:
+                observation = f'工具执行错误: {str(e)}'
+                attrs['error'] = type(e).__name__
+        self.logger.info('Observation: %s', observation)
+        return observation
+
+    async def _tool_completion(self, messages):
+        """函数调用模式的请求，返回 message（content + tool_calls）。函数调用模式不使用流式请求"""
+        start = time.perf_counter()
+        raw_response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=self._tools.schemas,
+            stream=False,
+            timeout=llm_timeout
+        )
+        elapsed = time.perf_counter() - start
+        usage = raw_response.usage
+        self._record_llm_turn(elapsed, elapsed, elapsed, usage.completion_tokens if usage else 0, 0, usage,
+                              early_stop=False, streamed=False)
+        return raw_response.choices[0].message
+
+    async def _completion(self, messages) -> str:
+        """一次性请求完整回复，并统计停止标签之后多生成的内容"""
+        start = time.perf_counter()
+        raw_response = await self._client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=False,
+            timeout=llm_timeout
+        )
+        elapsed = time.perf_counter() - start
+        response = raw_response.choices[0].message.content or ''
+        usage = raw_response.usage
+        completion_tokens = usage.completion_tokens if usage else 0
+        end = _find_stop_tag(response)
+        tail_tokens = 0
+        if end is not None and len(response) > 0:
+            #按字符比例估算停止标签之后的 token 数
+            tail_tokens = round(completion_tokens * (len(response) - end) / len(response))
+        self._record_llm_turn(elapsed, elapsed, elapsed, completion_tokens, tail_tokens, usage,
+                              early_stop=False, streamed=False)
+        return response
+
+    async def _stream_completion(self, messages) -> str:
+        """流式请求回复，一旦出现 </action> 或 </final_answer> 就停止接收，不再等待模型继续生成"""
+        start = time.perf_counter()
+        stream = await self._client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={'include_usage': True},    #用量在最后一个分块中返回，提前停止时拿不到
+            timeout=llm_timeout
+        )
+        response = ''
+        chunks = 0
+        end = None
+        usage = None
+        first_token = None
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                chunks += 1
+                #停止标签可能被拆分到两个分块中，从上一段末尾开始查找
+                scan_from = max(0, len(response) - len(STOP_TAGS[1]))
+                response += delta
+                end = _find_stop_tag(response, scan_from)
+                if end is not None:
+                    break
+        finally:
+            await stream.close()
+        time_to_action = time.perf_counter() - start
+        if end is not None:
+            response = response[:end]
+        #流式分块数近似为接收到的 token 数
+        self._record_llm_turn(first_token or time_to_action, time_to_action, time.perf_counter() - start, chunks, 0,
+                              usage, early_stop=end is not None, streamed=True)
+        return response
+
+    def _record_llm_turn(self, time_to_first_token: float, time_to_action: float, elapsed: float,
+                         completion_tokens: int, tail_tokens: int, usage, early_stop: bool, streamed: bool):
+        cached_tokens, uncached_tokens = _prompt_token_usage(usage)
+        stats = self.llm_stats
+        stats['turns'] += 1
+        stats['early_stops'] += int(early_stop)
+        stats['time_to_first_token'] += time_to_first_token
+        stats['time_to_action'] += time_to_action
+        stats['completion_tokens'] += completion_tokens
+        stats['tail_tokens'] += tail_tokens
+        stats['cached_prompt_tokens'] += cached_tokens
+        stats['uncached_prompt_tokens'] += uncached_tokens
+        record_span('llm', self.model or 'unknown', self.game_id, time.time() - elapsed, elapsed,
+                    player=self.player_id, queue=take_queue_wait(), ttft=time_to_first_token,
+                    time_to_action=time_to_action, prompt_tokens=cached_tokens + uncached_tokens,
+                    cached_tokens=cached_tokens, completion_tokens=completion_tokens,
+                    streamed=streamed, early_stop=early_stop)
+        self.logger.info(
+            'LLM 回合：%s，首 token 耗时 %.3fs，首个动作耗时 %.3fs，总耗时 %.3fs，'
+            '提示词 %s tokens（命中缓存 %d），生成 %d tokens，停止标签后多生成 %d tokens%s',
+            '流式' if streamed else '非流式', time_to_first_token, time_to_action, elapsed,
+            cached_tokens + uncached_tokens if usage else '未知', cached_tokens, completion_tokens, tail_tokens,
+            '，已提前停止' if early_stop else ''
+        )
+
+    def _parse_action(self, code_str: str) -> Tuple[str, List[str]]:
+        """
+        解析函数调用字符串，例如：check_alive_players() 或 check_identity("player1")
+        
+        Args:
+            code_str: 函数调用字符串，例如 "check_alive_players()" 或 'check_identity("player1")'
+        
+        Returns:
+            Tuple[str, List]: (函数名, 参数列表)
+        """
+        code_str = code_str.strip()
+        
+        self.logger.debug('解析 action 字符串: %s', repr(code_str))
+        
+       
+        if not code_str:
+            raise ValueError("Action 字符串为空")
+        
+        match = re.match(r'(\w+)\s*\((.*)\)\s*$', code_str, re.DOTALL)
+        
+        if not match:
+            match_no_args = re.match(r'(\w+)\s*\(\s*\)\s*$', code_str)
+            if match_no_args:
+                func_name = match_no_args.group(1)
+                return func_name, []
+
+            # 处理只有函数名没有括号的情况（例如：get_player_memory）
+            match_func_name_only = re.match(r'^(\w+)\s*$', code_str)
+            if match_func_name_only:
+                func_name = match_func_name_only.group(1)
+                self.logger.warning('Action 字符串缺少括号，自动添加：%s()', func_name)
+                return func_name, []
+            
+            self.logger.error('无法解析 action 字符串: %s', repr(code_str))
+            raise ValueError(
+                f"Invalid function call syntax: '{code_str}'. "
+                f"期望格式: function_name() 或 function_name(arg1, arg2, ...)"
+            )
+        
+        func_name = match.group(1).strip()
+        args_str = match.group(2).strip()
+        
+        if not args_str:
+            return func_name, []
+        
+        # 手动解析参数，特别处理包含多行内容的字符串
+        args = []
+        current_arg = ""
+        in_string = False
+        string_char = None
+        i = 0
+        paren_depth = 0
+        
+        while i < len(args_str):
+            char = args_str[i]
+            
+            if not in_string:
+                if char in ['"', "'"]:
+                    in_string = True
+                    string_char = char
+                    current_arg += char
+                elif char == '(':
+                    paren_depth += 1
+                    current_arg += char
+                elif char == ')':
+                    paren_depth -= 1
+                    current_arg += char
+                elif char == ',' and paren_depth == 0:
+                    # 遇到顶层逗号，结束当前参数
+                    args.append(self._parse_single_arg(current_arg.strip()))
+                    current_arg = ""
+                else:
+                    current_arg += char
+            else:
+                current_arg += char
+                if char == string_char and (i == 0 or args_str[i-1] != '\\'):
+                    in_string = False
+                    string_char = None
+            
+            i += 1
+        
+        if current_arg.strip():
+            args.append(self._parse_single_arg(current_arg.strip()))
+        
+        return func_name, args
+
+    def _parse_single_arg(self, arg_str: str):
+        """解析单个参数"""
+        arg_str = arg_str.strip()
+        
+        # 如果是字符串字面量
+        if (arg_str.startswith('"') and arg_str.endswith('"')) or \
+           (arg_str.startswith("'") and arg_str.endswith("'")):
+            # 移除外层引号并处理转义字符
+            inner_str = arg_str[1:-1]
+            # 处理常见的转义字符
+            inner_str = inner_str.replace('\\"', '"').replace("\\'", "'")
+            inner_str = inner_str.replace('\\n', '\n').replace('\\t', '\t')
+            inner_str = inner_str.replace('\\r', '\r').replace('\\\\', '\\')
+            return inner_str
+        
+        # 尝试使用 ast.literal_eval 解析其他类型
+        try:
+            return ast.literal_eval(arg_str)
+        except (SyntaxError, ValueError):
+            # 如果解析失败，返回原始字符串
+            return arg_str
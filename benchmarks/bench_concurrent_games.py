@@ -0,0 +1,73 @@
+"""
+并发对局基准：在同一个 Redis 上同时运行 N 局对局，统计总吞吐（局/小时）。
+
+每局通过 engine.local.play_local_game 驱动真实的 GameEngine，使用独立的 game_id（独立的键前缀），
+玩家为随机策略（engine.policies.RandomPolicy，行动通过 tools/ 中的工具函数完成），
+用 --think-ms 模拟每次玩家决策的耗时。
+
+用法：
+    python -m benchmarks.bench_concurrent_games --concurrency 1 4 16 64 [--cache version] [--backend memory]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Tuple
+
+from engine.local import play_local_game, random_policies
+from environment.environment import get_environment
+
+MAX_ROUNDS = 10
+
+
+async def play_game(game_id: str, seed: int, think_time: float) -> Tuple[str, dict]:
+    """运行一局对局，返回获胜阵营和缓存统计"""
+    #play_local_game 结束时会释放 Environment，先取得同一个实例以便读取缓存统计
+    env = get_environment(game_id)
+    result = await play_local_game(game_id, random_policies(seed, think_time), seed=seed, max_rounds=MAX_ROUNDS)
+    return result.winner or 'draw', env.cache_stats()
+
+
+async def run_level(concurrency: int, think_time: float, seed: int) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        play_game(f'bench-{run_id}-{i}', seed + i, think_time) for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    cache = Counter()
+    for _, cache_stats in results:
+        cache.update({k: v for k, v in cache_stats.items() if k != 'hit_rate'})
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'games_per_hour': concurrency / elapsed * 3600,
+        'winners': dict(Counter(winner for winner, _ in results)),
+        'cache': dict(cache),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='并发对局吞吐基准')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--think-ms', type=float, default=0.0, help='模拟每次玩家决策的耗时（毫秒）')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=['redis', 'memory'], default='redis', help='Environment 存储后端')
+    parser.add_argument('--cache', choices=['off', 'version', 'notify'], default='off', help='Environment 本地缓存模式')
+    args = parser.parse_args()
+    os.environ['ENV_CACHE'] = args.cache
+    os.environ['ENV_BACKEND'] = args.backend
+
+    print(f'{"并发局数":>8} {"耗时(s)":>10} {"局/小时":>12}  胜负')
+    for concurrency in args.concurrency:
+        result = await run_level(concurrency, args.think_ms / 1000, args.seed)
+        print(f'{result["concurrency"]:>8} {result["elapsed_s"]:>10.3f} '
+              f'{result["games_per_hour"]:>12.0f}  {result["winners"]}')
+        if result['cache']:
+            print(f'{"":>8} 缓存: {result["cache"]}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+天亮结算往返次数基准：对比逐条命令的旧流程和 Environment.resolve_dawn 的单次脚本调用。
+
+用法：
+    python -m benchmarks.bench_dawn_roundtrips --iterations 1000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from environment.environment import get_environment, release_environment
+from environment.memory_backend import MemoryBackend
+from environment.settings import GamePhase
+
+PLAYERS = ['playerA', 'playerB', 'playerC', 'playerD', 'playerE', 'playerF']
+
+
+class RoundTripCounter:
+    """
+    统计与存储后端的往返次数。Redis 客户端通过包装 execute_command 和 pipeline 计数，
+    内存后端直接使用其 command_count。
+    """
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._count = 0
+        if isinstance(redis, MemoryBackend):
+            return
+        self._execute_command = redis.execute_command
+        self._pipeline = redis.pipeline
+        redis.execute_command = self._counted
+        redis.pipeline = self._counted_pipeline
+
+    @property
+    def count(self) -> int:
+        if isinstance(self._redis, MemoryBackend):
+            return self._redis.command_count
+        return self._count
+
+    async def _counted(self, *args, **kwargs):
+        self._count += 1
+        return await self._execute_command(*args, **kwargs)
+
+    def _counted_pipeline(self, *args, **kwargs):
+        pipe = self._pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted_execute(*exec_args, **exec_kwargs):
+            self._count += 1
+            return await execute(*exec_args, **exec_kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+
+async def legacy_dawn(env):
+    """原 GodAgent._start_day 中的逐条命令流程"""
+    await env.set_phase(GamePhase.DAY)
+    killed = await env.get_player_killed_tonight()
+    poisoned = await env.get_player_posioned_tonight()
+    await env.set_player_killed_tonight(None)
+    await env.set_player_posioned_tonight(None)
+    await env.set_cure_tonight(False)
+    dead = []
+    for pid in (killed, poisoned):
+        if pid is not None:
+            dead.append(pid)
+            await env.remove_alive_player(pid)
+    await env.get_alive_players()   # _is_game_over
+    alive = await env.get_alive_players()   # 发言顺序
+    return dead, alive
+
+
+async def scripted_dawn(env):
+    return await env.resolve_dawn()
+
+
+async def measure(env, counter, dawn, iterations: int) -> dict:
+    elapsed = 0.0
+    for _ in range(iterations):
+        await env.set_alive_players(set(PLAYERS))
+        await env.set_player_killed_tonight('playerA')
+        await env.set_player_posioned_tonight('playerB')
+        before = counter.count
+        start = time.perf_counter()
+        dead, alive = await dawn(env)
+        elapsed += time.perf_counter() - start
+        trips = counter.count - before
+        assert dead == ['playerA', 'playerB'] and set(alive) == set(PLAYERS[2:])
+    return {'round_trips': trips, 'avg_ms': elapsed / iterations * 1000}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='天亮结算往返次数基准')
+    parser.add_argument('--iterations', type=int, default=1000)
+    args = parser.parse_args()
+
+    game_id = f'bench-dawn-{uuid.uuid4().hex[:8]}'
+    env = get_environment(game_id)
+    counter = RoundTripCounter(await env.connect())
+    await env.init_witch_items()
+
+    print(f'{"流程":<10} {"往返次数":>8} {"平均耗时(ms)":>14}')
+    for name, dawn in (('legacy', legacy_dawn), ('script', scripted_dawn)):
+        result = await measure(env, counter, dawn, args.iterations)
+        print(f'{name:<10} {result["round_trips"]:>8} {result["avg_ms"]:>14.3f}')
+
+    await env.clear_environment()
+    await release_environment(game_id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
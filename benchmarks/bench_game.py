@@ -0,0 +1,175 @@
+"""
+端到端对局基准：用脚本化玩家（engine.policies.RandomPolicy，行动通过 tools/ 中的工具函数完成）
+驱动 GameEngine（即 GodAgent 使用的游戏流程）跑完整局游戏，按 玩家数 × 最大轮数 的每种组合统计：
+    - 吞吐（局/秒），在不记录 span 的一轮中测量
+    - 每局的存储操作数（命令、pipeline、脚本）和引擎发出的消息数
+    - 每个阶段（夜晚、白天发言、投票）和每类请求（夜晚行动、发言、投票）的耗时分位数
+结果输出为 JSON，附带 git 提交和运行参数，可以用 --baseline 与之前的结果比较。
+
+用法：
+    python -m benchmarks.bench_game --games 200 --rounds 1 3 20 [--backend redis] --json bench_game.json
+    python -m benchmarks.bench_game --games 200 --baseline bench_game.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from engine.local import PLAYERS, LocalGameIO, play_local_game, random_policies
+from logs.tracing import Span, percentile, set_recorder
+
+#GameEngine 目前只实现了 6 人局（Action6）
+SUPPORTED_PLAYERS = (len(PLAYERS),)
+
+
+class SpanCollector:
+    """把 span 保存在内存中，代替写文件的 SpanRecorder"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def record(self, span: Span):
+        self.spans.append(span)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def play_games(run_id: str, games: int, players: int, rounds: int, seed: int) -> List[dict]:
+    """依次跑 games 局，返回每局的获胜阵营、轮数和消息数"""
+    results = []
+    for i in range(games):
+        game_id = f'bench-{run_id}-{players}p{rounds}r-{i}'
+        policies = random_policies(seed + i)
+        io = LocalGameIO(game_id, policies)
+        result = await play_local_game(game_id, policies, seed=seed + i, max_rounds=rounds, io=io)
+        results.append({'game_id': game_id, 'winner': result.winner or 'draw', 'rounds': result.rounds,
+                        'messages': io.messages})
+    return results
+
+
+def latency_stats(durations: List[float]) -> dict:
+    durations = sorted(durations)
+    return {
+        'count': len(durations),
+        'p50_ms': percentile(durations, 50) * 1000,
+        'p95_ms': percentile(durations, 95) * 1000,
+        'p99_ms': percentile(durations, 99) * 1000,
+        'max_ms': durations[-1] * 1000,
+    }
+
+
+async def run_config(players: int, rounds: int, games: int, seed: int) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    #吞吐：不记录 span，避免计入记录本身的开销
+    previous = set_recorder(None)
+    start = time.perf_counter()
+    await play_games(run_id, games, players, rounds, seed)
+    elapsed = time.perf_counter() - start
+
+    #明细：同样的种子再跑一遍，记录每个存储命令、阶段和请求
+    collector = SpanCollector()
+    set_recorder(collector)
+    try:
+        results = await play_games(f'{run_id}-traced', games, players, rounds, seed)
+    finally:
+        set_recorder(previous)
+
+    storage = Counter()
+    latency: Dict[str, Dict[str, List[float]]] = {'phase': defaultdict(list), 'request': defaultdict(list)}
+    for span in collector.spans:
+        if span.type == 'redis' and span.name != 'close':
+            storage['round_trips'] += 1
+            if span.name == 'pipeline':
+                storage['pipelines'] += 1
+                storage['commands'] += span.attrs.get('commands', 0)
+            else:
+                storage['scripts' if span.name == 'script' else 'commands'] += 1
+        elif span.type in latency:
+            latency[span.type][span.name].append(span.duration)
+
+    return {
+        'players': players,
+        'max_rounds': rounds,
+        'games': games,
+        'elapsed_s': elapsed,
+        'games_per_sec': games / elapsed,
+        'rounds_per_game': sum(result['rounds'] for result in results) / games,
+        'messages_per_game': sum(result['messages'] for result in results) / games,
+        'storage_per_game': {key: value / games for key, value in sorted(storage.items())},
+        'phase_latency': {name: latency_stats(durations) for name, durations in sorted(latency['phase'].items())},
+        'request_latency': {name: latency_stats(durations) for name, durations in sorted(latency['request'].items())},
+        'winners': dict(Counter(result['winner'] for result in results)),
+    }
+
+
+def compare(results: List[dict], baseline: dict):
+    """打印与之前结果中相同组合的吞吐和每局存储往返次数的变化"""
+    previous = {(item['players'], item['max_rounds']): item for item in baseline['results']}
+    print(f'与 {baseline.get("commit") or "基准"} 比较：')
+    for item in results:
+        old = previous.get((item['players'], item['max_rounds']))
+        if old is None:
+            continue
+        speed = item['games_per_sec'] / old['games_per_sec'] - 1
+        trips = item['storage_per_game'].get('round_trips', 0) - old['storage_per_game'].get('round_trips', 0)
+        print(f'  {item["players"]}人 {item["max_rounds"]}轮：局/秒 {speed:+.1%}，每局存储往返 {trips:+.1f}')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='端到端对局基准')
+    parser.add_argument('--games', type=int, default=100, help='每种组合跑的局数')
+    parser.add_argument('--players', type=int, nargs='+', default=list(SUPPORTED_PLAYERS), choices=SUPPORTED_PLAYERS)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[20], help='最大轮数，可以给出多个')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=['redis', 'memory'], default='memory', help='Environment 存储后端')
+    parser.add_argument('--cache', choices=['off', 'version', 'notify'], default='off', help='Environment 本地缓存模式')
+    parser.add_argument('--json', help='将结果写入该 JSON 文件')
+    parser.add_argument('--baseline', help='之前用 --json 保存的结果，打印相同组合的变化')
+    args = parser.parse_args()
+    os.environ['ENV_BACKEND'] = args.backend
+    os.environ['ENV_CACHE'] = args.cache
+
+    results = []
+    print(f'{"玩家数":>6} {"最大轮数":>8} {"局/秒":>10} {"平均轮数":>8} {"消息/局":>8} {"存储往返/局":>11} {"命令/局":>8}')
+    for players in args.players:
+        for rounds in args.rounds:
+            result = await run_config(players, rounds, args.games, args.seed)
+            results.append(result)
+            storage = result['storage_per_game']
+            print(f'{players:>6} {rounds:>8} {result["games_per_sec"]:>10.1f} {result["rounds_per_game"]:>8.2f} '
+                  f'{result["messages_per_game"]:>8.1f} {storage.get("round_trips", 0):>11.1f} '
+                  f'{storage.get("commands", 0):>8.1f}')
+            for name, stats in [*result['phase_latency'].items(), *result['request_latency'].items()]:
+                print(f'{"":>16} {name:<14} p50 {stats["p50_ms"]:.3f}ms  p95 {stats["p95_ms"]:.3f}ms  '
+                      f'p99 {stats["p99_ms"]:.3f}ms  ({stats["count"]}次)')
+
+    report = {
+        'benchmark': 'bench_game',
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'params': {'games': args.games, 'seed': args.seed, 'backend': args.backend, 'cache': args.cache},
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(results, json.load(f))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+历史记录读取基准：模拟一局很长的对局，比较每次读取完整记录（旧的 LPUSH + LRANGE 0 -1 + reversed）
+与按玩家游标增量读取（RPUSH + Environment.read_history）的耗时和传输量。
+
+用法：
+    python -m benchmarks.bench_history --entries 5000 --read-every 6
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from environment.environment import get_environment, release_environment
+
+PLAYERS = ['playerA', 'playerB', 'playerC', 'playerD', 'playerE', 'playerF']
+
+
+async def legacy_game(env, entries: int, read_every: int) -> dict:
+    """旧实现：LPUSH 写入，每次读取 LRANGE 整个列表后反转并拼接"""
+    redis = await env.connect()
+    key = f'{env.key_prefix}legacy_history'
+    transferred = 0
+    read_time = 0.0
+    for i in range(entries):
+        player = PLAYERS[i % len(PLAYERS)]
+        await redis.lpush(key, f'round:{i // 36},{player},玩家{player}发言：第{i}条发言内容。')
+        if (i + 1) % read_every == 0:
+            for reader in PLAYERS:
+                start = time.perf_counter()
+                text = '\n'.join(reversed(await redis.lrange(key, 0, -1)))
+                read_time += time.perf_counter() - start
+                transferred += len(text)
+    return {'read_s': read_time, 'chars': transferred}
+
+
+async def cursor_game(env, entries: int, read_every: int) -> dict:
+    """新实现：RPUSH 写入，每个玩家只读取自己游标之后的记录"""
+    transferred = 0
+    read_time = 0.0
+    for i in range(entries):
+        player = PLAYERS[i % len(PLAYERS)]
+        await env.add_history(i // 36, player, f'玩家{player}发言：第{i}条发言内容。')
+        if (i + 1) % read_every == 0:
+            for reader in PLAYERS:
+                start = time.perf_counter()
+                text = '\n'.join(await env.read_history(reader))
+                read_time += time.perf_counter() - start
+                transferred += len(text)
+    return {'read_s': read_time, 'chars': transferred}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='历史记录读取基准')
+    parser.add_argument('--entries', type=int, nargs='+', default=[500, 2000, 5000])
+    parser.add_argument('--read-every', type=int, default=6, help='每写入多少条记录，所有玩家各读取一次')
+    args = parser.parse_args()
+
+    print(f'{"记录数":>8} {"实现":<8} {"读取耗时(s)":>12} {"传输字符数":>14}')
+    for entries in args.entries:
+        for name, game in (('legacy', legacy_game), ('cursor', cursor_game)):
+            game_id = f'bench-history-{uuid.uuid4().hex[:8]}'
+            env = get_environment(game_id)
+            result = await game(env, entries, args.read_every)
+            print(f'{entries:>8} {name:<8} {result["read_s"]:>12.3f} {result["chars"]:>14}')
+            await env.clear_environment(full_scan=True)   #包含未登记的 legacy_history 键
+            await release_environment(game_id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+历史记录压缩基准：模拟一局很长的对局，每轮结束时读取一次完整历史，
+比较原样返回（get_history(full=True) 的旧行为）与按 token 预算压缩后的提示词大小和读取耗时。
+
+用法：
+    python -m benchmarks.bench_history_summary --rounds 30 --budgets 500 1000 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from environment.environment import get_environment, release_environment
+from environment.summary import estimate_tokens
+
+PLAYERS = ['playerA', 'playerB', 'playerC', 'playerD', 'playerE', 'playerF']
+PHRASES = ['我是好人', '我觉得playerC的发言很可疑', '昨晚我什么都没看到', '大家不要乱投票',
+           '我同意前面玩家的分析', '狼人一定在后置位', '我建议先投出发言最少的玩家']
+
+
+async def play(env, rounds: int, budget: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    await env.add_history(0, 'world', '本局游戏拥有的角色是：两个狼人，两个村民，一个预言家，一个女巫。')
+    full_tokens = compact_tokens = 0
+    read_time = 0.0
+    final_full = final_compact = 0
+    for round in range(1, rounds + 1):
+        await env.add_history(round, 'world', f'昨晚死亡玩家：{rng.choice(PLAYERS)}')
+        for pid in PLAYERS:
+            speech = '，'.join(rng.choice(PHRASES) for _ in range(4))
+            await env.add_history(round, pid, f'玩家{pid}发言：{speech}。')
+        for pid in PLAYERS:
+            await env.add_history(round, pid, f'玩家{pid}投给了：{rng.choice(PLAYERS)}')
+        await env.add_history(round, 'world', f'投票结果：{rng.choice(PLAYERS)}得票3票，被投票出局')
+
+        start = time.perf_counter()
+        history = await env.read_history('reader', full=True)
+        if budget:
+            history = await env.compact_history(history, budget)
+        read_time += time.perf_counter() - start
+        tokens = sum(estimate_tokens(entry) for entry in history)
+        compact_tokens += tokens
+        full_tokens += sum(estimate_tokens(entry) for entry in await env.get_history())
+        final_compact = tokens
+    final_full = sum(estimate_tokens(entry) for entry in await env.get_history())
+    return {
+        'avg_tokens': compact_tokens / rounds,
+        'avg_full_tokens': full_tokens / rounds,
+        'final_tokens': final_compact,
+        'final_full_tokens': final_full,
+        'read_ms': read_time / rounds * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='历史记录压缩基准')
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[0, 500, 1000, 2000], help='token 预算，0 表示不压缩')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"预算":>6} {"平均tokens":>12} {"最终tokens":>12} {"完整记录":>10} {"每次读取(ms)":>14}')
+    for budget in args.budgets:
+        game_id = f'bench-summary-{uuid.uuid4().hex[:8]}'
+        env = get_environment(game_id)
+        result = await play(env, args.rounds, budget, args.seed)
+        print(f'{budget or "不压缩":>6} {result["avg_tokens"]:>12.0f} {result["final_tokens"]:>12} '
+              f'{result["final_full_tokens"]:>10} {result["read_ms"]:>14.3f}')
+        await env.clear_environment()
+        await release_environment(game_id)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+日志对事件循环的阻塞：模拟多名玩家同时执行 ReAct 步骤，每步按 INFO 级别记录思考、观察等较长的内容，
+比较原来的同步 FileHandler、同步 JSON handler 和队列 + 后台线程写入时：
+事件循环中花在日志调用上的时间（每次调用的平均值和 p99）、循环延迟（每 1ms 的定时器实际晚到的时间）。
+队列模式下剩余记录由后台线程写完，单独统计这部分时间。
+
+用法：
+    python -m benchmarks.bench_logging --players 12 --steps 200 --payload 4096
+"""
+import argparse
+import asyncio
+import logging
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+
+from logs.logging_config import ProcessLogHandler, flush_logs
+from logs.tracing import percentile
+
+MODES = ('filehandler', 'sync', 'async')
+
+
+def create_logger(mode: str, log_dir: Path) -> logging.Logger:
+    logger = logging.getLogger(f'bench_{mode}')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers.clear()
+    if mode == 'filehandler':
+        #旧做法：每个 logger 一个同步 FileHandler，每条记录在调用方线程中格式化、写入并 flush
+        handler = logging.FileHandler(log_dir / 'filehandler.log', encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
+    else:
+        handler = ProcessLogHandler(str(log_dir / f'{mode}.log'), asynchronous=mode == 'async')
+    logger.addHandler(handler)
+    return logger
+
+
+async def player(logger: logging.Logger, player_id: str, steps: int, payload: str, call_times: list):
+    for step in range(steps):
+        for message, arg in (('请求模型', None), ('Thought: %s', payload), ('Action: %s:%s', ['check_alive_players']),
+                             ('Observation: %s', payload[:len(payload) // 2])):
+            start = time.perf_counter()
+            if arg is None:
+                logger.info(message)
+            elif isinstance(arg, list):
+                logger.info(message, player_id, arg)
+            else:
+                logger.info(message, arg)
+            call_times.append(time.perf_counter() - start)
+        await asyncio.sleep(0)   #模型请求
+
+
+async def ticker(stop: asyncio.Event, lags: list, interval: float = 0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(time.perf_counter() - start - interval, 0.0))
+
+
+async def run(mode: str, log_dir: Path, players: int, steps: int, payload: str) -> dict:
+    logger = create_logger(mode, log_dir)
+    call_times, lags = [], []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(player(logger, f'player{i}', steps, payload, call_times) for i in range(players)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    drain_start = time.perf_counter()
+    if mode == 'async':
+        flush_logs()
+    for handler in logger.handlers:
+        handler.flush()
+    drain = time.perf_counter() - drain_start
+    call_times.sort()
+    lags.sort()
+    return {
+        'elapsed': elapsed, 'blocked': sum(call_times), 'calls': len(call_times),
+        'mean_us': sum(call_times) / len(call_times) * 1e6, 'p99_us': percentile(call_times, 99) * 1e6,
+        'max_lag_ms': (lags[-1] if lags else 0.0) * 1000, 'drain': drain,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='日志对事件循环的阻塞')
+    parser.add_argument('--players', type=int, default=12)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--payload', type=int, default=4096, help='每条思考的字符数，观察为其一半')
+    args = parser.parse_args()
+    payload = ''.join(random.Random(0).choices(string.ascii_letters + '狼人预言家女巫', k=args.payload))
+
+    print(f'{"":>12} {"总耗时(s)":>10} {"日志阻塞(s)":>11} {"平均(us)":>9} {"p99(us)":>9} '
+          f'{"最大延迟(ms)":>12} {"写完剩余(s)":>11}')
+    with tempfile.TemporaryDirectory() as log_dir:
+        #异步模式必须最后运行：flush_logs 之后的日志改为同步写入
+        for mode in MODES:
+            stats = await run(mode, Path(log_dir), args.players, args.steps, payload)
+            print(f'{mode:>12} {stats["elapsed"]:>10.3f} {stats["blocked"]:>11.3f} {stats["mean_us"]:>9.1f} '
+                  f'{stats["p99_us"]:>9.1f} {stats["max_lag_ms"]:>12.2f} {stats["drain"]:>11.3f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
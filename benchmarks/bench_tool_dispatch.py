@@ -0,0 +1,95 @@
+"""
+工具分发开销微基准：比较每次调用都用 inspect 解析签名（ToolRegistry 之前 _run 的做法）
+与使用预先解析好的 ToolRegistry 时，每次分发（查找工具、注入 self_id、调用）的耗时，以及渲染工具列表的耗时。
+工具本身替换为空操作，只测量分发部分。
+
+用法：
+    python -m benchmarks.bench_tool_dispatch --iterations 100000
+"""
+import argparse
+import asyncio
+import inspect
+import time
+
+from environment.settings import Role
+from tools.tools_loader import ToolRegistry, load_tools
+
+
+async def check_identity(self_id: str, target_id: str) -> str:
+    """空操作，签名与 tools.seer.check_identity 相同"""
+    return target_id
+
+
+async def check_alive_players() -> str:
+    """空操作，签名与 tools.common.check_alive_players 相同"""
+    return ''
+
+
+CALLS = [('check_identity', ['playerB']), ('check_alive_players', [])]
+
+
+async def dispatch_inspect(tools: dict, player_id: str, tool_name: str, args: list):
+    """旧做法：每次调用都重新解析签名"""
+    tool_func = tools[tool_name]
+    sig = inspect.signature(tool_func)
+    param_names = list(sig.parameters.keys())
+    if 'self_id' in param_names:
+        param_index = param_names.index('self_id')
+        args_list = list(args)
+        if len(args_list) == 0:
+            args_list.append(player_id)
+        elif len(args_list) < len(sig.parameters):
+            args_list.insert(param_index, player_id)
+        else:
+            args_list[param_index] = player_id
+        args = tuple(args_list)
+    if asyncio.iscoroutinefunction(tool_func):
+        return await tool_func(*args)
+    return tool_func(*args)
+
+
+async def dispatch_registry(registry: ToolRegistry, player_id: str, tool_name: str, args: list):
+    return await registry.get(tool_name).call(player_id, args)
+
+
+def render_inspect(tools) -> str:
+    return '\n'.join(f'- {func.__name__}{inspect.signature(func)}: {inspect.getdoc(func)}' for func in tools)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='工具分发开销微基准')
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    tools = {func.__name__: func for func in (check_identity, check_alive_players)}
+    registry = ToolRegistry(list(tools.values()))
+
+    start = time.perf_counter()
+    for i in range(n):
+        name, call_args = CALLS[i % 2]
+        await dispatch_inspect(tools, 'playerA', name, call_args)
+    inspect_us = (time.perf_counter() - start) / n * 1e6
+
+    start = time.perf_counter()
+    for i in range(n):
+        name, call_args = CALLS[i % 2]
+        await dispatch_registry(registry, 'playerA', name, call_args)
+    registry_us = (time.perf_counter() - start) / n * 1e6
+
+    #工具列表：每次都用 inspect 渲染 vs 注册表中预先渲染好的字符串
+    role_tools = load_tools(Role.WOLF)
+    renders = max(n // 100, 1)
+    start = time.perf_counter()
+    for _ in range(renders):
+        render_inspect(role_tools)
+    render_us = (time.perf_counter() - start) / renders * 1e6
+
+    print(f'{"":>12} {"每次分发(us)":>14}')
+    print(f'{"inspect":>12} {inspect_us:>14.3f}')
+    print(f'{"registry":>12} {registry_us:>14.3f}')
+    print(f'加速 {inspect_us / registry_us:.1f}x；渲染狼人工具列表 {render_us:.1f}us/次（注册表中只渲染一次）')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""
+对局农场：把大量对局分片到进程池中并行运行，汇总胜率和每个进程的吞吐。
+
+每局使用独立的 game_id（独立的键前缀）和独立的随机种子，玩家由进程内的随机策略扮演，
+不需要启动 OpenAgents 网络。对局种子只与对局编号有关，与分片方式无关，结果可以复现。
+
+用法：
+    python -m engine.farm --games 1000 --workers 4 [--concurrency 8] [--backend memory] [--json report.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from engine.local import play_local_game, random_policies
+
+
+@dataclass
+class GameRecord:
+    game_id: str
+    seed: int
+    winner: str
+    rounds: int
+    elapsed: float
+
+
+@dataclass
+class ShardResult:
+    worker: int
+    pid: int
+    elapsed: float
+    games: List[GameRecord] = field(default_factory=list)
+
+
+async def _play_shard(run_id: str, worker: int, indices: List[int], base_seed: int, concurrency: int,
+                      think_time: float, max_rounds: Optional[int], vote_mode: str) -> ShardResult:
+    semaphore = asyncio.Semaphore(concurrency)
+    shard = ShardResult(worker, os.getpid(), 0.0)
+
+    async def play(index: int):
+        async with semaphore:
+            game_id = f'farm-{run_id}-{index}'
+            seed = base_seed + index
+            start = time.perf_counter()
+            result = await play_local_game(game_id, random_policies(seed, think_time), seed=seed,
+                                           max_rounds=max_rounds, vote_mode=vote_mode)
+            shard.games.append(GameRecord(game_id, seed, result.winner or 'draw', result.rounds,
+                                          time.perf_counter() - start))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(index) for index in indices))
+    shard.elapsed = time.perf_counter() - start
+    shard.games.sort(key=lambda record: record.seed)
+    return shard
+
+
+def run_shard(run_id: str, worker: int, indices: List[int], base_seed: int, concurrency: int = 1,
+              think_time: float = 0.0, max_rounds: Optional[int] = 20, vote_mode: str = 'sequential',
+              backend: str = 'redis') -> ShardResult:
+    """在子进程中运行一个分片的所有对局"""
+    os.environ['ENV_BACKEND'] = backend
+    return asyncio.run(_play_shard(run_id, worker, indices, base_seed, concurrency,
+                                   think_time, max_rounds, vote_mode))
+
+
+def aggregate(shards: List[ShardResult], elapsed: float) -> Dict:
+    """把各个分片的结果汇总为一份报告"""
+    games = [record for shard in shards for record in shard.games]
+    winners = Counter(record.winner for record in games)
+    total = len(games)
+    return {
+        'games': total,
+        'elapsed_s': elapsed,
+        'games_per_sec': total / elapsed if elapsed else 0.0,
+        'win_rates': {winner: count / total for winner, count in sorted(winners.items())} if total else {},
+        'avg_rounds': sum(record.rounds for record in games) / total if total else 0.0,
+        'workers': [
+            {
+                'worker': shard.worker,
+                'pid': shard.pid,
+                'games': len(shard.games),
+                'elapsed_s': shard.elapsed,
+                'games_per_sec': len(shard.games) / shard.elapsed if shard.elapsed else 0.0,
+            }
+            for shard in shards
+        ],
+    }
+
+
+def run_farm(games: int, workers: int, seed: int = 0, concurrency: int = 1, think_time: float = 0.0,
+             max_rounds: Optional[int] = 20, vote_mode: str = 'sequential', backend: str = 'redis',
+             include_games: bool = False) -> Dict:
+    run_id = uuid.uuid4().hex[:8]
+    shards_indices = [list(range(worker, games, workers)) for worker in range(workers)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_shard, run_id, worker, indices, seed, concurrency,
+                        think_time, max_rounds, vote_mode, backend)
+            for worker, indices in enumerate(shards_indices) if indices
+        ]
+        shards = [future.result() for future in futures]
+    report = aggregate(shards, time.perf_counter() - start)
+    report['run_id'] = run_id
+    if include_games:
+        report['game_records'] = [asdict(record) for shard in shards for record in shard.games]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程对局农场')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--concurrency', type=int, default=1, help='每个进程内同时进行的对局数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--think-ms', type=float, default=0.0, help='模拟每次玩家决策的耗时（毫秒）')
+    parser.add_argument('--max-rounds', type=int, default=20)
+    parser.add_argument('--vote-mode', choices=['sequential', 'parallel'], default='sequential')
+    parser.add_argument('--backend', choices=['redis', 'memory'], default='redis', help='Environment 存储后端')
+    parser.add_argument('--json', help='将完整报告（包含每局结果）写入该 JSON 文件')
+    args = parser.parse_args()
+
+    report = run_farm(args.games, args.workers, args.seed, args.concurrency, args.think_ms / 1000,
+                      args.max_rounds, args.vote_mode, args.backend, include_games=bool(args.json))
+
+    print(f'{report["games"]}局，耗时{report["elapsed_s"]:.3f}s，{report["games_per_sec"]:.1f}局/秒，'
+          f'平均{report["avg_rounds"]:.2f}轮')
+    print('胜率：' + ', '.join(f'{winner} {rate:.1%}' for winner, rate in report['win_rates'].items()))
+    print(f'{"进程":>6} {"pid":>8} {"局数":>6} {"耗时(s)":>10} {"局/秒":>10}')
+    for worker in report['workers']:
+        print(f'{worker["worker"]:>6} {worker["pid"]:>8} {worker["games"]:>6} '
+              f'{worker["elapsed_s"]:>10.3f} {worker["games_per_sec"]:>10.1f}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,513 @@
+import asyncio
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Protocol, Set
+
+from engine.scheduler import NightReport, NightScheduler
+from environment.environment import Environment
+from environment.events import EventType, GameEvent
+from environment.settings import GamePhase, Role, all_roles, Action6
+from logs.logging_config import setup_logger
+from logs.tracing import span
+
+logger = setup_logger('world')
+
+KILL_PROMPT = (
+    'Execute:请选择击杀目标，得到结果后进入最终回答阶段。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '最终回复格式：Execute:目标玩家id\n'
+    '例如：Execute:playerA'
+)
+SEE_PROMPT = (
+    'Execute:请选择预言目标，得到结果后进入最终回答阶段。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '最终回复格式:Execute:目标玩家id\n'
+    '例如:Execute:playerA'
+)
+NO_CURE_PROMPT = (
+    'Execute:今晚没有玩家被杀害或者今晚被杀害的玩家是女巫自己，无法使用解药，进入最终回答阶段。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '最终回复格式：Execute:不使用解药\n'
+    '例如：Execute:不使用解药'
+)
+CURE_PROMPT = (
+    'Execute:今晚{killed_player}被杀了，请问需要使用解药吗。当你做出行动之后进入最终回答阶段。\n'
+    '注意：如果你今晚使用解药，你将无法使用毒药。如果你想在本晚使用毒药，请选择不使用解药。\n'
+    '注意：如果你今晚选择解救目标玩家，必须使用对应的解药工具。\n'
+    '注意：女巫不能解救自己。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '最终回复格式：Execute:选择\n'
+    '例如：Execute:使用、Execute:不使用'
+)
+POISON_PROMPT = (
+    'Execute:请选择毒杀目标，选择完成后进入最终回答阶段。\n'
+    '注意：如果你今晚选择毒杀目标玩家，必须使用对应的毒药工具。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '最终回复格式：Execute:目标玩家id\n'
+    '例如：Execute:playerA'
+)
+SPEECH_PROMPT = (
+    'Speech:请发言，发言结束后进入最终回答阶段。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '发言内容尽量简洁明了。\n'
+    '最终回复格式：Speech:发言内容\n'
+)
+VOTE_RULES = (
+    '注意：你只能投票给一个玩家，不能投给自己和已经出局的玩家。\n'
+    '如果你是好人，请投票给你觉得是狼人的玩家；如果你是狼人，请尽量保证自己和队友不被投出去。\n'
+    '得票最高的玩家将出局，如果得票最高玩家有多个，则跳过此次投票。\n'
+    '如果本次输出为<final_answer>，输出内容请按照最终回复格式。\n'
+    '最终回复格式：Vote:目标玩家id\n'
+    '例如：Vote:playerA'
+)
+VOTE_PROMPT = 'Vote:请投票，选择完成后进入最终回答阶段。\n' + VOTE_RULES
+RE_VOTE_PROMPT = 'Vote:你刚刚把票投给了自己或者已出局的玩家，请重新投票，选择完成后进入最终回答阶段。\n' + VOTE_RULES
+
+VOTE_MODES = ('sequential', 'parallel')
+#超时或多次投票不合法时的兜底：abstain 视为弃票，random 随机投给一名合法目标（由种子、轮次和玩家决定）
+VOTE_FALLBACKS = ('abstain', 'random')
+#同一次投票中允许重新投票的次数，超过后按 vote_fallback 处理
+MAX_REVOTES = 2
+
+
+class GameIO(Protocol):
+    """引擎与玩家之间的通信接口，可以是 OpenAgents 网络，也可以是进程内的玩家策略"""
+
+    async def announce(self, text: str):
+        """向所有玩家公开发布消息"""
+        ...
+
+    async def send_role(self, player_id: str, role: Role):
+        """私下告知玩家角色"""
+        ...
+
+    async def ask(self, player_id: str, kind: str, instructions: str, action: Optional[Action6] = None) -> str:
+        """
+        向玩家发出请求并等待回复。
+
+        Args:
+            kind: 'Execute'、'Speech' 或 'Vote'
+            instructions: 完整的请求消息，例如 'Vote:请投票...'
+            action: 夜晚行动对应的 Action6，发言和投票时为 None
+        Returns:
+            str: 玩家回复的内容（已去掉 'Speech:' / 'Vote:' 前缀），Execute 请求回复为空字符串
+        """
+        ...
+
+
+@dataclass
+class GameResult:
+    winner: str     # 'good'、'wolf'，达到最大轮数或人数不支持时为空字符串
+    rounds: int
+    nights: List[NightReport] = field(default_factory=list)
+    timeouts: Dict[str, int] = field(default_factory=dict)     #请求类型 -> 超时次数
+
+
+def parse_vote(vote: str) -> str:
+    """解析投票内容：target_id="playerA" -> playerA"""
+    if '=' in vote:
+        return vote.split('=', 1)[1].strip().strip('"').strip("'")
+    return vote.strip().strip('"').strip("'")
+
+
+class GameEngine:
+    """
+    与通信方式无关的游戏流程状态机：加入、分配角色、夜晚行动、天亮结算、发言、投票，直到游戏结束。
+    所有与玩家的交互都通过 GameIO 完成。
+    """
+
+    def __init__(
+        self,
+        environment: Environment,
+        io: GameIO,
+        max_players_num: int = 6,
+        seed: Optional[int] = None,
+        max_rounds: Optional[int] = None,
+        vote_mode: str = 'sequential',
+        vote_timeout: Optional[float] = None,
+        deadlines: Optional[Dict[str, float]] = None,
+        vote_fallback: str = 'abstain',
+    ):
+        if vote_mode not in VOTE_MODES:
+            raise ValueError(f'Unknown vote mode: {vote_mode}')
+        if vote_fallback not in VOTE_FALLBACKS:
+            raise ValueError(f'Unknown vote fallback: {vote_fallback}')
+        self.environment = environment
+        self.io = io
+        self.max_players_num = max_players_num
+        self.max_rounds = max_rounds
+        self.vote_mode = vote_mode          #sequential：逐个投票；parallel：同时向所有玩家发出投票请求
+        self.vote_timeout = vote_timeout    #parallel 模式的投票截止时间（秒），超时未投票视为弃票
+        #每次请求的截止时间（秒），按请求类型 'Execute' / 'Speech' / 'Vote' 配置，未配置的不限时
+        self.deadlines: Dict[str, float] = dict(deadlines or {})
+        self.vote_fallback = vote_fallback
+        self.timeouts: Counter = Counter()
+        self._seed = seed
+        self._rng = random.Random(seed)
+        #随机兜底投票的种子：未指定 seed 时（例如 GodAgent）每局随机生成，避免每局对同一玩家、同一轮给出相同的目标
+        self._fallback_seed = seed if seed is not None else random.getrandbits(64)
+
+        self.players: List[str] = []
+        self.roles: Dict[str, Role] = {}
+        self.actions: Dict[Role, List[str]] = {     #角色 -> 玩家id列表
+            Role.WOLF: [],
+            Role.SEER: [],
+            Role.WITCH: [],
+            Role.HUNTER: []
+        }
+        self.round: int = 0
+        self.speech_list: List[str] = []
+        self.vote_result: List[str] = []
+        self.winner: str = ''
+        self._night_scheduler = NightScheduler()
+        self.night_reports: List[NightReport] = []
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.players) == self.max_players_num
+
+    async def reset(self):
+        if self._seed is None:
+            self._fallback_seed = random.getrandbits(64)
+        await self.environment.clear_environment()
+        await self.environment.set_phase(GamePhase.WAITING)
+        await self.environment.init_witch_items()
+
+    async def add_player(self, player_id: str) -> bool:
+        """玩家加入，返回人数是否已满"""
+        self.players.append(player_id)
+        await self.environment.record_event(EventType.JOIN, actor=player_id)
+        await self.io.announce(f'玩家{player_id}加入了游戏，当前玩家数量：{len(self.players)}')
+        if self.is_full:
+            await self.io.announce('游戏人数已满！')
+            logger.info('游戏人数已满，即将开始游戏')
+        return self.is_full
+
+    async def remove_player(self, player_id: str):
+        self.players.remove(player_id)
+        await self.environment.record_event(EventType.LEAVE, actor=player_id)
+        await self.io.announce(f'玩家{player_id}离开了游戏，当前玩家数量：{len(self.players)}')
+
+    async def run(self) -> GameResult:
+        """运行一局完整的游戏，直到分出胜负"""
+        if not await self._start_game():
+            return GameResult('', self.round, self.night_reports, dict(self.timeouts))
+        while True:
+            await self._night()
+            if await self._day():
+                break
+            if self.max_rounds is not None and self.round >= self.max_rounds:
+                logger.info('达到最大轮数%d，游戏结束', self.max_rounds)
+                await self.environment.set_phase(GamePhase.ENDED)
+                break
+        return GameResult(self.winner, self.round, self.night_reports, dict(self.timeouts))
+
+    async def _ask(self, player_id: str, kind: str, instructions: str, action: Optional[Action6] = None) -> Optional[str]:
+        """
+        向玩家发出请求，超过该类请求的截止时间时返回 None，由调用方执行兜底行动
+        （夜晚行动视为放弃，发言视为沉默，投票按 vote_fallback 处理）。超时后才到达的回复会被丢弃。
+        """
+        name = action.name if action is not None else kind
+        with span('request', name, self.environment.game_id, player=player_id, round=self.round) as attrs:
+            if action is not None:
+                await self.environment.grant_action(player_id, action)
+            try:
+                return await asyncio.wait_for(self.io.ask(player_id, kind, instructions, action),
+                                              self.deadlines.get(kind))
+            except asyncio.TimeoutError:
+                self.timeouts[kind] += 1
+                attrs['timed_out'] = True
+                logger.warning('%s未在%s秒内回复%s请求，执行兜底行动', player_id, self.deadlines[kind], kind)
+                return None
+            finally:
+                #收回行动令牌：超时后才执行的击杀、解药、毒药工具调用不会生效
+                if action is not None:
+                    await self.environment.revoke_action(player_id)
+
+    async def _start_game(self) -> bool:
+        await self.environment.set_phase(GamePhase.PREPARING)
+        await self.environment.set_alive_players(self.players.copy())
+
+        logger.info('开始分配角色...')
+        await self.io.announce('游戏开始！开始分配角色...')
+
+        players_list = self.players.copy()
+        if len(players_list) != self.max_players_num:
+            await self.io.announce('玩家数量不足，游戏无法开始！')
+            await self.environment.set_phase(GamePhase.WAITING)
+            return False
+        self._rng.shuffle(players_list)
+
+        for i in range(len(players_list)):
+            await self.environment.set_role(players_list[i], all_roles[i])
+            self.roles[players_list[i]] = all_roles[i]
+
+        for pid, role in self.roles.items():
+            if role in self.actions:
+                self.actions[role].append(pid)
+
+        for pid, role in self.roles.items():
+            await self.io.send_role(pid, role)
+            logger.info('%s is %s', pid, role.value)
+
+        await self.environment.add_history(0, 'world', '本局游戏拥有的角色是：两个狼人，两个村民，一个预言家，一个女巫。')
+        for wolf in self.actions[Role.WOLF]:
+            peers = [peer for peer in self.actions[Role.WOLF] if peer != wolf]
+            await self.environment.add_player_memory(wolf, '你的狼人队友是' + ', '.join(peers))
+
+        await self.io.announce('角色分配完成！游戏正式开始...')
+        logger.info('角色分配完成！游戏正式开始...')
+        return True
+
+    async def _is_game_over(self, alive_players: Optional[Set[str]] = None) -> bool:
+        wolf_count = len(self.actions[Role.WOLF])
+        if alive_players is None:
+            alive_players = await self.environment.get_alive_players()
+        alive_players_count = len(alive_players)
+        match self.max_players_num:
+            case 6:
+                if wolf_count == 0:
+                    self.winner = 'good'
+                    await self.io.announce('狼人全部死亡，好人阵营胜利，游戏结束！')
+                elif wolf_count >= alive_players_count - wolf_count:
+                    self.winner = 'wolf'
+                    await self.io.announce('狼人数量大于等于好人数量，狼人阵营胜利，游戏结束！')
+                else:
+                    return False
+                await self.environment.set_phase(GamePhase.ENDED)
+                await self.environment.record_event(EventType.GAME_OVER, self.round, content=self.winner)
+                return True
+            case _:
+                await self.io.announce('游戏人数不支持，游戏结束！')
+                return True
+
+    def _remove_action(self, agent_id: str):
+        for role in [Role.WOLF, Role.SEER, Role.WITCH]:
+            if agent_id in self.actions[role]:
+                self.actions[role].remove(agent_id)
+                logger.info('%s已出局', agent_id)
+
+    # 夜晚
+    async def _night(self):
+        await self.environment.set_phase(GamePhase.NIGHT)
+        self.round += 1
+        await self.environment.increment_round()
+        logger.info('第%d轮夜晚', self.round)
+        with span('phase', 'night', self.environment.game_id, round=self.round):
+            await self.io.announce('天黑请闭眼...')
+
+            steps = {
+                Action6.WOLF1_KILL: self._wolves_kill,
+                Action6.WOLF2_KILL: lambda: self._wolf_kill(1, Action6.WOLF2_KILL),
+                Action6.SEER_SEE: self._seer_see,
+                Action6.WITCH_CURE: self._witch_cure,
+                Action6.WITCH_POISON: self._witch_poison,
+            }
+            report = await self._night_scheduler.run(self.round, steps)
+        self.night_reports.append(report)
+        logger.info('%s', report)   #由写日志的线程调用 NightReport.__str__ 格式化
+
+    async def _wolves_kill(self):
+        await self.io.announce('狼人请选择击杀目标...')
+        if len(self.actions[Role.WOLF]) == 0:
+            logger.info('狼人已全部出局')
+        await self._wolf_kill(0, Action6.WOLF1_KILL)
+
+    async def _wolf_kill(self, index: int, action: Action6):
+        if len(self.actions[Role.WOLF]) <= index:
+            if index > 0:
+                logger.info('狼人%d已出局', index + 1)
+            return
+        wolf = self.actions[Role.WOLF][index]
+        logger.info('向狼人%d(%s)发送Execute请求...', index + 1, wolf)
+        await self._ask(wolf, 'Execute', KILL_PROMPT, action)
+
+    async def _seer_see(self):
+        await self.io.announce('预言家请选择查看目标...')
+        if len(self.actions[Role.SEER]) == 0:
+            logger.info('预言家已出局')
+            return
+        seer = self.actions[Role.SEER][0]
+        logger.info('向预言家(%s)发送Execute请求...', seer)
+        await self._ask(seer, 'Execute', SEE_PROMPT, Action6.SEER_SEE)
+
+    async def _witch_cure(self):
+        await self.io.announce('女巫请选择是否使用解药...')
+        if len(self.actions[Role.WITCH]) == 0:
+            logger.info('女巫已出局')
+            return
+        witch = self.actions[Role.WITCH][0]
+        cure_status = await self.environment.get_cure_status()
+        if cure_status == 'used':
+            logger.info('解药已经使用过了')
+            return
+        killed_player = await self.environment.get_player_killed_tonight()
+        logger.info('向女巫(%s)发送Execute请求...', witch)
+        if killed_player is None or killed_player == witch:
+            await self._ask(witch, 'Execute', NO_CURE_PROMPT, Action6.WITCH_CURE)
+        else:
+            await self._ask(witch, 'Execute', CURE_PROMPT.format(killed_player=killed_player), Action6.WITCH_CURE)
+
+    async def _witch_poison(self):
+        if len(self.actions[Role.WITCH]) == 0:
+            return
+        await self.io.announce('女巫请选择是否使用毒药...')
+        witch = self.actions[Role.WITCH][0]
+        poison_status = await self.environment.get_poison_status()
+        if poison_status == 'used':
+            logger.info('毒药已经使用过了')
+            return
+        cure_tonight_status = await self.environment.get_cure_tonight()
+        if cure_tonight_status:
+            logger.info('今晚解药已经使用过了，无法使用毒药')
+            return
+        logger.info('向女巫(%s)发送Execute请求...', witch)
+        await self._ask(witch, 'Execute', POISON_PROMPT, Action6.WITCH_POISON)
+
+    # 白天
+    async def _day(self) -> bool:
+        """天亮结算、发言、投票，返回游戏是否结束"""
+        with span('phase', 'day', self.environment.game_id, round=self.round):
+            player_dead_tonight, alive_players = await self.environment.resolve_dawn()
+            for player_id in player_dead_tonight:
+                self._remove_action(player_id)
+
+            if await self._is_game_over(alive_players):
+                return True
+
+            await self.io.announce('天亮了，请睁眼...')
+            if len(player_dead_tonight) == 0:
+                await self.io.announce('昨晚是个平安夜，没有玩家死亡')
+                await self.environment.add_history(self.round, 'world', '昨晚是个平安夜，没有玩家死亡')
+            else:
+                await self.io.announce('昨晚死亡玩家：' + ', '.join(player_dead_tonight))
+                await self.environment.add_history(self.round, 'world', '昨晚死亡玩家：' + ', '.join(player_dead_tonight))
+
+            self.speech_list = sorted(alive_players)
+            self._rng.shuffle(self.speech_list)
+
+            for speech_player in self.speech_list:
+                await self._speech(speech_player)
+            logger.info('所有玩家发言结束')
+            await self.io.announce('所有玩家发言结束，进入投票阶段...')
+
+        with span('phase', 'vote', self.environment.game_id, round=self.round, mode=self.vote_mode):
+            if self.vote_mode == 'parallel':
+                await self._parallel_vote()
+            else:
+                for vote_player in self.speech_list:
+                    vote = await self._request_vote(vote_player)
+                    if vote is not None:
+                        await self._record_vote(vote_player, vote)
+            logger.info('所有玩家投票结束')
+            await self.io.announce('所有玩家投票结束...')
+            return await self._end_vote()
+
+    async def _speech(self, speech_player: str):
+        await self.io.announce(f'{speech_player}请发言...')
+        speech = await self._ask(speech_player, 'Speech', SPEECH_PROMPT)
+        if speech is None:
+            await self.io.announce(f'{speech_player}未在规定时间内发言，视为放弃发言')
+            await self.environment.add_history(self.round, 'world', f'玩家{speech_player}超时，放弃发言')
+            return
+        logger.info('获取%s的Speech:%s', speech_player, speech)
+        await self.environment.add_history(self.round, speech_player, f'玩家{speech_player}发言：{speech}',
+                                           GameEvent(EventType.SPEECH, self.round, speech_player, content=speech))
+
+    async def _request_vote(self, vote_player: str) -> Optional[str]:
+        """
+        向玩家请求投票，投票不合法时要求该玩家重新投票，返回合法的投票目标。
+        超时或重新投票超过 MAX_REVOTES 次时按 vote_fallback 处理，弃票时返回 None。
+        """
+        await self.io.announce(f'{vote_player}请投票...')
+        instructions = VOTE_PROMPT
+        for attempt in range(MAX_REVOTES + 1):
+            reply = await self._ask(vote_player, 'Vote', instructions)
+            if reply is None:
+                break
+            vote = parse_vote(reply)
+            alive_players = await self.environment.get_alive_players()
+            if vote not in alive_players:
+                logger.error('不能投票给已出局玩家，当前玩家%s的vote为%s，当前玩家列表为%s', vote_player, vote, alive_players)
+            elif vote == vote_player:
+                logger.error('不能投票给自己，当前玩家%s的vote为%s', vote_player, vote)
+            else:
+                return vote
+            if attempt < MAX_REVOTES:
+                await self.io.announce(f'投票不符合要求，{vote_player}请重新投票...')
+                instructions = RE_VOTE_PROMPT
+        return await self._fallback_vote(vote_player)
+
+    async def _fallback_vote(self, vote_player: str) -> Optional[str]:
+        if self.vote_fallback == 'abstain':
+            await self.io.announce(f'{vote_player}未能完成有效投票，视为弃票')
+            return None
+        alive_players = await self.environment.get_alive_players()
+        candidates = sorted(pid for pid in alive_players if pid != vote_player)
+        if not candidates:
+            return None
+        #不使用 self._rng：parallel 模式下各玩家完成的顺序不确定，按种子、轮次和玩家单独生成保证结果可复现
+        vote = random.Random(f'{self._fallback_seed}:{self.round}:{vote_player}').choice(candidates)
+        await self.io.announce(f'{vote_player}未能完成有效投票，随机投给{vote}')
+        return vote
+
+    async def _record_vote(self, vote_player: str, vote: str):
+        self.vote_result.append(vote)
+        logger.info('获取%s的Vote:%s', vote_player, vote)
+        await self.environment.add_history(self.round, vote_player, f'玩家{vote_player}投给了：{vote}',
+                                           GameEvent(EventType.VOTE, self.round, vote_player, vote))
+
+    async def _parallel_vote(self):
+        """
+        同时向所有玩家请求投票，每个玩家各自处理重新投票，截止时间到达后未完成的投票视为弃票。
+        投票按发言顺序写入历史和计票，统计结果与逐个投票一致。
+        """
+        tasks = {player: asyncio.create_task(self._request_vote(player)) for player in self.speech_list}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.vote_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for vote_player, task in tasks.items():
+            if task in done:
+                if task.result() is not None:
+                    await self._record_vote(vote_player, task.result())
+            else:
+                logger.warning('%s未在%s秒内完成投票，视为弃票', vote_player, self.vote_timeout)
+                await self.io.announce(f'{vote_player}未在规定时间内投票，视为弃票')
+
+    async def _end_vote(self) -> bool:
+        """统计投票结果，返回游戏是否结束"""
+        vote_counts = Counter(self.vote_result)
+        if not vote_counts:
+            await self.io.announce('本轮没有有效投票，无人出局。')
+            await self.environment.add_history(self.round, 'world', '本轮没有有效投票，无人出局')
+            return await self._is_game_over()
+        # 显示投票详情
+        vote_details = ', '.join([f'{player}({votes}票)' for player, votes in vote_counts.items()])
+        await self.io.announce(f'投票详情：{vote_details}')
+        logger.info('投票详情：%s', vote_details)
+
+        # 找出最高票数
+        max_votes = max(vote_counts.values())
+
+        # 找出所有得票最高的玩家
+        top_voted = [player for player, votes in vote_counts.items() if votes == max_votes]
+
+        # 检查是否平票
+        if len(top_voted) > 1:
+            await self.io.announce(f'平票！得票最高的玩家有：{", ".join(top_voted)}，每人得票{max_votes}票。本轮无人出局。')
+            logger.info('平票：%s，每人%s票', top_voted, max_votes)
+            await self.environment.add_history(self.round, 'world', f'平票：{", ".join(top_voted)}，每人{max_votes}票，无人出局')
+        else:
+            eliminated_player = top_voted[0]
+            await self.io.announce(f'投票结果：{eliminated_player}得票{max_votes}票，被投票出局。')
+            logger.info('投票结果：%s得票%s票，被投票出局', eliminated_player, max_votes)
+            await self.environment.add_history(self.round, 'world', f'投票结果：{eliminated_player}得票{max_votes}票，被投票出局')
+            self._remove_action(eliminated_player)
+            await self.environment.remove_alive_player(eliminated_player)
+
+        self.vote_result.clear()
+        return await self._is_game_over()
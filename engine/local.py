@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Optional
+
+from engine.game_engine import GameEngine, GameResult
+from agents.react_player import tool_mode
+from engine.policies import LLMPolicy, PlayerPolicy, RandomPolicy
+from environment.environment import game_context, release_environment
+from environment.settings import Role, Action6
+from llm.backend import LLMBackend, create_llm_backend, llm_metrics
+
+
+class LocalGameIO:
+    """在同一进程内把 GameEngine 的请求直接交给玩家策略处理，不经过网络"""
+
+    def __init__(self, game_id: str, policies: Dict[str, PlayerPolicy]):
+        self.game_id = game_id
+        self.policies = policies
+        self.messages = 0   #引擎发出的消息数（公告 + 私信）
+
+    async def announce(self, text: str):
+        self.messages += 1
+
+    async def send_role(self, player_id: str, role: Role):
+        self.messages += 1
+        self.policies[player_id].on_role(role)
+
+    async def ask(self, player_id: str, kind: str, instructions: str, action: Optional[Action6] = None) -> str:
+        self.messages += 1
+        with game_context(self.game_id) as env:
+            async with env.cache_snapshot():
+                return await self.policies[player_id].act(kind, instructions, action)
+
+
+PLAYERS = ['playerA', 'playerB', 'playerC', 'playerD', 'playerE', 'playerF']
+
+
+def random_policies(seed: int, think_time: float = 0.0) -> Dict[str, PlayerPolicy]:
+    """为一局游戏创建随机策略玩家，每个玩家的随机种子由对局种子推导"""
+    return {pid: RandomPolicy(pid, seed=seed * len(PLAYERS) + j, think_time=think_time) for j, pid in enumerate(PLAYERS)}
+
+
+def llm_policies(game_id: str, client: LLMBackend) -> Dict[str, PlayerPolicy]:
+    """为一局游戏创建 ReActPlayer 驱动的玩家，所有玩家共享同一个模型后端"""
+    return {pid: LLMPolicy(pid, game_id, client) for pid in PLAYERS}
+
+
+async def play_local_game(
+    game_id: str,
+    policies: Dict[str, PlayerPolicy],
+    seed: Optional[int] = None,
+    max_rounds: Optional[int] = None,
+    vote_mode: str = 'sequential',
+    vote_timeout: Optional[float] = None,
+    deadlines: Optional[Dict[str, float]] = None,
+    vote_fallback: str = 'abstain',
+    io: Optional[LocalGameIO] = None,
+) -> GameResult:
+    """在进程内跑完一局游戏，结束后清理该局的环境；传入 io 时可以在结束后读取其中的消息计数"""
+    io = io or LocalGameIO(game_id, policies)
+    with game_context(game_id) as env:
+        engine = GameEngine(env, io, max_players_num=len(policies), seed=seed, max_rounds=max_rounds,
+                            vote_mode=vote_mode, vote_timeout=vote_timeout, deadlines=deadlines,
+                            vote_fallback=vote_fallback)
+        await engine.reset()
+        for player_id in policies:
+            await engine.add_player(player_id)
+        result = await engine.run()
+        await env.clear_environment()
+    await release_environment(game_id)
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='不启动 OpenAgents 网络，在进程内跑完若干局游戏')
+    parser.add_argument('--policy', choices=['random', 'llm'], default='random',
+                        help='random 为随机策略，llm 为 ReActPlayer（模型后端由 LLM_BACKEND 决定，mock 可离线运行）')
+    parser.add_argument('--games', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-rounds', type=int, default=20)
+    parser.add_argument('--vote-mode', choices=['sequential', 'parallel'], default='sequential')
+    parser.add_argument('--vote-timeout', type=float, default=None, help='parallel 模式的投票截止时间（秒）')
+    parser.add_argument('--turn-timeout', type=float, default=None,
+                        help='每次请求（夜晚行动、发言、投票）的截止时间（秒），超时执行兜底行动')
+    parser.add_argument('--vote-fallback', choices=['abstain', 'random'], default='abstain',
+                        help='投票超时或多次不合法时的兜底：弃票 / 随机投给合法目标')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='模拟每次玩家决策的耗时（毫秒）')
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    client = create_llm_backend() if args.policy == 'llm' else None
+    winners = Counter()
+    night_elapsed = night_sequential = 0.0
+    deadlines = dict.fromkeys(('Execute', 'Speech', 'Vote'), args.turn_timeout) if args.turn_timeout else None
+    timeouts = Counter()
+    llm_turns = parse_failures = parse_retries = 0
+    llm_time = 0.0
+    start = time.perf_counter()
+    for i in range(args.games):
+        seed = args.seed + i
+        game_id = f'headless-{run_id}-{i}'
+        if client is not None:
+            policies = llm_policies(game_id, client)
+        else:
+            policies = random_policies(seed, args.think_ms / 1000)
+        result = await play_local_game(game_id, policies, seed=seed, max_rounds=args.max_rounds,
+                                       vote_mode=args.vote_mode, vote_timeout=args.vote_timeout,
+                                       deadlines=deadlines, vote_fallback=args.vote_fallback)
+        timeouts.update(result.timeouts)
+        winners[result.winner or 'draw'] += 1
+        night_elapsed += sum(night.elapsed for night in result.nights)
+        night_sequential += sum(night.sequential for night in result.nights)
+        for policy in policies.values():
+            if isinstance(policy, LLMPolicy):
+                llm_turns += policy.player.llm_stats['turns']
+                llm_time += policy.player.llm_stats['time_to_action']
+                parse_failures += policy.player.llm_stats['parse_failures']
+                parse_retries += policy.player.llm_stats['parse_retries']
+    elapsed = time.perf_counter() - start
+    print(f'{args.games}局，耗时{elapsed:.3f}s，胜负：{dict(winners)}')
+    print(f'夜晚总用时{night_elapsed:.3f}s（逐个执行需{night_sequential:.3f}s）')
+    if timeouts:
+        print(f'超时：{dict(timeouts)}')
+    if client is not None:
+        #夜晚部分行动并行执行，模型耗时会有重叠，框架开销按墙钟时间减去模型耗时估算，仅供参考
+        print(f'模型请求{llm_turns}次，模型耗时{llm_time:.3f}s，'
+              f'框架开销约{max(elapsed - llm_time, 0) / max(llm_turns, 1) * 1000:.3f}ms/次')
+        print(f'工具调用模式{tool_mode}：解析失败{parse_failures}次（{parse_failures / max(llm_turns, 1):.1%}），'
+              f'因格式错误重试{parse_retries}次，平均每局{parse_retries / args.games:.2f}次')
+        for layer, metrics in llm_metrics(client).items():
+            print(f'{layer}：{metrics}')
+        await client.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
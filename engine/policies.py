@@ -0,0 +1,102 @@
+import asyncio
+import random
+from typing import Optional
+
+from agents.react_player import ReActPlayer
+from environment.environment import DEFAULT_GAME_ID, get_environment
+from environment.settings import Role, Action6
+from tools.common import check_alive_players, get_history, get_player_memory
+from tools.seer import check_identity
+from tools.witch import cure, poison
+from tools.wolf import kill
+from llm.backend import LLMBackend
+
+
+class PlayerPolicy:
+    """
+    进程内玩家策略，替代通过网络连接的 PlayerAgent。
+    act 在该局的 game_context 中调用，可以直接使用 tools/ 中的工具函数。
+    """
+
+    def __init__(self, player_id: str):
+        self.player_id = player_id
+        self.role: Optional[Role] = None
+
+    def on_role(self, role: Role):
+        self.role = role
+
+    async def act(self, kind: str, instructions: str, action: Optional[Action6] = None) -> str:
+        """返回值与 GameIO.ask 一致：发言内容、投票目标，Execute 请求返回空字符串"""
+        raise NotImplementedError
+
+
+class RandomPolicy(PlayerPolicy):
+    """按随机种子随机行动的脚本化玩家，用于测试和压测"""
+
+    def __init__(self, player_id: str, seed: Optional[int] = None, think_time: float = 0.0,
+                 cure_rate: float = 0.5, poison_rate: float = 0.3):
+        super().__init__(player_id)
+        self._rng = random.Random(seed)
+        self.think_time = think_time
+        self.cure_rate = cure_rate
+        self.poison_rate = poison_rate
+
+    async def _others(self) -> list:
+        alive = await get_environment().get_alive_players()
+        return sorted(pid for pid in alive if pid != self.player_id)
+
+    async def act(self, kind: str, instructions: str, action: Optional[Action6] = None) -> str:
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+        match kind:
+            case 'Execute':
+                await self._execute(action)
+                return ''
+            case 'Speech':
+                await get_history(self.player_id)
+                await get_player_memory(self.player_id)
+                return '我是好人，过。'
+            case 'Vote':
+                await check_alive_players()
+                return self._rng.choice(await self._others())
+        return ''
+
+    async def _execute(self, action: Optional[Action6]):
+        environment = get_environment()
+        others = await self._others()
+        match action:
+            case Action6.WOLF1_KILL | Action6.WOLF2_KILL:
+                targets = [pid for pid in others if await environment.get_role(pid) != Role.WOLF]
+                if targets:
+                    await kill(self.player_id, self._rng.choice(targets))
+            case Action6.SEER_SEE:
+                await check_identity(self.player_id, self._rng.choice(others))
+            case Action6.WITCH_CURE:
+                killed_player = await environment.get_player_killed_tonight()
+                if killed_player not in (None, self.player_id) and self._rng.random() < self.cure_rate:
+                    await cure(self.player_id)
+            case Action6.WITCH_POISON:
+                if self._rng.random() < self.poison_rate:
+                    await poison(self.player_id, self._rng.choice(others))
+
+
+class LLMPolicy(PlayerPolicy):
+    """
+    由 ReActPlayer 驱动的玩家，走与 PlayerAgent 完全相同的提示词、模型请求和工具调用流程，只是不经过网络。
+    配合 LLM_BACKEND=mock 可以离线跑完整局游戏，测量框架本身每回合的开销。
+    """
+
+    def __init__(self, player_id: str, game_id: str = DEFAULT_GAME_ID, client: Optional[LLMBackend] = None):
+        super().__init__(player_id)
+        self.player = ReActPlayer(player_id, game_id, client)
+
+    def on_role(self, role: Role):
+        super().on_role(role)
+        self.player.set_role(role)
+
+    async def act(self, kind: str, instructions: str, action: Optional[Action6] = None) -> str:
+        #与 PlayerAgent 一致，去掉请求中的 'Execute:' 等前缀
+        if instructions.startswith(kind):
+            instructions = instructions.split(':', 1)[1].strip()
+        result = await self.player.respond(kind, instructions)
+        return '' if kind == 'Execute' else result
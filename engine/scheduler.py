@@ -0,0 +1,75 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from environment.settings import Action6
+
+# 夜晚行动之间的依赖关系：狼人2在狼人1之后（以最后一次击杀选择为准），
+# 女巫需要知道击杀结果，毒药在解药之后；预言家的查验与其他行动无关
+NIGHT_DEPENDENCIES: Dict[Action6, Tuple[Action6, ...]] = {
+    Action6.WOLF1_KILL: (),
+    Action6.WOLF2_KILL: (Action6.WOLF1_KILL,),
+    Action6.SEER_SEE: (),
+    Action6.WITCH_CURE: (Action6.WOLF2_KILL,),
+    Action6.WITCH_POISON: (Action6.WITCH_CURE,),
+}
+
+
+@dataclass
+class ActionTiming:
+    action: Action6
+    start: float    #相对夜晚开始的秒数
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class NightReport:
+    round: int
+    elapsed: float = 0.0
+    timings: List[ActionTiming] = field(default_factory=list)
+
+    @property
+    def sequential(self) -> float:
+        """逐个执行时的耗时，即各行动耗时之和"""
+        return sum(timing.duration for timing in self.timings)
+
+    def format(self) -> str:
+        details = ', '.join(f'{t.action.value} {t.start:.3f}-{t.end:.3f}s' for t in self.timings)
+        return f'第{self.round}轮夜晚用时{self.elapsed:.3f}s（逐个执行需{self.sequential:.3f}s）：{details}'
+
+    __str__ = format
+
+
+class NightScheduler:
+    """按依赖关系调度夜晚行动，没有依赖关系的行动并发执行"""
+
+    def __init__(self, dependencies: Dict[Action6, Tuple[Action6, ...]] = NIGHT_DEPENDENCIES):
+        self.dependencies = dependencies
+
+    async def run(self, round: int, steps: Dict[Action6, Callable[[], Awaitable]]) -> NightReport:
+        report = NightReport(round)
+        start = time.perf_counter()
+        tasks: Dict[Action6, asyncio.Task] = {}
+
+        async def run_step(action: Action6):
+            deps = [tasks[dep] for dep in self.dependencies.get(action, ()) if dep in tasks]
+            if deps:
+                await asyncio.gather(*deps)
+            step_start = time.perf_counter() - start
+            await steps[action]()
+            report.timings.append(ActionTiming(action, step_start, time.perf_counter() - start))
+
+        for action in steps:
+            tasks[action] = asyncio.create_task(run_step(action))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        report.elapsed = time.perf_counter() - start
+        return report
@@ -0,0 +1,115 @@
+import inspect
+from typing import Any, Dict, List, Optional, Protocol, Set, Tuple
+
+import redis.asyncio as aioredis
+
+from environment.memory_backend import MemoryBackend
+from logs.tracing import span
+
+BACKENDS = ('redis', 'memory')
+
+
+class StorageBackend(Protocol):
+    """
+    Environment 使用的存储接口，即 redis.asyncio 客户端的一个子集。
+    'redis' 后端直接使用 redis.asyncio.Redis，'memory' 后端为 MemoryBackend。
+    """
+
+    async def ping(self) -> bool: ...
+    async def aclose(self): ...
+    async def get(self, key: str) -> Optional[str]: ...
+    async def set(self, key: str, value) -> bool: ...
+    async def incr(self, key: str, amount: int = 1) -> int: ...
+    async def delete(self, *keys: str) -> int: ...
+    async def unlink(self, *keys: str) -> int: ...
+    async def scan(self, cursor: int = 0, match: str = '*', count: Optional[int] = None) -> Tuple[int, List[str]]: ...
+    async def sadd(self, key: str, *members: str) -> int: ...
+    async def srem(self, key: str, *members: str) -> int: ...
+    async def smembers(self, key: str) -> Set[str]: ...
+    async def hget(self, key: str, field: str) -> Optional[str]: ...
+    async def hset(self, key: str, field: Optional[str] = None, value=None, mapping: Optional[Dict] = None) -> int: ...
+    async def hdel(self, key: str, *fields: str) -> int: ...
+    async def rpush(self, key: str, *values) -> int: ...
+    async def lrange(self, key: str, start: int, end: int) -> List[str]: ...
+    async def xadd(self, key: str, fields: Dict[str, str]) -> str: ...
+    async def xread(self, streams: Dict[str, str], count: Optional[int] = None, block: Optional[int] = None) -> List: ...
+    def pipeline(self, transaction: bool = True) -> Any: ...
+    def register_script(self, source: str) -> Any: ...
+
+
+async def create_backend(kind: str, redis_url: str) -> StorageBackend:
+    """根据配置创建存储后端"""
+    if kind == 'memory':
+        return MemoryBackend()
+    if kind != 'redis':
+        raise ValueError(f'Unknown environment backend: {kind}')
+    client = await aioredis.from_url(
+        redis_url,
+        decode_responses=True,
+        max_connections=10,
+        socket_connect_timeout=3  # 连接超时 3 秒
+    )
+    # 测试连接
+    await client.ping()
+    return client
+
+
+class TracedBackend:
+    """为每次存储操作（命令、pipeline 提交、脚本调用）记录一个 redis span，其余属性原样转发"""
+
+    def __init__(self, client: StorageBackend, game_id: str):
+        self._client = client
+        self._game_id = game_id
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def traced(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            #redis.asyncio 的命令方法返回 awaitable，而不是协程函数
+            if inspect.isawaitable(result):
+                return _timed(name, self._game_id, result)
+            return result
+        return traced
+
+    def pipeline(self, transaction: bool = True) -> '_TracedPipeline':
+        return _TracedPipeline(self._client.pipeline(transaction=transaction), self._game_id)
+
+    def register_script(self, source: str) -> '_TracedScript':
+        return _TracedScript(self._client.register_script(source), self._game_id)
+
+
+async def _timed(name: str, game_id: str, awaitable, **attrs):
+    with span('redis', name, game_id, **attrs):
+        return await awaitable
+
+
+class _TracedPipeline:
+    def __init__(self, pipe, game_id: str):
+        self._pipe = pipe
+        self._game_id = game_id
+
+    def __getattr__(self, name: str):
+        return getattr(self._pipe, name)
+
+    async def __aenter__(self):
+        await self._pipe.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._pipe.__aexit__(*exc_info)
+
+    async def execute(self, *args, **kwargs):
+        commands = len(self._pipe)
+        return await _timed('pipeline', self._game_id, self._pipe.execute(*args, **kwargs), commands=commands)
+
+
+class _TracedScript:
+    def __init__(self, script, game_id: str):
+        self._script = script
+        self._game_id = game_id
+
+    async def __call__(self, *args, **kwargs):
+        return await _timed('script', self._game_id, self._script(*args, **kwargs))
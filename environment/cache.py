@@ -0,0 +1,63 @@
+from typing import Any, Dict, Optional, Tuple
+
+
+class EnvironmentCache:
+    """
+    Environment 热点数据（阶段、轮次、存活玩家、角色）的本地缓存。
+
+    所有写入都会让 Redis 中的版本号加一，本地缓存记录自己对应的版本号，
+    版本号不一致时整体失效。本进程的写入直接写穿到缓存。
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.generation = 0   #每次失效加一，用于丢弃失效前发起的读取结果
+        self._entries: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        if key in self._entries:
+            self.hits += 1
+            return True, self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key: str, value: Any):
+        self._entries[key] = value
+
+    def invalidate(self):
+        self.generation += 1
+        if self._entries:
+            self.invalidations += 1
+            self._entries.clear()
+
+    def sync(self, version: int):
+        """用远端版本号校验缓存，不一致则整体失效"""
+        if version != self.version:
+            self.invalidate()
+            self.version = version
+
+    def advance(self, version: int) -> bool:
+        """本进程写入后推进版本号；如果期间有其他进程写入（版本号跳变），整体失效并返回 False"""
+        consistent = self.version is not None and version == self.version + 1
+        if not consistent:
+            self.invalidate()
+        self.version = version
+        return consistent
+
+    def peek(self, key: str) -> Tuple[bool, Any]:
+        """读取缓存但不计入命中统计，用于写穿时基于旧值计算新值"""
+        if key in self._entries:
+            return True, self._entries[key]
+        return False, None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
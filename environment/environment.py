@@ -1,46 +1,192 @@
-from typing import Dict, Optional, Set, List
-import redis.asyncio as aioredis
+import os
+import time
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Optional, Set, List, Tuple
 import redis.exceptions as redis_exceptions
 
 from environment.settings import GamePhase, Role, Action6
+from environment.scripts import RESOLVE_DAWN, READ_HISTORY
+from environment.cache import EnvironmentCache
+from environment.events import EventType, GameEvent, GameView
+from environment.backend import StorageBackend, TracedBackend, create_backend
+from environment.summary import compact_history
 from logs.logging_config import setup_logger
+from logs.tracing import tracing_enabled
 
 logger = setup_logger('environment')
 
+DEFAULT_GAME_ID = 'default'
+
+# 每局固定使用的键（不含版本号），动态创建的键（玩家记忆）登记在 {key_prefix}keys 集合中
+_STATIC_KEYS = (
+    'phase', 'alive_players', 'roles', 'round', 'player_killed_tonight',
+    'witch:', 'history', 'history_cursors', 'history_summaries', 'events', 'action_tokens',
+)
+
+_cache_snapshot: ContextVar[Optional['Environment']] = ContextVar('cache_snapshot', default=None)
+
+def make_key_prefix(game_id: str) -> str:
+    """生成对局的键前缀，game_id 放在 {} 中作为 hash tag，保证同一局的键落在同一个 cluster slot"""
+    return f'werewolf:{{{game_id}}}:'
+
 class Environment:
-    def __init__(self, redis_url: str = 'redis://localhost:6379'):
+    def __init__(
+        self,
+        redis_url: str = 'redis://localhost:6379',
+        game_id: str = DEFAULT_GAME_ID,
+        cache_mode: Optional[str] = None,
+        backend: str = 'redis',
+    ):
+        """
+        Args:
+            cache_mode: 本地缓存模式。None 不缓存；'version' 在 cache_snapshot 内只校验一次版本号，之外不使用缓存；
+                'notify' 通过 keyspace 通知失效，读取时不访问 Redis（无法开启通知时退回 'version'）
+            backend: 存储后端，'redis' 或进程内的 'memory'
+        """
         self.redis_url = redis_url
-        self._redis: Optional[aioredis.Redis] = None
-        self.key_prefix = 'werewolf:'
+        self.game_id = game_id
+        self.backend = backend
+        self._redis: Optional[StorageBackend] = None
+        self._scripts = {}
+        self.key_prefix = make_key_prefix(game_id)
+        self._version_key = f'{self.key_prefix}version'
+        self._events_key = f'{self.key_prefix}events'
+        self._registry_key = f'{self.key_prefix}keys'
+        self.cache_mode = cache_mode
+        self._cache: Optional[EnvironmentCache] = EnvironmentCache() if cache_mode else None
+        self._listener: Optional[asyncio.Task] = None
 
 
-    async def connect(self):
-        """连接到 Redis，添加错误处理"""
+    async def connect(self) -> StorageBackend:
+        """连接到存储后端，添加错误处理"""
         if self._redis is None:
             try:
-                self._redis = await aioredis.from_url(
-                    self.redis_url,
-                    decode_responses=True,
-                    max_connections=10,
-                    socket_connect_timeout=3  # 连接超时 3 秒
-                )
-                # 测试连接
-                await self._redis.ping()
+                self._redis = await create_backend(self.backend, self.redis_url)
             except (redis_exceptions.ConnectionError, OSError, Exception) as e:
-                logger.warning(f'Redis 连接失败 ({self.redis_url}): {e}')
+                logger.warning('Redis 连接失败 (%s): %s', self.redis_url, e)
                 raise  # 重新抛出异常，让调用者处理
+            if tracing_enabled():
+                self._redis = TracedBackend(self._redis, self.game_id)
+            if self.cache_mode == 'notify' and self.backend == 'redis':
+                await self._start_listener()
         return self._redis
 
     async def disconnect(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
         if self._redis:
             try:
                 await self._redis.close()
             except Exception as e:
-                logger.warning(f'关闭 Redis 连接时出错: {e}')
+                logger.warning('关闭 Redis 连接时出错: %s', e)
             finally:
                 self._redis = None
+                self._scripts = {}
+
+    async def _start_listener(self):
+        """订阅版本号键的 keyspace 通知，收到通知即令本地缓存失效"""
+        try:
+            config = await self._redis.config_get('notify-keyspace-events')
+            flags = config.get('notify-keyspace-events', '')
+            missing = ''.join(f for f in 'K$' if f not in flags and not (f == '$' and 'A' in flags))
+            if missing:
+                await self._redis.config_set('notify-keyspace-events', flags + missing)
+            pubsub = self._redis.pubsub()
+            await pubsub.psubscribe(f'__keyspace@*__:{self._version_key}')
+        except redis_exceptions.RedisError as e:
+            logger.warning('无法开启 keyspace 通知，缓存退回版本号校验: %s', e)
+            return
+        self._cache.invalidate()
+        self._cache.version = None
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub):
+        try:
+            async for message in pubsub.listen():
+                if message['type'] == 'pmessage':
+                    self._cache.invalidate()
+                    self._cache.version = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning('keyspace 通知中断，缓存退回版本号校验: %s', e)
+            self._cache.invalidate()
+            self._cache.version = None
+            self._listener = None
+        finally:
+            await pubsub.aclose()
+
+    async def _validate_cache(self):
+        if self._listener is not None or _cache_snapshot.get() is self:
+            return
+        redis = await self.connect()
+        if self._listener is not None:
+            return
+        version = await redis.get(self._version_key)
+        self._cache.sync(int(version or 0))
+
+    async def _cached(self, key: str, load):
+        if self._cache is None:
+            return await load()
+        if self._listener is None and _cache_snapshot.get() is not self:
+            #version 模式下在 cache_snapshot 之外，校验版本号本身就要一次往返，命中也不比直接读取少，
+            #未命中还要多一次，因此直接读取；缓存只在 cache_snapshot 内（整段只校验一次）生效
+            await self.connect()
+            if self._listener is None:
+                return await load()
+        await self._validate_cache()
+        found, value = self._cache.lookup(key)
+        if found:
+            return value
+        generation = self._cache.generation
+        value = await load()
+        if generation == self._cache.generation:
+            self._cache.store(key, value)
+        return value
+
+    def _write_through(self, version: int, key: str, value=None, update=None):
+        """本进程写入后更新缓存。value 为写入后的值；update 根据旧值计算新值，旧值未缓存时不写入"""
+        if self._cache is None:
+            return
+        found, old = self._cache.peek(key)
+        consistent = self._cache.advance(version)
+        if update is None:
+            self._cache.store(key, value)
+        elif consistent and found:
+            self._cache.store(key, update(old))
+
+    def cache_stats(self) -> Dict[str, float]:
+        if self._cache is None:
+            return {}
+        return self._cache.stats()
+
+    @asynccontextmanager
+    async def cache_snapshot(self):
+        """
+        在上下文内只校验一次缓存版本，之后的读取直接使用本地缓存。
+        仅用于状态不会被其他进程修改的区间，例如 God 等待玩家行动时的单次工具调用。
+        """
+        if self._cache is None or _cache_snapshot.get() is self:
+            yield self
+            return
+        await self._validate_cache()
+        token = _cache_snapshot.set(self)
+        try:
+            yield self
+        finally:
+            _cache_snapshot.reset(token)
+
+    def _add_event(self, pipe, event_type: EventType, round: int = 0, actor: str = '', target: str = '', content: str = ''):
+        """在 pipeline 中追加一条事件，与对应的状态写入一起提交"""
+        pipe.xadd(self._events_key, GameEvent(event_type, round, actor, target, content).to_fields())
 
     async def get_phase(self) -> GamePhase:
+        return await self._cached('phase', self._load_phase)
+
+    async def _load_phase(self) -> GamePhase:
         redis = await self.connect()
         phase_str = await redis.get(f'{self.key_prefix}phase')
         
@@ -49,14 +195,22 @@ class Environment:
         try:
             return GamePhase(phase_str)
         except ValueError:
-            logger.error(f'Invalid phase: {phase_str}')
+            logger.error('Invalid phase: %s', phase_str)
             return GamePhase.WAITING
         
     async def set_phase(self, phase: GamePhase):
         redis = await self.connect()
-        await redis.set(f'{self.key_prefix}phase', phase.value)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(f'{self.key_prefix}phase', phase.value)
+            self._add_event(pipe, EventType.PHASE, content=phase.value)
+            pipe.incr(self._version_key)
+            *_, version = await pipe.execute()
+        self._write_through(version, 'phase', phase)
 
     async def get_alive_players(self) -> Set[str]:
+        return set(await self._cached('alive_players', self._load_alive_players))
+
+    async def _load_alive_players(self) -> Set[str]:
         redis = await self.connect()
         players = await redis.smembers(f'{self.key_prefix}alive_players')
         if not players:
@@ -66,22 +220,44 @@ class Environment:
 
     async def set_alive_players(self, players: Set[str]):
         redis = await self.connect()
-        await redis.delete(f'{self.key_prefix}alive_players')
-        await redis.sadd(f'{self.key_prefix}alive_players', *players)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(f'{self.key_prefix}alive_players')
+            pipe.sadd(f'{self.key_prefix}alive_players', *players)
+            self._add_event(pipe, EventType.GAME_START, content=','.join(players))
+            pipe.incr(self._version_key)
+            *_, version = await pipe.execute()
+        self._write_through(version, 'alive_players', set(players))
 
-    async def remove_alive_player(self, player_id: str):
+    async def remove_alive_player(self, player_id: str, cause: str = 'vote'):
         redis = await self.connect()
-        await redis.srem(f'{self.key_prefix}alive_players', player_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.srem(f'{self.key_prefix}alive_players', player_id)
+            self._add_event(pipe, EventType.DEATH, target=player_id, content=cause)
+            pipe.incr(self._version_key)
+            *_, version = await pipe.execute()
+        self._write_through(version, 'alive_players', update=lambda players: players - {player_id})
 
     async def add_alive_player(self, player_id: str):
         redis = await self.connect()
-        await redis.sadd(f'{self.key_prefix}alive_players', player_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(f'{self.key_prefix}alive_players', player_id)
+            pipe.incr(self._version_key)
+            _, version = await pipe.execute()
+        self._write_through(version, 'alive_players', update=lambda players: players | {player_id})
 
     async def set_role(self, player_id: str, role: Role):
         redis = await self.connect()
-        await redis.hset(f'{self.key_prefix}roles', player_id, role.value)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(f'{self.key_prefix}roles', player_id, role.value)
+            self._add_event(pipe, EventType.ROLE_ASSIGNED, target=player_id, content=role.value)
+            pipe.incr(self._version_key)
+            *_, version = await pipe.execute()
+        self._write_through(version, f'role:{player_id}', role)
         
     async def get_role(self, player_id: str) -> Optional[Role]:
+        return await self._cached(f'role:{player_id}', lambda: self._load_role(player_id))
+
+    async def _load_role(self, player_id: str) -> Optional[Role]:
         redis = await self.connect()
         role_str = await redis.hget(f'{self.key_prefix}roles', player_id)
         if role_str is None:
@@ -89,10 +265,13 @@ class Environment:
         try:
             return Role(role_str)
         except ValueError:
-            logger.error(f'Invalid role: {role_str}')
+            logger.error('Invalid role: %s', role_str)
             return None
 
     async def get_round(self) -> int:
+        return await self._cached('round', self._load_round)
+
+    async def _load_round(self) -> int:
         redis = await self.connect()
         round_str = await redis.get(f'{self.key_prefix}round')
         if round_str is None:
@@ -100,20 +279,28 @@ class Environment:
         try:
             return int(round_str)
         except ValueError:
-            logger.error(f'Invalid round: {round_str}')
+            logger.error('Invalid round: %s', round_str)
             return 0
 
     async def increment_round(self):
         redis = await self.connect()
-        await redis.incr(f'{self.key_prefix}round')
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.incr(f'{self.key_prefix}round')
+            self._add_event(pipe, EventType.ROUND)
+            pipe.incr(self._version_key)
+            round, _, version = await pipe.execute()
+        self._write_through(version, 'round', round)
 
-    async def set_player_killed_tonight(self, player_id: str):
+    async def set_player_killed_tonight(self, player_id: str, actor: str = ''):
         redis = await self.connect()
         key = f'{self.key_prefix}player_killed_tonight'
         if player_id is None:
             await redis.delete(key)
         else:
-            await redis.set(key, player_id)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.set(key, player_id)
+                self._add_event(pipe, EventType.KILL, actor=actor, target=player_id)
+                await pipe.execute()
 
     async def get_player_killed_tonight(self) -> str:
         redis = await self.connect()
@@ -141,10 +328,13 @@ class Environment:
             return 'used'
         return cure_status
 
-    async def use_cure(self):
+    async def use_cure(self, actor: str = '', target: str = ''):
         redis = await self.connect()
         key = f'{self.key_prefix}witch:'
-        await redis.hset(key, 'cure', 'used')
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, 'cure', 'used')
+            self._add_event(pipe, EventType.CURE, actor=actor, target=target)
+            await pipe.execute()
 
     async def set_cure_tonight(self, status: bool):
         redis = await self.connect()
@@ -168,10 +358,13 @@ class Environment:
             return 'used'
         return poison_status
 
-    async def use_poison(self, player_id: str):
+    async def use_poison(self, player_id: str, actor: str = ''):
         redis = await self.connect()
         key = f'{self.key_prefix}witch:'
-        await redis.hset(key, 'poison', 'used')
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, 'poison', 'used')
+            self._add_event(pipe, EventType.POISON, actor=actor, target=player_id)
+            await pipe.execute()
 
     async def get_player_posioned_tonight(self) -> str:
         redis = await self.connect()
@@ -188,44 +381,235 @@ class Environment:
         else:
             await redis.hset(key, 'player_posioned_tonight', player_id)
     
-        
-    async def add_history(self, round: int, agent_id: str, record: str):
+
+    async def grant_action(self, player_id: str, action: Action6):
+        """允许玩家执行夜晚行动，击杀、解药、毒药工具只在玩家持有对应的行动令牌时写入"""
         redis = await self.connect()
-        await redis.lpush(f'{self.key_prefix}history', f'round:{round},{agent_id},{record}')
+        await redis.hset(f'{self.key_prefix}action_tokens', player_id, action.value)
 
-    async def get_history(self) -> List[str]:
+    async def revoke_action(self, player_id: str):
+        """收回玩家的行动令牌，请求完成或超时后调用，之后到达的工具调用不再生效"""
         redis = await self.connect()
-        history = await redis.lrange(f'{self.key_prefix}history', 0, -1)
+        await redis.hdel(f'{self.key_prefix}action_tokens', player_id)
+
+    async def get_action(self, player_id: str) -> Optional[Action6]:
+        redis = await self.connect()
+        value = await redis.hget(f'{self.key_prefix}action_tokens', player_id)
+        return Action6(value) if value is not None else None
+
+    async def resolve_dawn(self) -> Tuple[List[str], Set[str]]:
+        """天亮结算，在一次往返中原子完成，返回 (昨晚死亡玩家列表, 存活玩家集合)"""
+        redis = await self.connect()
+        script = self._scripts.get('resolve_dawn')
+        if script is None:
+            script = self._scripts['resolve_dawn'] = redis.register_script(RESOLVE_DAWN)
+        dead, alive, version = await script(
+            keys=[
+                f'{self.key_prefix}phase',
+                f'{self.key_prefix}player_killed_tonight',
+                f'{self.key_prefix}witch:',
+                f'{self.key_prefix}alive_players',
+                self._version_key,
+                self._events_key,
+            ],
+            args=[GamePhase.DAY.value],
+        )
+        if self._cache is not None:
+            self._cache.advance(version)
+            self._cache.store('phase', GamePhase.DAY)
+            self._cache.store('alive_players', set(alive))
+        return list(dead), set(alive)
+
+    async def add_history(self, round: int, agent_id: str, record: str, event: Optional[GameEvent] = None):
+        """追加一条历史记录；传入 event 时同时写入事件流"""
+        redis = await self.connect()
+        if event is None:
+            await redis.rpush(f'{self.key_prefix}history', f'round:{round},{agent_id},{record}')
+            return
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(f'{self.key_prefix}history', f'round:{round},{agent_id},{record}')
+            pipe.xadd(self._events_key, event.to_fields())
+            await pipe.execute()
+
+    async def record_event(self, event_type: EventType, round: int = 0, actor: str = '', target: str = '', content: str = '') -> str:
+        """向事件流追加一条事件，返回事件 id"""
+        redis = await self.connect()
+        return await redis.xadd(self._events_key, GameEvent(event_type, round, actor, target, content).to_fields())
+
+    async def read_events(self, last_id: str = '0', count: Optional[int] = None, block_ms: Optional[int] = None) -> List[GameEvent]:
+        """读取 last_id 之后的事件；block_ms 不为 None 时在没有新事件时阻塞等待"""
+        redis = await self.connect()
+        response = await redis.xread({self._events_key: last_id}, count=count, block=block_ms)
+        if not response:
+            return []
+        _, entries = response[0]
+        return [GameEvent.from_fields(event_id, fields) for event_id, fields in entries]
+
+    async def follow_events(self, last_id: str = '$', block_ms: int = 5000) -> AsyncIterator[GameEvent]:
+        """持续阻塞读取新事件"""
+        if last_id == '$':
+            redis = await self.connect()
+            latest = await redis.xrevrange(self._events_key, count=1)
+            last_id = latest[0][0] if latest else '0'
+        while True:
+            for event in await self.read_events(last_id, block_ms=block_ms):
+                last_id = event.id
+                yield event
+
+    async def load_view(self) -> GameView:
+        """重放事件流，得到当前游戏状态"""
+        return GameView.replay(await self.read_events())
+
+    async def ensure_event_group(self, group: str, start_id: str = '0'):
+        """创建事件流的消费者组（已存在时忽略）"""
+        redis = await self.connect()
+        try:
+            await redis.xgroup_create(self._events_key, group, id=start_id, mkstream=True)
+        except redis_exceptions.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def read_event_group(self, group: str, consumer: str, count: Optional[int] = None, block_ms: Optional[int] = None) -> List[GameEvent]:
+        redis = await self.connect()
+        response = await redis.xreadgroup(group, consumer, {self._events_key: '>'}, count=count, block=block_ms)
+        if not response:
+            return []
+        _, entries = response[0]
+        return [GameEvent.from_fields(event_id, fields) for event_id, fields in entries]
+
+    async def ack_events(self, group: str, *event_ids: str):
+        redis = await self.connect()
+        if event_ids:
+            await redis.xack(self._events_key, group, *event_ids)
+
+    async def get_history(self, start: int = 0) -> List[str]:
+        """按时间顺序返回第 start 条之后的历史记录"""
+        redis = await self.connect()
+        history = await redis.lrange(f'{self.key_prefix}history', start, -1)
         if not history:
             return []
-        return list(reversed(history))
+        return history
+
+    async def read_history(self, player_id: str, full: bool = False) -> List[str]:
+        """返回玩家上次读取之后新增的历史记录（full 时返回完整记录），并把该玩家的读取游标移到末尾"""
+        redis = await self.connect()
+        script = self._scripts.get('read_history')
+        if script is None:
+            script = self._scripts['read_history'] = redis.register_script(READ_HISTORY)
+        return await script(
+            keys=[f'{self.key_prefix}history', f'{self.key_prefix}history_cursors'],
+            args=[player_id, '1' if full else '0'],
+        )
+
+    async def compact_history(self, entries: List[str], token_budget: int) -> List[str]:
+        """
+        在 token 预算内压缩历史记录，较早的轮次替换为摘要。
+        每轮的摘要只计算一次，保存在 {prefix}history_summaries 中供所有玩家复用，
+        因此只根据完整的公开历史记录计算，与传入的 entries 是否完整无关。
+        """
+        redis = await self.connect()
+        summaries_key = f'{self.key_prefix}history_summaries'
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(summaries_key)
+            pipe.lrange(f'{self.key_prefix}history', 0, -1)
+            summaries, history = await pipe.execute()
+        compacted, computed = compact_history(entries, token_budget, summaries, canonical=history)
+        if computed:
+            await redis.hset(summaries_key, mapping=computed)
+        return compacted
 
     async def add_player_memory(self, player_id: str, memory: str):
         redis = await self.connect()
-        await redis.lpush(f'{self.key_prefix}{player_id}_memory', memory)
+        key = f'{self.key_prefix}{player_id}_memory'
+        #每次都登记（已存在的成员 SADD 没有额外开销）：其他进程清空对局后，本进程无法得知登记已失效
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, memory)
+            pipe.sadd(self._registry_key, key)
+            await pipe.execute()
 
-    async def get_player_memory(self, player_id: str) -> str:
+    async def get_player_memory(self, player_id: str, start: int = 0) -> List[str]:
+        """读取玩家记忆，start 为起始下标，用于只读取新增的记忆"""
         redis = await self.connect()
-        memory = await redis.lrange(f'{self.key_prefix}{player_id}_memory', 0, -1)
+        memory = await redis.lrange(f'{self.key_prefix}{player_id}_memory', start, -1)
         if not memory:
             return []
-        return list(reversed(memory))
+        return memory
+
+    async def clear_environment(self, full_scan: bool = False, all_games: bool = False) -> int:
+        """
+        清空本局数据，返回删除的键数量。版本号键会保留，避免重新计数后与旧缓存的版本号重合。
 
-    async def clear_environment(self):
+        默认根据固定键和登记表直接批量 UNLINK，不需要 SCAN；full_scan 时按 SCAN 分页、
+        每页一次 UNLINK，用于清理未登记的键；all_games 时清空所有对局。
+        """
         redis = await self.connect()
+        start = time.perf_counter()
         deleted_count = 0
-        async for key in redis.scan_iter(match=f'{self.key_prefix}*'):
-            await redis.delete(key)
-            deleted_count += 1
+        if full_scan or all_games:
+            pattern = 'werewolf:*' if all_games else f'{self.key_prefix}*'
+            cursor = 0
+            while True:
+                cursor, keys = await redis.scan(cursor, match=pattern, count=1000)
+                keys = [key for key in keys if not key.endswith(':version')]
+                if keys:
+                    deleted_count += await redis.unlink(*keys)
+                if cursor == 0:
+                    break
+        else:
+            keys = [f'{self.key_prefix}{name}' for name in _STATIC_KEYS]
+            keys.extend(await redis.smembers(self._registry_key))
+            keys.append(self._registry_key)
+            deleted_count = await redis.unlink(*keys)
+
+        version = await redis.incr(self._version_key)
+        if self._cache is not None:
+            self._cache.invalidate()
+            self._cache.version = version
+        elapsed_ms = (time.perf_counter() - start) * 1000
         if deleted_count > 0:
-            logger.info(f'清空环境：删除了 {deleted_count} 个键')
+            logger.info('清空环境：删除了 %d 个键，耗时 %.1fms', deleted_count, elapsed_ms)
         else:
-            logger.info('环境已经是空的')
+            logger.info('环境已经是空的，耗时 %.1fms', elapsed_ms)
+        return deleted_count
+
+_environments: Dict[str, Environment] = {}
+_current_game_id: ContextVar[str] = ContextVar('current_game_id', default=DEFAULT_GAME_ID)
+
+def get_environment(game_id: Optional[str] = None) -> Environment:
+    """获取对局对应的 Environment，未指定 game_id 时使用当前上下文中的对局"""
+    if game_id is None:
+        game_id = _current_game_id.get()
+    env = _environments.get(game_id)
+    if env is None:
+        cache_mode = os.getenv('ENV_CACHE', 'off')
+        env = Environment(
+            redis_url=os.getenv('REDIS_URL', 'redis://localhost:6379'),
+            game_id=game_id,
+            cache_mode=None if cache_mode == 'off' else cache_mode,
+            backend=os.getenv('ENV_BACKEND', 'redis'),
+        )
+        _environments[game_id] = env
+    return env
+
+async def release_environment(game_id: str):
+    """断开并移除对局的 Environment，对局结束后调用"""
+    env = _environments.pop(game_id, None)
+    if env is not None:
+        await env.disconnect()
+
+@contextmanager
+def game_context(game_id: str):
+    """在上下文内将当前对局切换为 game_id，工具函数通过 get_environment() 获取对应的 Environment"""
+    token = _current_game_id.set(game_id)
+    try:
+        yield get_environment(game_id)
+    finally:
+        _current_game_id.reset(token)
 
-environment = Environment()
+environment = get_environment(DEFAULT_GAME_ID)   #默认对局，兼容单局运行
 
 async def set_player_name(player_id: str, name: str):
-    await environment.add_player_memory(player_id, f'你是{name}')
+    await get_environment().add_player_memory(player_id, f'你是{name}')
 
 async def export_add_player_memory(player_id: str, memory: str):
-    await environment.add_player_memory(player_id, memory)
+    await get_environment().add_player_memory(player_id, memory)
@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from environment.settings import GamePhase, Role
+
+
+class EventType(Enum):
+    JOIN = 'join'                   # 玩家加入
+    LEAVE = 'leave'                 # 玩家离开
+    GAME_START = 'game_start'       # 游戏开始，content 为逗号分隔的玩家列表
+    ROLE_ASSIGNED = 'role_assigned' # 分配角色，content 为角色
+    PHASE = 'phase'                 # 阶段切换，content 为阶段
+    ROUND = 'round'                 # 进入新的一轮
+    KILL = 'kill'                   # 狼人选择击杀目标
+    SEE = 'see'                     # 预言家查验，content 为 wolf / good
+    CURE = 'cure'                   # 女巫使用解药
+    POISON = 'poison'               # 女巫使用毒药
+    DEATH = 'death'                 # 玩家出局，content 为原因 night / vote
+    SPEECH = 'speech'               # 发言
+    VOTE = 'vote'                   # 投票
+    GAME_OVER = 'game_over'         # 游戏结束，content 为获胜阵营
+
+
+@dataclass
+class GameEvent:
+    type: EventType
+    round: int = 0
+    actor: str = ''
+    target: str = ''
+    content: str = ''
+    id: Optional[str] = None   #stream 条目 id，写入前为 None
+
+    def to_fields(self) -> Dict[str, str]:
+        fields = {'type': self.type.value, 'round': str(self.round)}
+        if self.actor:
+            fields['actor'] = self.actor
+        if self.target:
+            fields['target'] = self.target
+        if self.content:
+            fields['content'] = self.content
+        return fields
+
+    @classmethod
+    def from_fields(cls, event_id: str, fields: Dict[str, str]) -> 'GameEvent':
+        return cls(
+            type=EventType(fields['type']),
+            round=int(fields.get('round', 0)),
+            actor=fields.get('actor', ''),
+            target=fields.get('target', ''),
+            content=fields.get('content', ''),
+            id=event_id,
+        )
+
+
+@dataclass
+class GameView:
+    """由事件流推导出的当前游戏状态（物化视图）"""
+    phase: GamePhase = GamePhase.WAITING
+    round: int = 0
+    players: List[str] = field(default_factory=list)
+    roles: Dict[str, Role] = field(default_factory=dict)
+    alive: Set[str] = field(default_factory=set)
+    killed_tonight: Optional[str] = None
+    poisoned_tonight: Optional[str] = None
+    cured_tonight: bool = False
+    cure_used: bool = False
+    poison_used: bool = False
+    speeches: List[Tuple[int, str, str]] = field(default_factory=list)
+    votes: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    winner: Optional[str] = None
+    last_event_id: str = '0'
+
+    def apply(self, event: GameEvent):
+        match event.type:
+            case EventType.JOIN:
+                if event.actor not in self.players:
+                    self.players.append(event.actor)
+            case EventType.LEAVE:
+                if event.actor in self.players:
+                    self.players.remove(event.actor)
+            case EventType.GAME_START:
+                self.alive = set(event.content.split(',')) if event.content else set()
+            case EventType.ROLE_ASSIGNED:
+                self.roles[event.target] = Role(event.content)
+            case EventType.PHASE:
+                self.phase = GamePhase(event.content)
+                if self.phase == GamePhase.DAY:
+                    self.killed_tonight = None
+                    self.poisoned_tonight = None
+                    self.cured_tonight = False
+            case EventType.ROUND:
+                self.round = event.round or self.round + 1
+            case EventType.KILL:
+                self.killed_tonight = event.target or None
+            case EventType.CURE:
+                self.cure_used = True
+                self.cured_tonight = True
+                self.killed_tonight = None
+            case EventType.POISON:
+                self.poison_used = True
+                self.poisoned_tonight = event.target
+            case EventType.DEATH:
+                self.alive.discard(event.target)
+            case EventType.SPEECH:
+                self.speeches.append((event.round or self.round, event.actor, event.content))
+            case EventType.VOTE:
+                self.votes.setdefault(event.round or self.round, {})[event.actor] = event.target
+            case EventType.GAME_OVER:
+                self.winner = event.content
+                self.phase = GamePhase.ENDED
+        if event.id is not None:
+            self.last_event_id = event.id
+
+    @classmethod
+    def replay(cls, events: Iterable[GameEvent]) -> 'GameView':
+        view = cls()
+        for event in events:
+            view.apply(event)
+        return view
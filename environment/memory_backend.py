@@ -0,0 +1,376 @@
+import asyncio
+import fnmatch
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import redis.exceptions as redis_exceptions
+
+from environment import scripts
+from environment.scripts import RESOLVE_DAWN, READ_HISTORY
+
+
+class MemoryStore:
+    """进程内的键空间，同一进程中的所有 MemoryBackend 共享"""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.groups: Dict[Tuple[str, str], Dict[str, Any]] = {}   #(stream, group) -> 消费者组状态
+        self.stream_updated = asyncio.Event()   #每次 XADD 后置位并替换，阻塞读取者等待旧的 Event
+        self._last_id: Tuple[int, int] = (0, 0)
+
+    def next_stream_id(self) -> str:
+        ms = int(time.time() * 1000)
+        last_ms, last_seq = self._last_id
+        self._last_id = (ms, 0) if ms > last_ms else (last_ms, last_seq + 1)
+        return f'{self._last_id[0]}-{self._last_id[1]}'
+
+
+def _parse_id(stream_id: str) -> Tuple[int, int]:
+    ms, _, seq = stream_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class MemoryBackend:
+    """
+    纯内存的存储后端，实现 Environment 用到的 redis.asyncio 客户端接口子集，
+    语义与 Redis 保持一致（字符串、集合、哈希、列表、INCR、Stream、事务 pipeline 和脚本）。
+
+    所有命令在事件循环中同步执行、中间没有让出，因此 pipeline 和脚本天然是原子的。
+    """
+
+    _shared_store: Optional[MemoryStore] = None
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        if store is None:
+            if MemoryBackend._shared_store is None:
+                MemoryBackend._shared_store = MemoryStore()
+            store = MemoryBackend._shared_store
+        self._store = store
+        self._data = store.data
+        self.command_count = 0   #往返次数：单条命令、整个 pipeline 或一次脚本调用各计一次
+
+    def _typed(self, key: str, kind: type, create: bool = False):
+        value = self._data.get(key)
+        if value is None:
+            if not create:
+                return None
+            value = self._data[key] = kind()
+        elif not isinstance(value, kind):
+            raise redis_exceptions.ResponseError('WRONGTYPE Operation against a key holding the wrong kind of value')
+        return value
+
+    def _drop_if_empty(self, key: str):
+        if key in self._data and not self._data[key]:
+            del self._data[key]
+
+    # 连接
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def config_get(self, pattern: str):
+        raise redis_exceptions.ResponseError('CONFIG is not supported by the memory backend')
+
+    # 通用
+    async def delete(self, *keys: str) -> int:
+        self.command_count += 1
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def unlink(self, *keys: str) -> int:
+        return await self.delete(*keys)
+
+    async def exists(self, *keys: str) -> int:
+        self.command_count += 1
+        return sum(1 for key in keys if key in self._data)
+
+    async def scan(self, cursor: int = 0, match: str = '*', count: Optional[int] = None) -> Tuple[int, List[str]]:
+        self.command_count += 1
+        return 0, [key for key in self._data if fnmatch.fnmatchcase(key, match)]
+
+    async def scan_iter(self, match: str = '*', count: Optional[int] = None):
+        self.command_count += 1
+        for key in [key for key in self._data if fnmatch.fnmatchcase(key, match)]:
+            yield key
+
+    # 字符串
+    async def get(self, key: str) -> Optional[str]:
+        self.command_count += 1
+        return self._typed(key, str)
+
+    async def set(self, key: str, value) -> bool:
+        self.command_count += 1
+        self._data[key] = str(value)
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        self.command_count += 1
+        value = self._typed(key, str)
+        try:
+            value = int(value or 0) + amount
+        except ValueError:
+            raise redis_exceptions.ResponseError('value is not an integer or out of range')
+        self._data[key] = str(value)
+        return value
+
+    # 集合
+    async def sadd(self, key: str, *members: str) -> int:
+        self.command_count += 1
+        values: Set[str] = self._typed(key, set, create=True)
+        before = len(values)
+        values.update(str(m) for m in members)
+        return len(values) - before
+
+    async def srem(self, key: str, *members: str) -> int:
+        self.command_count += 1
+        values: Set[str] = self._typed(key, set)
+        if values is None:
+            return 0
+        before = len(values)
+        values.difference_update(members)
+        removed = before - len(values)
+        self._drop_if_empty(key)
+        return removed
+
+    async def smembers(self, key: str) -> Set[str]:
+        self.command_count += 1
+        return set(self._typed(key, set) or ())
+
+    async def scard(self, key: str) -> int:
+        self.command_count += 1
+        return len(self._typed(key, set) or ())
+
+    # 哈希
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        self.command_count += 1
+        values = self._typed(key, dict)
+        return None if values is None else values.get(field)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        self.command_count += 1
+        return dict(self._typed(key, dict) or {})
+
+    async def hset(self, key: str, field: Optional[str] = None, value=None, mapping: Optional[Dict] = None) -> int:
+        self.command_count += 1
+        values: Dict[str, str] = self._typed(key, dict, create=True)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for f in items if f not in values)
+        values.update({f: str(v) for f, v in items.items()})
+        return added
+
+    async def hdel(self, key: str, *fields: str) -> int:
+        self.command_count += 1
+        values = self._typed(key, dict)
+        if values is None:
+            return 0
+        removed = sum(1 for f in fields if values.pop(f, None) is not None)
+        self._drop_if_empty(key)
+        return removed
+
+    # 列表
+    async def rpush(self, key: str, *values) -> int:
+        self.command_count += 1
+        items: List[str] = self._typed(key, list, create=True)
+        items.extend(str(v) for v in values)
+        return len(items)
+
+    async def lpush(self, key: str, *values) -> int:
+        self.command_count += 1
+        items: List[str] = self._typed(key, list, create=True)
+        for v in values:
+            items.insert(0, str(v))
+        return len(items)
+
+    async def lrange(self, key: str, start: int, end: int) -> List[str]:
+        self.command_count += 1
+        items = self._typed(key, list) or []
+        length = len(items)
+        start = max(start + length, 0) if start < 0 else start
+        end = end + length if end < 0 else min(end, length - 1)
+        return items[start:end + 1]
+
+    async def llen(self, key: str) -> int:
+        self.command_count += 1
+        return len(self._typed(key, list) or [])
+
+    # Stream
+    async def xadd(self, key: str, fields: Dict[str, str]) -> str:
+        self.command_count += 1
+        entries: List[Tuple[str, Dict[str, str]]] = self._typed(key, list, create=True)
+        entry_id = self._store.next_stream_id()
+        entries.append((entry_id, {k: str(v) for k, v in fields.items()}))
+        updated, self._store.stream_updated = self._store.stream_updated, asyncio.Event()
+        updated.set()
+        return entry_id
+
+    def _entries_after(self, key: str, last_id: str, count: Optional[int]):
+        entries = self._typed(key, list) or []
+        if last_id == '$':
+            return []
+        last = _parse_id(last_id)
+        result = [(i, f) for i, f in entries if _parse_id(i) > last]
+        return result[:count] if count else result
+
+    async def xread(self, streams: Dict[str, str], count: Optional[int] = None, block: Optional[int] = None):
+        self.command_count += 1
+        deadline = None if block is None else time.monotonic() + (block / 1000 if block else 1e9)
+        while True:
+            response = []
+            for key, last_id in streams.items():
+                entries = self._entries_after(key, last_id, count)
+                if entries:
+                    response.append([key, entries])
+            if response or deadline is None:
+                return response
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(self._store.stream_updated.wait(), remaining)
+            except asyncio.TimeoutError:
+                return []
+
+    async def xrevrange(self, key: str, max: str = '+', min: str = '-', count: Optional[int] = None):
+        self.command_count += 1
+        entries = list(reversed(self._typed(key, list) or []))
+        return entries[:count] if count else entries
+
+    async def xgroup_create(self, key: str, group: str, id: str = '$', mkstream: bool = False) -> bool:
+        self.command_count += 1
+        if self._typed(key, list) is None:
+            if not mkstream:
+                raise redis_exceptions.ResponseError('The XGROUP subcommand requires the key to exist')
+            self._data[key] = []
+        if (key, group) in self._store.groups:
+            raise redis_exceptions.ResponseError('BUSYGROUP Consumer Group name already exists')
+        if id == '$':
+            entries = self._data[key]
+            id = entries[-1][0] if entries else '0'
+        self._store.groups[(key, group)] = {'last_id': id, 'pending': set()}
+        return True
+
+    async def xreadgroup(self, group: str, consumer: str, streams: Dict[str, str], count: Optional[int] = None, block: Optional[int] = None):
+        response = []
+        for key in streams:
+            state = self._store.groups.get((key, group))
+            if state is None:
+                raise redis_exceptions.ResponseError('NOGROUP No such key or consumer group')
+            result = await self.xread({key: state['last_id']}, count=count, block=block)
+            if result:
+                entries = result[0][1]
+                state['last_id'] = entries[-1][0]
+                state['pending'].update(i for i, _ in entries)
+                response.append([key, entries])
+        return response
+
+    async def xack(self, key: str, group: str, *ids: str) -> int:
+        self.command_count += 1
+        pending = self._store.groups.get((key, group), {}).get('pending', set())
+        acked = sum(1 for i in ids if i in pending)
+        pending.difference_update(ids)
+        return acked
+
+    # 事务与脚本
+    def pipeline(self, transaction: bool = True) -> 'MemoryPipeline':
+        return MemoryPipeline(self)
+
+    def register_script(self, source: str) -> 'MemoryScript':
+        implementation = _SCRIPTS.get(source)
+        if implementation is None:
+            #按 environment/scripts.py 中的常量名报告是哪个脚本，不在其中时给出脚本的第一行
+            name = next((name for name, value in vars(scripts).items() if value == source), None)
+            name = name or (source.strip().splitlines() or ['<empty>'])[0]
+            raise ValueError(f'Memory backend has no Python implementation for script {name!r}, add one to _SCRIPTS')
+        return MemoryScript(self, implementation)
+
+
+class MemoryPipeline:
+    """缓存命令，execute 时依次执行；执行过程中不让出事件循环，等价于 MULTI/EXEC"""
+
+    def __init__(self, backend: MemoryBackend):
+        self._backend = backend
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands.clear()
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __bool__(self) -> bool:
+        return True     #与 redis 的 Pipeline 一致，没有命令时也视为真
+
+    def __getattr__(self, name: str):
+        if not hasattr(MemoryBackend, name):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        count = self._backend.command_count
+        results = []
+        for name, args, kwargs in commands:
+            results.append(await getattr(self._backend, name)(*args, **kwargs))
+        self._backend.command_count = count + 1
+        return results
+
+
+class MemoryScript:
+    def __init__(self, backend: MemoryBackend, implementation):
+        self._backend = backend
+        self._implementation = implementation
+
+    async def __call__(self, keys=(), args=()):
+        count = self._backend.command_count
+        result = await self._implementation(self._backend, list(keys), [str(a) for a in args])
+        self._backend.command_count = count + 1
+        return result
+
+
+# Lua 脚本的等价实现，与 environment/scripts.py 一一对应
+async def _resolve_dawn(r: MemoryBackend, keys: List[str], args: List[str]):
+    phase, killed_key, witch, alive, version, events = keys
+    killed = await r.get(killed_key)
+    poisoned = await r.hget(witch, 'player_posioned_tonight')
+    await r.set(phase, args[0])
+    await r.delete(killed_key)
+    await r.hdel(witch, 'player_posioned_tonight')
+    await r.hset(witch, 'cure_tonight', 'False')
+    await r.xadd(events, {'type': 'phase', 'round': '0', 'content': args[0]})
+    dead = []
+    for player_id in (killed, poisoned):
+        if player_id is not None:
+            dead.append(player_id)
+            await r.srem(alive, player_id)
+            await r.xadd(events, {'type': 'death', 'round': '0', 'target': player_id, 'content': 'night'})
+    new_version = await r.incr(version)
+    return [dead, list(await r.smembers(alive)), new_version]
+
+
+async def _read_history(r: MemoryBackend, keys: List[str], args: List[str]):
+    history, cursors = keys
+    cursor = 0
+    if args[1] != '1':
+        cursor = int(await r.hget(cursors, args[0]) or 0)
+    entries = await r.lrange(history, cursor, -1)
+    await r.hset(cursors, args[0], cursor + len(entries))
+    return entries
+
+
+_SCRIPTS = {
+    RESOLVE_DAWN: _resolve_dawn,
+    READ_HISTORY: _read_history,
+}
@@ -0,0 +1,42 @@
+# 服务端 Lua 脚本，用于需要原子执行的多步状态变更
+
+# 天亮结算：读取并清空今晚被杀/被毒的玩家，重置解药标记，移出存活集合并切换到白天
+# KEYS: phase, player_killed_tonight, witch:, alive_players, version, events
+# ARGV: 白天阶段的值
+# 返回: {死亡玩家列表, 存活玩家列表, 新版本号}
+RESOLVE_DAWN = """
+local killed = redis.call('GET', KEYS[2])
+local poisoned = redis.call('HGET', KEYS[3], 'player_posioned_tonight')
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('DEL', KEYS[2])
+redis.call('HDEL', KEYS[3], 'player_posioned_tonight')
+redis.call('HSET', KEYS[3], 'cure_tonight', 'False')
+redis.call('XADD', KEYS[6], '*', 'type', 'phase', 'round', '0', 'content', ARGV[1])
+local dead = {}
+if killed then
+    table.insert(dead, killed)
+    redis.call('SREM', KEYS[4], killed)
+    redis.call('XADD', KEYS[6], '*', 'type', 'death', 'round', '0', 'target', killed, 'content', 'night')
+end
+if poisoned then
+    table.insert(dead, poisoned)
+    redis.call('SREM', KEYS[4], poisoned)
+    redis.call('XADD', KEYS[6], '*', 'type', 'death', 'round', '0', 'target', poisoned, 'content', 'night')
+end
+local version = redis.call('INCR', KEYS[5])
+return {dead, redis.call('SMEMBERS', KEYS[4]), version}
+"""
+
+# 读取历史记录：返回玩家游标之后的记录（full 时从头返回）并把游标移到末尾
+# KEYS: history, history_cursors
+# ARGV: 玩家id, 是否完整读取('1'/'0')
+# 返回: 历史记录列表
+READ_HISTORY = """
+local cursor = 0
+if ARGV[2] ~= '1' then
+    cursor = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+end
+local entries = redis.call('LRANGE', KEYS[1], cursor, -1)
+redis.call('HSET', KEYS[2], ARGV[1], cursor + #entries)
+return entries
+"""
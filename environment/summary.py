@@ -0,0 +1,112 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+_ENTRY_PATTERN = re.compile(r'^round:(\d+),([^,]*),(.*)$', re.DOTALL)
+_VOTE_PATTERN = re.compile(r'^玩家(\S+?)投给了：(\S+)$')
+_SPEECH_PATTERN = re.compile(r'^玩家(\S+?)发言：(.*)$', re.DOTALL)
+
+
+def history_token_budget() -> int:
+    """历史记录的 token 预算（HISTORY_TOKEN_BUDGET），0 表示不压缩；每次调用时读取，注入的上下文和 get_history 使用同一个值"""
+    return int(os.getenv('HISTORY_TOKEN_BUDGET') or 0)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文等非 ASCII 字符按 1 个 token，ASCII 字符按 4 个字符 1 个 token"""
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def parse_entry(entry: str) -> Optional[Tuple[int, str, str]]:
+    """解析历史记录 'round:1,playerA,内容'，不是历史记录（例如玩家记忆）时返回 None"""
+    match = _ENTRY_PATTERN.match(entry)
+    if match is None:
+        return None
+    return int(match.group(1)), match.group(2), match.group(3)
+
+
+def split_rounds(entries: List[str]) -> List[Tuple[int, List[str]]]:
+    """按轮次把记录分组；不是历史记录的行（例如玩家记忆）归入它所在位置的当前轮次"""
+    groups: List[Tuple[int, List[str]]] = []
+    for entry in entries:
+        parsed = parse_entry(entry)
+        round = parsed[0] if parsed else (groups[-1][0] if groups else 0)
+        if not groups or groups[-1][0] != round:
+            groups.append((round, []))
+        groups[-1][1].append(entry)
+    return groups
+
+
+# 摘要详细程度：2 保留截断后的发言和投票，1 只保留投票，0 只保留系统公告
+SUMMARY_LEVELS = (2, 1, 0)
+
+
+def summarize_round(round: int, entries: List[str], level: int = 2, speech_chars: int = 40) -> str:
+    """
+    把一轮的公开历史记录压缩为一条摘要：系统公告原样保留，发言截断到 speech_chars 个字符，投票合并为一行，
+    level 越低保留的内容越少（见 SUMMARY_LEVELS）。只使用公开的历史记录，同一轮的摘要对所有玩家都相同。
+    """
+    notices, speeches, votes = [], [], []
+    for entry in entries:
+        parsed = parse_entry(entry)
+        if parsed is None:
+            continue
+        _, agent_id, record = parsed
+        if agent_id == 'world':
+            notices.append(record)
+        elif (vote := _VOTE_PATTERN.match(record)) is not None:
+            votes.append(f'{vote.group(1)}→{vote.group(2)}')
+        elif (speech := _SPEECH_PATTERN.match(record)) is not None:
+            content = speech.group(2).strip().replace('\n', ' ')
+            if len(content) > speech_chars:
+                content = content[:speech_chars] + '…'
+            speeches.append(f'{speech.group(1)}：{content}')
+        else:
+            notices.append(record)
+    parts = notices.copy()
+    if speeches and level >= 2:
+        parts.append('发言摘要：' + '；'.join(speeches))
+    if votes and level >= 1:
+        parts.append('投票：' + ', '.join(votes))
+    return f'round:{round},world,第{round}轮摘要：' + ' | '.join(parts)
+
+
+def compact_history(entries: List[str], token_budget: int, summaries: Dict[str, str],
+                    canonical: Optional[List[str]] = None) -> Tuple[List[str], Dict[str, str]]:
+    """
+    在 token 预算内压缩历史记录：从最早的一轮开始，依次把已经结束的轮次替换为摘要，直到总长度不超过预算；
+    全部替换后仍超出预算时，再逐级降低摘要的详细程度（见 SUMMARY_LEVELS）。
+    第 0 轮（开局信息）和当前轮始终保留原文，非历史记录的行（玩家记忆）保留在原来的位置。
+
+    Args:
+        summaries: 已经计算过的摘要（'轮次:详细程度' -> 摘要），命中时不再重新计算
+        canonical: 完整的公开历史记录。摘要会被所有玩家共享，给出时只根据其中对应轮次的记录计算，
+            不使用 entries（可能只是某个玩家的部分视图）
+    Returns:
+        (压缩后的记录, 本次新计算的摘要)
+    """
+    groups = split_rounds(entries)
+    public = dict(split_rounds(canonical)) if canonical is not None else {}
+    compacted_groups = [group for _, group in groups]
+    sizes = [sum(estimate_tokens(entry) for entry in group) for group in compacted_groups]
+    total = sum(sizes)
+    computed: Dict[str, str] = {}
+
+    for level in SUMMARY_LEVELS:
+        for index, (round, group) in enumerate(groups[:-1]):
+            if total <= token_budget:
+                break
+            if round == 0:
+                continue
+            key = f'{round}:{level}'
+            summary = summaries.get(key) or computed.get(key)
+            if summary is None:
+                summary = computed[key] = summarize_round(round, public.get(round, group), level)
+            private = [entry for entry in group if parse_entry(entry) is None]
+            compacted_groups[index] = [summary] + private
+            new_size = sum(estimate_tokens(entry) for entry in compacted_groups[index])
+            total += new_size - sizes[index]
+            sizes[index] = new_size
+
+    return [entry for group in compacted_groups for entry in group], computed
@@ -0,0 +1,89 @@
+import os
+from typing import Any, Optional, Protocol
+
+from openai import AsyncOpenAI
+
+from llm.cache import CACHE_MODES, CachedLLM, CompletionCache
+from llm.dispatcher import LLMDispatcher
+from llm.mock import MockLLM
+
+LLM_BACKENDS = ('openai', 'mock')
+
+
+class LLMBackend(Protocol):
+    """
+    ReActPlayer 使用的模型接口，即 AsyncOpenAI 客户端的一个子集：
+    await client.chat.completions.create(model=..., messages=..., stream=..., stream_options=..., timeout=...)。
+    'openai' 后端为 AsyncOpenAI，'mock' 后端为 MockLLM，外面依次包一层 LLMDispatcher（并发、限速和重试）
+    和 CachedLLM（设置 LLM_CACHE 时），命中缓存的请求不占用并发名额。
+    """
+
+    chat: Any
+
+    async def close(self): ...
+
+
+def create_llm_backend(kind: str = None, cache_mode: str = None) -> LLMBackend:
+    """根据配置创建模型后端，kind / cache_mode 为空时读取环境变量 LLM_BACKEND / LLM_CACHE"""
+    kind = kind or os.getenv('LLM_BACKEND', 'openai')
+    cache_mode = cache_mode or os.getenv('LLM_CACHE', 'off')
+    if cache_mode not in CACHE_MODES:
+        raise ValueError(f'Unknown LLM cache mode: {cache_mode}')
+    if cache_mode == 'off':
+        return _create_dispatcher(kind)
+    cache = CompletionCache(os.getenv('LLM_CACHE_PATH') or 'llm_cache.db',
+                            max_bytes=int(float(os.getenv('LLM_CACHE_MAX_MB') or 0) * 1024 * 1024))
+    #严格回放时不需要真实的模型后端，也不需要 API Key
+    backend = None if cache_mode == 'replay' else _create_dispatcher(kind)
+    return CachedLLM(backend, cache, cache_mode)
+
+
+_shared_backend: Optional[LLMBackend] = None
+
+
+def get_llm_backend() -> LLMBackend:
+    """进程内共享的模型后端，没有显式传入 client 的玩家都使用它"""
+    global _shared_backend
+    if _shared_backend is None:
+        _shared_backend = create_llm_backend()
+    return _shared_backend
+
+
+def llm_metrics(client: LLMBackend) -> dict:
+    """汇总后端各层的统计：缓存命中情况和调度器的排队指标"""
+    metrics = {}
+    while client is not None:
+        if isinstance(client, CachedLLM):
+            metrics['cache'] = dict(client.stats, mode=client.mode)
+        elif isinstance(client, LLMDispatcher):
+            metrics['dispatcher'] = client.metrics()
+        client = getattr(client, 'backend', None)
+    return metrics
+
+
+def _create_dispatcher(kind: str) -> LLMDispatcher:
+    return LLMDispatcher(
+        _create_backend(kind),
+        max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY') or 0),
+        model_concurrency=int(os.getenv('LLM_MODEL_CONCURRENCY') or 0),
+        rate=float(os.getenv('LLM_RATE_LIMIT') or 0),
+        burst=float(os.getenv('LLM_RATE_BURST') or 0) or None,
+        max_retries=int(os.getenv('LLM_MAX_RETRIES') or 3),
+    )
+
+
+def _create_backend(kind: str) -> LLMBackend:
+    if kind == 'mock':
+        return MockLLM(
+            seed=int(os.getenv('MOCK_LLM_SEED') or 0),
+            latency=float(os.getenv('MOCK_LLM_LATENCY_MS') or 0) / 1000,
+            token_latency=float(os.getenv('MOCK_LLM_TOKEN_LATENCY_MS') or 0) / 1000,
+            format_error_rate=float(os.getenv('MOCK_LLM_FORMAT_ERROR_RATE') or 0),
+        )
+    if kind != 'openai':
+        raise ValueError(f'Unknown LLM backend: {kind}')
+    return AsyncOpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        base_url=os.getenv('BASE_URL'),
+        max_retries=0   #重试由 LLMDispatcher 统一处理
+    )
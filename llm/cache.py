@@ -0,0 +1,199 @@
+import hashlib
+import json
+import sqlite3
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from llm.responses import STOP_TAGS, TextStream, dump_tool_calls, make_completion, make_usage
+
+if TYPE_CHECKING:
+    from llm.backend import LLMBackend
+
+CACHE_MODES = ('off', 'record', 'replay')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    tool_calls TEXT
+);
+CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used);
+'''
+
+#不影响回复内容的请求参数，不参与缓存键
+_TRANSPORT_PARAMS = ('stream', 'stream_options', 'timeout')
+
+
+class ReplayMissError(RuntimeError):
+    """replay 模式下请求没有录制过的回复"""
+
+
+def request_key(model: Optional[str], messages: List[dict], **params) -> str:
+    """缓存键：模型名、消息和其余请求参数的 sha256，与是否流式无关"""
+    payload = {'model': model, 'messages': messages,
+               **{name: value for name, value in params.items() if name not in _TRANSPORT_PARAMS}}
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+class CompletionCache:
+    """
+    以请求哈希为键的 SQLite 回复缓存，按最近使用时间淘汰，总大小不超过 max_bytes（0 表示不限制）。
+    多个进程可以共用同一个文件（WAL 模式）。
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(completions)')}
+        if 'tool_calls' not in columns:
+            #旧版本的缓存文件没有函数调用列
+            self._db.execute('ALTER TABLE completions ADD COLUMN tool_calls TEXT')
+
+    def get(self, key: str) -> Optional[Tuple[str, int, int, Optional[list]]]:
+        """返回 (回复, 提示词 token, 生成 token, 函数调用)，同时刷新最近使用时间"""
+        row = self._db.execute('SELECT response, prompt_tokens, completion_tokens, tool_calls FROM completions '
+                               'WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute('UPDATE completions SET last_used = ? WHERE key = ?', (time.time(), key))
+        response, prompt_tokens, completion_tokens, tool_calls = row
+        return response, prompt_tokens, completion_tokens, json.loads(tool_calls) if tool_calls else None
+
+    def put(self, key: str, model: Optional[str], response: str, prompt_tokens: int, completion_tokens: int,
+            tool_calls: Optional[list] = None) -> int:
+        """写入一条回复，返回因超出大小上限而淘汰的条数"""
+        tool_calls_json = json.dumps(tool_calls, ensure_ascii=False) if tool_calls else None
+        size = len(key) + len(response.encode()) + len((tool_calls_json or '').encode())
+        self._db.execute('INSERT OR REPLACE INTO completions (key, model, response, prompt_tokens, completion_tokens, '
+                         'size, last_used, tool_calls) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, model, response, prompt_tokens, completion_tokens, size, time.time(), tool_calls_json))
+        return self._evict() if self.max_bytes else 0
+
+    def _evict(self) -> int:
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM completions').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = 0
+        rows = self._db.execute('SELECT key, size FROM completions ORDER BY last_used').fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute('DELETE FROM completions WHERE key = ?', (key,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def close(self):
+        self._db.close()
+
+
+class CachedLLM:
+    """
+    带录制/回放缓存的模型后端，包装任意 LLMBackend。
+    record：命中时直接返回缓存的回复，未命中时请求模型并写入缓存；
+    replay：只从缓存读取，未命中时抛出 ReplayMissError，保证重放的对局不会访问模型。
+    流式请求命中时整段回复作为一个分块返回；未命中时边接收边转发，流结束或被关闭时写入已接收的内容
+    （ReActPlayer 读到动作结束标签后会提前关闭流，之后的内容本来也会被丢弃）。
+    """
+
+    def __init__(self, backend: Optional['LLMBackend'], cache: CompletionCache, mode: str = 'record'):
+        if mode not in CACHE_MODES[1:]:
+            raise ValueError(f'Unknown LLM cache mode: {mode}')
+        if backend is None and mode != 'replay':
+            raise ValueError('record mode requires an LLM backend')
+        self.backend = backend
+        self.cache = cache
+        self.mode = mode
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def close(self):
+        self.cache.close()
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def _create(self, model: Optional[str] = None, messages: List[dict] = (), stream: bool = False,
+                      stream_options: Optional[dict] = None, **params):
+        key = request_key(model, messages, **params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats['hits'] += 1
+            response, prompt_tokens, completion_tokens, tool_calls = cached
+            #命中缓存的请求没有消耗提示词 token，全部计为缓存命中
+            usage = make_usage(prompt_tokens, completion_tokens, cached_tokens=prompt_tokens)
+            if stream:
+                include_usage = bool(stream_options and stream_options.get('include_usage'))
+                return TextStream([response], usage if include_usage else None)
+            return make_completion(response, usage, tool_calls)
+
+        self.stats['misses'] += 1
+        if self.mode == 'replay':
+            raise ReplayMissError(f'没有录制过的回复：model={model}，key={key[:12]}')
+        if stream:
+            upstream = await self.backend.chat.completions.create(
+                model=model, messages=messages, stream=True, stream_options=stream_options, **params)
+            return _RecordingStream(upstream, lambda text, usage: self._store(key, model, text, usage))
+        completion = await self.backend.chat.completions.create(model=model, messages=messages, **params)
+        message = completion.choices[0].message
+        self._store(key, model, message.content or '', completion.usage, dump_tool_calls(message))
+        return completion
+
+    def _store(self, key: str, model: Optional[str], text: str, usage, tool_calls: Optional[list] = None):
+        if not text and not tool_calls:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        self.stats['evictions'] += self.cache.put(key, model, text, prompt_tokens, completion_tokens, tool_calls)
+        self.stats['stores'] += 1
+
+
+class _RecordingStream:
+    """
+    转发上游的流式响应，正常读完、或读到停止标签后提前关闭时，把已接收的文本交给 on_done 写入缓存。
+    中途出错、被取消（例如超过截止时间）或没有读到停止标签就关闭的回复不完整，不写入缓存。
+    """
+
+    def __init__(self, upstream, on_done):
+        self._upstream = upstream
+        self._on_done = on_done
+        self._text = ''
+        self._usage = None
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = await self._upstream.__anext__()
+        except StopAsyncIteration:
+            self._finish()
+            raise
+        except BaseException:
+            self._done = True   #出错或被取消（CancelledError 不是 Exception 的子类）
+            raise
+        if chunk.usage is not None:
+            self._usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            self._text += chunk.choices[0].delta.content
+        return chunk
+
+    async def close(self):
+        if not any(tag in self._text for tag in STOP_TAGS):
+            self._done = True
+        self._finish()
+        await self._upstream.close()
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._on_done(self._text, self._usage)
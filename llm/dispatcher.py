@@ -0,0 +1,216 @@
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, Optional
+
+from openai import APIConnectionError
+
+from logs.logging_config import setup_logger
+
+if TYPE_CHECKING:
+    from llm.backend import LLMBackend
+
+logger = setup_logger('llm')
+
+#可以重试的 HTTP 状态码：请求超时、冲突、限流和服务端错误
+_RETRY_STATUS = {408, 409, 429}
+#Retry-After 的最长等待时间（秒）
+_MAX_RETRY_AFTER = 60.0
+
+#当前任务最近一次请求的排队时间（含重试），调用方在同一个任务中读取
+_queue_wait: ContextVar[float] = ContextVar('llm_queue_wait', default=0.0)
+
+
+def take_queue_wait() -> float:
+    """返回当前任务上一次经过调度器的请求的排队时间并清零，命中缓存等未经过调度器的请求为 0"""
+    wait = _queue_wait.get()
+    _queue_wait.set(0.0)
+    return wait
+
+
+class TokenBucket:
+    """令牌桶限速：每秒补充 rate 个令牌，最多积攒 capacity 个，每个请求消耗一个"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        #加锁保证按到达顺序发放令牌
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """从 429 / 503 响应的 Retry-After（或 retry-after-ms）头中读取需要等待的秒数"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    if (value := headers.get('retry-after-ms')) is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if (value := headers.get('retry-after')) is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in _RETRY_STATUS or status >= 500
+    return isinstance(error, (APIConnectionError, asyncio.TimeoutError, ConnectionError))
+
+
+class LLMDispatcher:
+    """
+    进程内共享的模型请求调度器，实现 LLMBackend 接口，所有玩家通过它复用同一个客户端（HTTP 连接池）。
+    请求依次经过全局并发上限、按模型的并发上限和令牌桶限速，失败时按 Retry-After 或指数退避重试。
+    流式请求在整个流被读完或关闭之前一直占用并发名额。
+    """
+
+    def __init__(self, backend: 'LLMBackend', max_concurrency: int = 0, model_concurrency: int = 0,
+                 rate: float = 0.0, burst: Optional[float] = None, max_retries: int = 3, max_backoff: float = 10.0):
+        self.backend = backend
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._global = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._model_concurrency = model_concurrency
+        self._models: Dict[Optional[str], asyncio.Semaphore] = {}
+        self._bucket = TokenBucket(rate, burst) if rate else None
+        self._metrics = {
+            'requests': 0, 'retries': 0, 'rate_limited': 0, 'failures': 0,
+            'queue_depth': 0, 'max_queue_depth': 0, 'in_flight': 0,
+            'wait_time': 0.0, 'max_wait_time': 0.0,
+        }
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def metrics(self) -> dict:
+        """当前排队数、在途请求数和累计排队时间等指标"""
+        metrics = dict(self._metrics)
+        metrics['avg_wait_time'] = metrics['wait_time'] / max(metrics['requests'], 1)
+        return metrics
+
+    async def close(self):
+        await self.backend.close()
+
+    async def _create(self, model: Optional[str] = None, stream: bool = False, **params):
+        self._metrics['requests'] += 1
+        _queue_wait.set(0.0)
+        for attempt in range(self.max_retries + 1):
+            release = await self._acquire(model)
+            try:
+                response = await self.backend.chat.completions.create(model=model, stream=stream, **params)
+            except Exception as e:
+                release()
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    self._metrics['failures'] += 1
+                    raise
+                delay = self._backoff(e, attempt)
+                self._metrics['retries'] += 1
+                logger.warning('模型请求失败 (第 %d/%d 次重试，%.1f 秒后)：%s', attempt + 1, self.max_retries, delay, e)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                #请求被取消（截止时间、投票超时、关闭）时同样归还名额
+                release()
+                raise
+            if stream:
+                return _DispatchedStream(response, release)
+            release()
+            return response
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        if getattr(error, 'status_code', None) == 429:
+            self._metrics['rate_limited'] += 1
+        delay = retry_after(error)
+        if delay is None:
+            #指数退避，加入随机抖动避免同时失败的请求再次同时重试
+            delay = min(2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+        return min(delay, _MAX_RETRY_AFTER)
+
+    async def _acquire(self, model: Optional[str]):
+        """依次获取全局名额、模型名额和令牌，返回释放名额的函数"""
+        metrics = self._metrics
+        metrics['queue_depth'] += 1
+        metrics['max_queue_depth'] = max(metrics['max_queue_depth'], metrics['queue_depth'])
+        start = time.perf_counter()
+        acquired = []
+        try:
+            if self._global is not None:
+                await self._global.acquire()
+                acquired.append(self._global)
+            if self._model_concurrency:
+                semaphore = self._models.setdefault(model, asyncio.Semaphore(self._model_concurrency))
+                await semaphore.acquire()
+                acquired.append(semaphore)
+            if self._bucket is not None:
+                await self._bucket.acquire()
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            metrics['queue_depth'] -= 1
+        wait = time.perf_counter() - start
+        _queue_wait.set(_queue_wait.get() + wait)
+        metrics['wait_time'] += wait
+        metrics['max_wait_time'] = max(metrics['max_wait_time'], wait)
+        metrics['in_flight'] += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            metrics['in_flight'] -= 1
+            for semaphore in acquired:
+                semaphore.release()
+
+        return release
+
+
+class _DispatchedStream:
+    """转发上游的流式响应，流读完或关闭时释放并发名额"""
+
+    def __init__(self, upstream, release):
+        self._upstream = upstream
+        self._release = release
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._upstream.__anext__()
+        except BaseException:
+            self._release()
+            raise
+
+    async def close(self):
+        self._release()
+        await self._upstream.close()
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from environment.summary import estimate_tokens
+from llm.responses import TextStream, make_completion, make_usage
+
+_PLAYER_PATTERN = re.compile(r'你是(\S+?)。')
+_ALIVE_PATTERN = re.compile(r'当前存活玩家：([^\n]*)')
+_TEAMMATE_PATTERN = re.compile(r'你的狼人队友是([^\n]*)')
+_CALL_PATTERN = re.compile(r'<action>(\w+)\((.*?)\)</action>', re.DOTALL)
+_SPEECHES = ['我是好人，昨晚没有信息，先听后面的玩家发言。', '我觉得前面有玩家发言很可疑，投票时大家注意。',
+             '我是村民，暂时没有怀疑对象，跟随多数人的判断。', '请预言家尽快跳出来报查验结果。']
+
+
+class MockLLM:
+    """
+    离线的确定性模型后端，实现 LLMBackend 接口（AsyncOpenAI 的子集）。
+    根据请求内容按脚本生成合法的 <thought>/<action>/<final_answer> 输出，随机选择由 seed 和消息内容决定，
+    同样的请求总是得到同样的回复。latency 为首个 token 的延迟，token_latency 为之后每个 token 的延迟。
+    请求带 tools 参数时以函数调用（tool_calls）的形式返回工具调用。
+    format_error_rate 为回复出现格式错误的概率，用于比较两种工具调用模式的解析失败率：文本回复丢失
+    <action> / <final_answer> 标签；函数调用则随机出现参数不是合法 JSON、工具名不存在、或把调用写进回复文本（没有 tool_calls）。
+    """
+
+    def __init__(self, seed: int = 0, latency: float = 0.0, token_latency: float = 0.0,
+                 cure_rate: float = 0.5, poison_rate: float = 0.3, hallucinate: bool = True,
+                 format_error_rate: float = 0.0):
+        self.seed = seed
+        self.latency = latency
+        self.token_latency = token_latency
+        self.cure_rate = cure_rate
+        self.poison_rate = poison_rate
+        self.hallucinate = hallucinate   #在 <action> 之后继续编造 <observation>，模拟真实模型不按要求停止
+        self.format_error_rate = format_error_rate
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def close(self):
+        pass
+
+    async def _create(self, model: Optional[str] = None, messages: List[Dict] = (), stream: bool = False,
+                      stream_options: Optional[Dict] = None, timeout: Optional[float] = None,
+                      tools: Optional[List[Dict]] = None, **kwargs):
+        self.calls += 1
+        text = self.respond(messages)
+        tool_calls = None
+        if tools is not None:
+            text, tool_calls = self._to_tool_calls(text, tools, messages)
+        if self.format_error_rate:
+            #与行动选择使用不同的随机数，format_error_rate 不影响对局本身
+            digest = hashlib.sha256(f'format:{self.seed}:{json.dumps(messages, ensure_ascii=False)}'.encode()).digest()
+            rng = random.Random(digest)
+            if rng.random() < self.format_error_rate:
+                if tool_calls:
+                    text, tool_calls = _break_tool_call(text, tool_calls[0], rng.choice(_TOOL_CALL_FAULTS))
+                else:
+                    text = _strip_tags(text)
+        completion_tokens = estimate_tokens(text)
+        prompt_tokens = sum(estimate_tokens(message.get('content') or '') for message in messages)
+        usage = make_usage(prompt_tokens, completion_tokens)
+        if stream:
+            include_usage = bool(stream_options and stream_options.get('include_usage'))
+            #每个分块约一个 token
+            chunks = [text[i:i + 2] for i in range(0, len(text), 2)]
+            return TextStream(chunks, usage if include_usage else None, self.latency, self.token_latency)
+        await asyncio.sleep(self.latency + self.token_latency * completion_tokens)
+        return make_completion(text, usage, tool_calls)
+
+    def _to_tool_calls(self, text: str, tools: List[Dict], messages: List[Dict]):
+        """把 <action>tool("x")</action> 转换为函数调用，参数按 JSON Schema 中的顺序命名"""
+        match = _CALL_PATTERN.search(text)
+        if match is None:
+            return text, None
+        name = match.group(1)
+        values = re.findall(r'"([^"]*)"', match.group(2))
+        schema = next((tool['function'] for tool in tools if tool['function']['name'] == name), None)
+        params = list(schema['parameters']['properties']) if schema else []
+        arguments = json.dumps(dict(zip(params, values)), ensure_ascii=False)
+        call_id = 'call_' + hashlib.sha256(f'{len(messages)}:{text}'.encode()).hexdigest()[:12]
+        thought = text[:match.start()].strip()
+        return thought, [{'id': call_id, 'name': name, 'arguments': arguments}]
+
+    def respond(self, messages: List[Dict]) -> str:
+        """按脚本生成一次回复"""
+        digest = hashlib.sha256(f'{self.seed}:{json.dumps(messages, ensure_ascii=False)}'.encode()).digest()
+        rng = random.Random(digest)
+        texts = [message.get('content') or '' for message in messages]
+        system = '\n'.join(text for message, text in zip(messages, texts) if message['role'] == 'system')
+        player = _last_match(_PLAYER_PATTERN, system) or ''
+        #ReActPlayer 只在请求之后追加 <observation> 和 <error>，最后一条其他用户消息就是本次请求
+        requests = [text for message, text in zip(messages, texts)
+                    if message['role'] == 'user' and not text.startswith(('<observation>', '<error>'))]
+        request = requests[-1] if requests else ''
+        observations = [text for message, text in zip(messages, texts)
+                        if text.startswith('<observation>') or message['role'] == 'tool']
+        tool_observations = [text for text in observations if not _ALIVE_PATTERN.search(text)]
+        alive_text = _last_match(_ALIVE_PATTERN, '\n'.join(texts))
+        alive = [pid.strip() for pid in alive_text.split(',') if pid.strip()] if alive_text else None
+        teammates = _last_match(_TEAMMATE_PATTERN, '\n'.join(texts)) or ''
+
+        if 'Speech:' in request:
+            return self._final('轮到我发言了。', 'Speech:' + rng.choice(_SPEECHES))
+
+        others = [pid for pid in (alive or []) if pid != player]
+        if 'Vote:' in request:
+            if alive is None:
+                return self._action('我需要先确认存活玩家。', 'check_alive_players()')
+            candidates = [pid for pid in others if pid not in teammates] or others
+            return self._final('根据发言选择投票目标。', f'Vote:{rng.choice(candidates)}' if candidates else 'Vote:')
+
+        if '解药' in request and '被杀了' in request:
+            if not tool_observations and rng.random() < self.cure_rate:
+                return self._action('今晚有人被杀，我决定使用解药。', 'cure()')
+            return self._final('做出解药的决定。', 'Execute:使用' if tool_observations else 'Execute:不使用')
+        if '解药' in request:
+            return self._final('今晚无法使用解药。', 'Execute:不使用解药')
+
+        if alive is None:
+            return self._action('我需要先确认存活玩家。', 'check_alive_players()')
+        if tool_observations:
+            return self._final('行动已经完成。', 'Execute:完成')
+
+        if '击杀目标' in request:
+            candidates = [pid for pid in others if pid not in teammates] or others
+            if candidates:
+                return self._action('选择一个击杀目标。', f'kill("{rng.choice(candidates)}")')
+        elif '预言目标' in request:
+            if others:
+                return self._action('选择一个查验目标。', f'check_identity("{rng.choice(others)}")')
+        elif '毒杀目标' in request:
+            if others and rng.random() < self.poison_rate:
+                return self._action('决定使用毒药。', f'poison("{rng.choice(others)}")')
+            return self._final('今晚不使用毒药。', 'Execute:不使用毒药')
+        return self._final('没有需要做的事情。', 'Execute:完成')
+
+    def _action(self, thought: str, call: str) -> str:
+        text = f'<thought>{thought}</thought>\n<action>{call}</action>'
+        if self.hallucinate:
+            text += '\n<observation>（模型自行编造的观察结果，应当被丢弃）</observation>\n<thought>继续编造后续步骤。</thought>'
+        return text
+
+    def _final(self, thought: str, answer: str) -> str:
+        return f'<thought>{thought}</thought>\n<final_answer>{answer}</final_answer>'
+
+
+_TOOL_CALL_FAULTS = ('arguments', 'name', 'text')
+
+
+def _break_tool_call(thought: str, call: Dict[str, str], fault: str):
+    """模拟函数调用的格式错误，返回 (回复文本, tool_calls)"""
+    if fault == 'arguments':
+        return thought, [dict(call, arguments=call['arguments'][:-1])]     #截断的 JSON
+    if fault == 'name':
+        return thought, [dict(call, name=call['name'] + '_tool')]
+    values = ', '.join(json.dumps(value, ensure_ascii=False) for value in json.loads(call['arguments']).values())
+    return f'{thought}\n{call["name"]}({values})', None
+
+
+def _strip_tags(text: str) -> str:
+    """模拟格式错误：去掉动作和最终回答的标签，只保留其中的内容"""
+    text = text.split('<observation>', 1)[0]
+    return re.sub(r'</?(action|final_answer)>', '', text).strip()
+
+
+def _last_match(pattern: re.Pattern, text: str) -> Optional[str]:
+    matches = pattern.findall(text)
+    return matches[-1] if matches else None
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+#ReAct 回复在这些标签处结束，流式请求读到其中之一后即可提前停止
+STOP_TAGS = ('</action>', '</final_answer>')
+
+
+def make_usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> SimpleNamespace:
+    """构造与 OpenAI 返回格式一致的 usage"""
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+    )
+
+
+def make_completion(text: str, usage: Optional[SimpleNamespace] = None,
+                    tool_calls: Optional[List[Dict[str, str]]] = None) -> SimpleNamespace:
+    """
+    构造非流式的 chat completion 响应。
+
+    Args:
+        tool_calls: 函数调用，每项为 {'id', 'name', 'arguments'}，arguments 为 JSON 字符串
+    """
+    calls = None
+    if tool_calls:
+        calls = [SimpleNamespace(id=call['id'], type='function',
+                                 function=SimpleNamespace(name=call['name'], arguments=call['arguments']))
+                 for call in tool_calls]
+    message = SimpleNamespace(content=text, tool_calls=calls)
+    finish_reason = 'tool_calls' if calls else 'stop'
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)], usage=usage)
+
+
+def dump_tool_calls(message) -> Optional[List[Dict[str, str]]]:
+    """把响应中的函数调用转换为 make_completion 使用的字典列表"""
+    if not getattr(message, 'tool_calls', None):
+        return None
+    return [{'id': call.id, 'name': call.function.name, 'arguments': call.function.arguments}
+            for call in message.tool_calls]
+
+
+class TextStream:
+    """
+    把一段文本按分块模拟为流式响应，接口与 AsyncOpenAI 的流一致（异步迭代 + close）。
+    usage 不为空时在最后发送一个 choices 为空、只带用量的分块（对应 stream_options={'include_usage': True}）。
+    """
+
+    def __init__(self, chunks: List[str], usage: Optional[SimpleNamespace] = None,
+                 latency: float = 0.0, token_latency: float = 0.0):
+        self._chunks = chunks
+        self._usage = usage
+        self._latency = latency
+        self._token_latency = token_latency
+        self._index = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed or self._index > len(self._chunks):
+            raise StopAsyncIteration
+        delay = self._latency if self._index == 0 else self._token_latency
+        if delay:
+            await asyncio.sleep(delay)
+        self._index += 1
+        if self._index > len(self._chunks):
+            if self._usage is None:
+                raise StopAsyncIteration
+            return SimpleNamespace(choices=[], usage=self._usage)
+        delta = SimpleNamespace(content=self._chunks[self._index - 1], tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+
+    async def close(self):
+        self.closed = True
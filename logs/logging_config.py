@@ -1,25 +1,219 @@
+"""
+日志：调用方只把 LogRecord 放入队列，由后台线程格式化（默认输出 JSON 行）并写入文件，
+事件循环中不做磁盘 I/O。每个进程写自己的文件，按大小和时间轮转，配置见 .env.example 中的 LOG_*。
+"""
+import atexit
+import copy
+import glob
+import json
 import logging
+import multiprocessing.util
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LOG_FORMATS = ('json', 'text')
+#LogRecord 自带的属性，其余属性（通过 extra 传入）作为 JSON 字段输出
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+_IMMUTABLE = (str, bytes, int, float, bool, type(None))
+
+
+class JSONFormatter(logging.Formatter):
+    """每条记录输出为一行 JSON：时间、级别、logger、进程号、消息以及 extra 中的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RotatingFileHandler(BaseRotatingHandler):
+    """
+    按大小和时间轮转：文件超过 max_bytes 或距上次轮转超过 interval 秒时，
+    把当前文件重命名为带时间戳的备份，只保留最近的 backup_count 个（0 表示全部保留）。
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, interval: float = 0.0, backup_count: int = 5):
+        super().__init__(filename, 'a', encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.rollover_at = time.time() + interval if interval else None
+
+    def shouldRollover(self, record) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        base = Path(self.baseFilename)
+        if base.exists() and base.stat().st_size:
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            backup = base.with_name(f'{base.name}.{stamp}')
+            index = 1
+            while backup.exists():
+                backup = base.with_name(f'{base.name}.{stamp}.{index}')
+                index += 1
+            base.rename(backup)
+            if self.backup_count:
+                backups = sorted(glob.glob(f'{glob.escape(str(base))}.*'), key=os.path.getmtime)
+                for old in backups[:-self.backup_count]:
+                    Path(old).unlink(missing_ok=True)
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, 'true' if default else 'false').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _create_file_handler(log_file: str) -> logging.Handler:
+    """按 LOG_* 配置创建写文件的 handler，LOG_PER_PROCESS 开启时文件名中加入进程号"""
+    log_format = os.getenv('LOG_FORMAT', 'json')
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f'Unknown LOG_FORMAT: {log_format}')
+    path = Path(log_file)
+    if _env_flag('LOG_PER_PROCESS', True):
+        path = path.with_name(f'{path.stem}.{os.getpid()}{path.suffix}')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        str(path),
+        max_bytes=int(float(os.getenv('LOG_MAX_MB') or 0) * 1024 * 1024),
+        interval=float(os.getenv('LOG_ROTATE_HOURS') or 0) * 3600,
+        backup_count=int(os.getenv('LOG_BACKUP_COUNT') or 5),
+    )
+    if log_format == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
+    return handler
+
+
+#本进程中每个日志文件的 handler 和后台写线程（同步模式下为 None）
+_sinks: Dict[str, Tuple[logging.Handler, Optional[QueueListener]]] = {}
+_sinks_lock = threading.Lock()
+_shutdown = False
+
+
+def _sink(log_file: str, asynchronous: bool) -> Tuple[logging.Handler, Optional[QueueListener]]:
+    sink = _sinks.get(log_file)
+    if sink is None:
+        with _sinks_lock:
+            sink = _sinks.get(log_file)
+            if sink is None:
+                if not _sinks:
+                    #multiprocessing 的子进程用 os._exit 退出，不执行 atexit，需要单独注册
+                    multiprocessing.util.Finalize(None, flush_logs, exitpriority=0)
+                handler = _create_file_handler(log_file)
+                listener = None
+                if asynchronous and not _shutdown:
+                    listener = QueueListener(queue.SimpleQueue(), handler)
+                    listener.start()
+                sink = _sinks[log_file] = (handler, listener)
+    return sink
+
+
+def _reset_after_fork():
+    """fork 出的子进程没有父进程的后台线程，清空后在第一次写日志时按新的进程号重新创建"""
+    global _sinks_lock
+    _sinks.clear()
+    _sinks_lock = threading.Lock()
+
+
+def flush_logs():
+    """停止后台写线程，写完队列中剩余的记录，之后的日志改为同步写入"""
+    global _shutdown
+    with _sinks_lock:
+        _shutdown = True
+        for log_file, (handler, listener) in list(_sinks.items()):
+            if listener is not None:
+                listener.stop()
+                _sinks[log_file] = (handler, None)
+            handler.flush()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(flush_logs)
+
+
+def _snapshot(value):
+    """可变的容器参数做浅拷贝，避免在后台线程格式化之前被调用方修改"""
+    if isinstance(value, _IMMUTABLE):
+        return value
+    if isinstance(value, (list, dict, set)):
+        return copy.copy(value)
+    return value
+
+
+class ProcessLogHandler(QueueHandler):
+    """
+    挂在每个 logger 上的 handler。异步模式下只把记录放入本进程的队列，
+    消息（包括较大的提示词、思考和观察）推迟到后台线程再格式化；同步模式下直接写文件。
+    """
+
+    def __init__(self, log_file: str, asynchronous: bool):
+        super().__init__(None)
+        self.log_file = log_file
+        self.asynchronous = asynchronous
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        #不调用 QueueHandler.prepare，它会在当前线程中格式化消息
+        args = record.args
+        if isinstance(args, dict):
+            record.args = {key: _snapshot(value) for key, value in args.items()}
+        elif args:
+            record.args = tuple(_snapshot(value) for value in args)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        handler, listener = _sink(self.log_file, True)
+        if listener is None:
+            handler.handle(record)   #进程退出阶段写线程已停止
+        else:
+            listener.queue.put_nowait(record)
+
+    def emit(self, record: logging.LogRecord):
+        if self.asynchronous:
+            super().emit(record)
+        else:
+            _sink(self.log_file, False)[0].handle(record)
+
 
 def setup_logger(
     name,
     log_file='logs/run.log',
     level=logging.INFO,
 ):
-    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
-
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
-
     logger = logging.getLogger(name)
     logger.setLevel(level)
     logger.propagate = False
 
     if not logger.handlers:
-        fh = logging.FileHandler(log_file, encoding='utf-8')
-        fh.setFormatter(formatter)
+        logger.addHandler(ProcessLogHandler(log_file, _env_flag('LOG_ASYNC', True)))
 
-        logger.addHandler(fh)
-    
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,258 @@
+"""
+结构化耗时记录（span）：对局阶段（夜晚、发言、投票）、向玩家发出的每个请求、模型请求、工具调用和存储操作各记录一条，
+按 TRACE_EXPORT 导出为 JSONL（每行一个 span）或 OpenMetrics 直方图，默认关闭。文件由后台线程写出，记录时不做磁盘 I/O。
+
+汇总 JSONL 中每局每类 span 的 p50/p95/p99：
+    python -m logs.tracing logs/spans.jsonl [--by-name] [--game GAME_ID]
+"""
+import argparse
+import atexit
+import json
+import math
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SPAN_TYPES = ('phase', 'request', 'llm', 'tool', 'redis')
+EXPORT_FORMATS = ('jsonl', 'openmetrics')
+#OpenMetrics 直方图的桶（秒）
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class Span:
+    type: str       #'phase'、'request'、'llm'、'tool' 或 'redis'
+    name: str       #阶段名、请求的行动、模型名、工具名或存储命令
+    game_id: str
+    start: float    #开始时间（Unix 时间戳）
+    duration: float = 0.0     #耗时（秒）
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class SpanRecorder:
+    """
+    收集 span，每 flush_every 条交给后台线程写出，调用方（事件循环）只做一次列表追加；
+    flush 写出剩余部分并等待写完，进程退出时自动调用。
+    """
+
+    def __init__(self, formats: Tuple[str, ...], jsonl_path: str, openmetrics_path: str, flush_every: int = 256):
+        for export_format in formats:
+            if export_format not in EXPORT_FORMATS:
+                raise ValueError(f'Unknown trace export format: {export_format}')
+        self.formats = formats
+        self.jsonl_path = jsonl_path
+        self.openmetrics_path = openmetrics_path
+        self.flush_every = flush_every
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()    #存储操作可能在多个线程中记录（例如 SQLite 缓存）
+        self._queue: Optional[queue.Queue] = None
+        self._writer_pid: Optional[int] = None
+        #OpenMetrics：(类型, 名称) -> [各桶计数, 总数, 总耗时]，只在写线程中修改
+        self._histograms: Dict[Tuple[str, str], list] = {}
+        self._tokens: Dict[Tuple[str, str], int] = defaultdict(int)   #(模型, prompt/completion) -> token 数
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        """fork 出的子进程只记录自己的 span，不重复写出父进程未写出的部分和直方图"""
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._queue = None
+        self._histograms = {}
+        self._tokens = defaultdict(int)
+
+    def metrics_path(self) -> Path:
+        """OpenMetrics 文件每个进程一个（文件名中加入进程号），避免多个进程互相覆盖"""
+        path = Path(self.openmetrics_path)
+        return path.with_name(f'{path.stem}.{os.getpid()}{path.suffix}')
+
+    def record(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) < self.flush_every:
+                return
+            spans, self._buffer = self._buffer, []
+        self._writer().put(spans)
+
+    def flush(self):
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+            if not spans and self._queue is None:
+                return
+        writer = self._writer()
+        if spans:
+            writer.put(spans)
+        writer.join()
+
+    def _writer(self) -> queue.Queue:
+        """返回写线程的队列，第一次使用时（或 fork 之后在子进程中）启动写线程"""
+        with self._lock:
+            if self._queue is None or self._writer_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._writer_pid = os.getpid()
+                #multiprocessing 的子进程用 os._exit 退出，不执行 atexit，需要单独注册
+                multiprocessing.util.Finalize(None, self.flush, exitpriority=0)
+                threading.Thread(target=self._write_loop, args=(self._queue,), name='span-writer', daemon=True).start()
+            return self._queue
+
+    def _write_loop(self, batches: queue.Queue):
+        while True:
+            spans = batches.get()
+            try:
+                self._write(spans)
+            except OSError as e:
+                print(f'span 写入失败：{e}', file=sys.stderr)
+            finally:
+                batches.task_done()
+
+    def _write(self, spans: List[Span]):
+        if 'jsonl' in self.formats and spans:
+            Path(self.jsonl_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(asdict(span), ensure_ascii=False) + '\n' for span in spans))
+        if 'openmetrics' in self.formats and spans:
+            for span in spans:
+                self._observe(span)
+            path = self.metrics_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.render_openmetrics())
+
+    def _observe(self, span: Span):
+        histogram = self._histograms.setdefault((span.type, span.name), [[0] * len(BUCKETS), 0, 0.0])
+        for i, bound in enumerate(BUCKETS):
+            if span.duration <= bound:
+                histogram[0][i] += 1
+        histogram[1] += 1
+        histogram[2] += span.duration
+        if span.type == 'llm':
+            for kind in ('prompt', 'completion'):
+                self._tokens[(span.name, kind)] += span.attrs.get(f'{kind}_tokens') or 0
+
+    def render_openmetrics(self) -> str:
+        lines = ['# TYPE werewolf_span_seconds histogram', '# UNIT werewolf_span_seconds seconds']
+        for (span_type, name), (buckets, count, total) in sorted(self._histograms.items()):
+            labels = f'pid="{os.getpid()}",type="{span_type}",name="{_escape(name)}"'
+            for bound, value in zip(BUCKETS, buckets):
+                lines.append(f'werewolf_span_seconds_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f'werewolf_span_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'werewolf_span_seconds_count{{{labels}}} {count}')
+            lines.append(f'werewolf_span_seconds_sum{{{labels}}} {total}')
+        lines.append('# TYPE werewolf_llm_tokens counter')
+        for (model, kind), value in sorted(self._tokens.items()):
+            lines.append(f'werewolf_llm_tokens_total{{pid="{os.getpid()}",model="{_escape(model)}",kind="{kind}"}} {value}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _create_recorder() -> Optional[SpanRecorder]:
+    formats = tuple(value.strip() for value in os.getenv('TRACE_EXPORT', 'off').split(',') if value.strip())
+    if not formats or formats == ('off',):
+        return None
+    recorder = SpanRecorder(
+        formats,
+        jsonl_path=os.getenv('TRACE_PATH') or 'logs/spans.jsonl',
+        openmetrics_path=os.getenv('TRACE_METRICS_PATH') or 'logs/spans.prom',
+    )
+    atexit.register(recorder.flush)
+    return recorder
+
+
+_recorder: Optional[SpanRecorder] = _create_recorder()
+
+
+def tracing_enabled() -> bool:
+    return _recorder is not None
+
+
+def set_recorder(recorder: Optional[SpanRecorder]) -> Optional[SpanRecorder]:
+    """替换全局的 SpanRecorder（None 表示关闭），返回原来的，供基准和测试使用"""
+    global _recorder
+    previous, _recorder = _recorder, recorder
+    return previous
+
+
+def record_span(span_type: str, name: str, game_id: str, start: float, duration: float, **attrs):
+    """记录一个已经结束的 span，未开启时什么也不做"""
+    if _recorder is not None:
+        _recorder.record(Span(span_type, name, game_id, start, duration, attrs))
+
+
+@contextmanager
+def span(span_type: str, name: str, game_id: str, **attrs) -> Iterator[Dict[str, Any]]:
+    """
+    记录 with 块的耗时，块内可以向返回的字典中补充属性：
+        with span('tool', 'kill', game_id, player=pid) as attrs:
+            attrs['result'] = ...
+    """
+    if _recorder is None:
+        yield attrs
+        return
+    start = time.time()
+    begin = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        _recorder.record(Span(span_type, name, game_id, start, time.perf_counter() - begin, attrs))
+
+
+def read_spans(path: str) -> List[Span]:
+    with open(path, encoding='utf-8') as f:
+        return [Span(**json.loads(line)) for line in f if line.strip()]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩法求分位数，sorted_values 需已排序且非空"""
+    index = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def summarize(spans: List[Span], by_name: bool = False) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+    """按 (对局, 类型, 名称) 统计 span 的数量、总耗时和 p50/p95/p99，by_name 为 False 时名称为空"""
+    groups: Dict[Tuple[str, str, str], List[float]] = defaultdict(list)
+    for item in spans:
+        groups[(item.game_id, item.type, item.name if by_name else '')].append(item.duration)
+    summary = {}
+    for key, durations in sorted(groups.items()):
+        durations.sort()
+        summary[key] = {
+            'count': len(durations), 'total': sum(durations),
+            'p50': percentile(durations, 50), 'p95': percentile(durations, 95), 'p99': percentile(durations, 99),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='汇总 span 记录中每局每类 span 的耗时分位数')
+    parser.add_argument('path', nargs='?', default='logs/spans.jsonl')
+    parser.add_argument('--by-name', action='store_true', help='按 span 名称（阶段、请求的行动、模型、工具、存储命令）分别统计')
+    parser.add_argument('--game', default=None, help='只统计指定对局')
+    args = parser.parse_args()
+
+    spans = read_spans(args.path)
+    if args.game is not None:
+        spans = [item for item in spans if item.game_id == args.game]
+    print(f'{"对局":<24} {"类型":<6} {"名称":<22} {"次数":>6} {"总耗时(s)":>10} '
+          f'{"p50(ms)":>9} {"p95(ms)":>9} {"p99(ms)":>9}')
+    for (game_id, span_type, name), stats in summarize(spans, args.by_name).items():
+        print(f'{game_id:<24} {span_type:<6} {name:<22} {stats["count"]:>6} {stats["total"]:>10.3f} '
+              f'{stats["p50"] * 1000:>9.2f} {stats["p95"] * 1000:>9.2f} {stats["p99"] * 1000:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
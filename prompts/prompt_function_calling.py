@@ -0,0 +1,7 @@
+function_calling_prompt = """
+# 函数调用模式
+本局通过原生函数调用使用工具，以此代替上面的 <action> 标签：
+- 需要使用工具时，直接调用对应的函数，工具的结果会以函数返回值的形式给你，不需要也不要输出 <action> 或 <observation>
+- 可以先在 <thought> 中简要思考，再调用函数
+- 得到足够的信息后，不再调用函数，按照要求的最终回复格式输出 <final_answer>最终答案</final_answer>
+"""
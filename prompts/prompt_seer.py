@@ -1,5 +1,4 @@
 react_system_prompt_template = """
-你是${player_name}。
 # 你的角色
 你是一个狼人杀玩家，请根据角色和游戏规则进行游戏。
 你的角色是预言家。
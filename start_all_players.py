@@ -4,7 +4,7 @@ import sys
 import time
 import os
 
-def start_players():
+def start_players(game_id='default'):
     """启动所有玩家实例"""
     players = ['playerA', 'playerB', 'playerC', 'playerD', 'playerE', 'playerF']
     
@@ -19,11 +19,11 @@ def start_players():
         # 在新窗口中启动每个玩家
         if sys.platform == 'win32':
             # Windows: 使用start命令在新窗口运行
-            cmd = f'start "Player {player_id}" cmd /k python "{player_script}" {player_id}'
+            cmd = f'start "Player {player_id}" cmd /k python "{player_script}" {player_id} {game_id}'
             subprocess.Popen(cmd, shell=True)
         else:
             # Linux/Mac: 使用xterm或gnome-terminal
-            subprocess.Popen(['xterm', '-e', f'python {player_script} {player_id}'])
+            subprocess.Popen(['xterm', '-e', f'python {player_script} {player_id} {game_id}'])
         
         time.sleep(0.5)  # 短暂延迟，避免同时启动造成冲突
     
@@ -31,4 +31,4 @@ def start_players():
     print("每个玩家都在独立的窗口中运行。")
 
 if __name__ == "__main__":
-    start_players()
\ No newline at end of file
+    start_players(sys.argv[1] if len(sys.argv) > 1 else 'default')
\ No newline at end of file
@@ -0,0 +1,4 @@
+import os
+
+#测试使用进程内存储后端，不需要 Redis
+os.environ.setdefault('ENV_BACKEND', 'memory')
@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+
+from engine.local import PLAYERS, LocalGameIO, play_local_game
+from engine.policies import RandomPolicy
+from environment.environment import game_context, get_environment, release_environment
+from environment.settings import Action6, GamePhase, Role
+from tools.seer import check_identity
+from tools.wolf import kill
+
+
+class RecordingIO(LocalGameIO):
+    def __init__(self, game_id, policies):
+        super().__init__(game_id, policies)
+        self.announcements = []
+
+    async def announce(self, text: str):
+        await super().announce(text)
+        self.announcements.append(text)
+
+
+class LatePolicy(RandomPolicy):
+    """
+    狼人收到 Execute 后一直不回复（超过截止时间），它的 kill 调用推迟到女巫的回合中才执行，
+    模拟网络中迟到的工具调用。女巫不使用药水，夜晚的死亡只可能来自狼人。
+    """
+
+    def __init__(self, player_id: str, late_calls: list, results: list):
+        super().__init__(player_id, seed=0, cure_rate=0.0, poison_rate=0.0)
+        self.late_calls = late_calls
+        self.results = results
+
+    async def act(self, kind, instructions, action=None):
+        if kind == 'Execute' and self.role == Role.WOLF:
+            self.late_calls.append(self.player_id)
+            await asyncio.sleep(1)
+            return ''
+        if kind == 'Execute' and self.role == Role.WITCH:
+            while self.late_calls:
+                wolf = self.late_calls.pop()
+                targets = [pid for pid in sorted(await get_environment().get_alive_players())
+                           if await get_environment().get_role(pid) != Role.WOLF]
+                self.results.append(await kill(wolf, targets[0]))
+        return await super().act(kind, instructions, action)
+
+
+def test_late_kill_after_deadline_is_ignored():
+    async def main():
+        game_id = f'test-{uuid.uuid4().hex[:8]}'
+        late_calls, results = [], []
+        policies = {pid: LatePolicy(pid, late_calls, results) for pid in PLAYERS}
+        io = RecordingIO(game_id, policies)
+        await play_local_game(game_id, policies, seed=0, max_rounds=1, deadlines={'Execute': 0.05}, io=io)
+        return results, io.announcements
+
+    results, announcements = asyncio.run(main())
+    assert results and all(result == '当前不是你的击杀回合，击杀无效。' for result in results)
+    assert '昨晚是个平安夜，没有玩家死亡' in announcements
+
+
+def test_seer_check_requires_action_token():
+    async def main():
+        game_id = f'test-{uuid.uuid4().hex[:8]}'
+        with game_context(game_id) as env:
+            await env.set_phase(GamePhase.NIGHT)
+            await env.set_alive_players({'playerA', 'playerB'})
+            await env.set_role('playerA', Role.SEER)
+            await env.set_role('playerB', Role.WOLF)
+            late = await check_identity('playerA', 'playerB')
+            late_memory = await env.get_player_memory('playerA')
+            await env.grant_action('playerA', Action6.SEER_SEE)
+            granted = await check_identity('playerA', 'playerB')
+            memory = await env.get_player_memory('playerA')
+            await env.clear_environment()
+        await release_environment(game_id)
+        return late, late_memory, granted, memory
+
+    late, late_memory, granted, memory = asyncio.run(main())
+    assert late == '当前不是你的查验回合，查验无效。' and late_memory == []
+    assert granted.startswith('目标id playerB 是狼人') and memory == ['你的预言结果是：playerB是狼人。']
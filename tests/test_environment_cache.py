@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+
+from environment.environment import Environment
+
+
+class CountingBackend:
+    """记录经过的存储命令名"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.commands = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr) or name in ('pipeline', 'register_script'):
+            return attr
+
+        def call(*args, **kwargs):
+            self.commands.append(name)
+            return attr(*args, **kwargs)
+        return call
+
+
+async def read_alive_players():
+    env = Environment(game_id=f'test-{uuid.uuid4().hex[:8]}', cache_mode='version', backend='memory')
+    await env.set_alive_players({'playerA', 'playerB'})
+    env._redis = backend = CountingBackend(await env.connect())
+
+    outside = []
+    for _ in range(3):
+        outside.append(await env.get_alive_players())
+    commands_outside, backend.commands = backend.commands, []
+
+    async with env.cache_snapshot():
+        inside = [await env.get_alive_players() for _ in range(3)]
+    commands_inside = list(backend.commands)
+    await env.clear_environment()
+    return outside, commands_outside, inside, commands_inside
+
+
+def test_version_cache_validates_once_per_snapshot():
+    outside, commands_outside, inside, commands_inside = asyncio.run(read_alive_players())
+    assert outside == inside == [{'playerA', 'playerB'}] * 3
+    #snapshot 之外不校验版本号，每次读取一次往返
+    assert commands_outside == ['smembers'] * 3
+    #snapshot 内只校验一次版本号，之后命中本地缓存
+    assert commands_inside.count('get') == 1 and len(commands_inside) <= 2
+
+
+async def clear_from_another_process():
+    game_id = f'test-{uuid.uuid4().hex[:8]}'
+    player = Environment(game_id=game_id, backend='memory')   #玩家进程
+    god = Environment(game_id=game_id, backend='memory')      #GodAgent 进程
+    await player.add_player_memory('playerA', '第一局：playerB 是狼人')
+    await god.clear_environment()
+    await player.add_player_memory('playerA', '第二局：playerC 是好人')
+    await god.clear_environment()
+    return await player.get_player_memory('playerA')
+
+
+def test_memory_registered_after_clear_by_other_process():
+    assert asyncio.run(clear_from_another_process()) == []
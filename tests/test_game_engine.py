@@ -0,0 +1,27 @@
+import asyncio
+import uuid
+
+from engine.game_engine import GameEngine
+from engine.local import PLAYERS, LocalGameIO, random_policies
+from environment.environment import game_context, release_environment
+
+
+async def fallback_votes(seed, games: int) -> list:
+    votes = []
+    for _ in range(games):
+        game_id = f'test-{uuid.uuid4().hex[:8]}'
+        with game_context(game_id) as env:
+            engine = GameEngine(env, LocalGameIO(game_id, random_policies(0)), max_players_num=len(PLAYERS),
+                                seed=seed, vote_fallback='random')
+            await engine.reset()
+            await env.set_alive_players(set(PLAYERS))
+            engine.round = 1
+            votes.append(await engine._fallback_vote('playerA'))
+            await env.clear_environment()
+        await release_environment(game_id)
+    return votes
+
+
+def test_random_fallback_vote_varies_between_unseeded_games():
+    assert len(set(asyncio.run(fallback_votes(None, 20)))) > 1
+    assert len(set(asyncio.run(fallback_votes(7, 5)))) == 1
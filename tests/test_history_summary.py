@@ -0,0 +1,36 @@
+import asyncio
+import uuid
+
+from environment.environment import game_context, release_environment
+from environment.summary import history_token_budget
+
+SPEAKERS = ['playerA', 'playerB', 'playerC', 'playerD', 'playerE', 'playerF']
+
+
+def test_shared_summary_uses_full_history():
+    """由只看到部分记录的玩家触发的摘要会被所有玩家共享，必须包含该轮完整的发言"""
+    async def main():
+        game_id = f'test-{uuid.uuid4().hex[:8]}'
+        with game_context(game_id) as env:
+            for pid in SPEAKERS:
+                await env.add_history(1, pid, f'玩家{pid}发言：' + '我是好人' * 20)
+            await env.add_history(2, 'world', '第2轮开始')
+            full = await env.get_history()
+            partial = full[:2] + full[-1:]     #缺少 C–F 的发言
+            await env.compact_history(partial, token_budget=100)
+            redis = await env.connect()
+            summary = await redis.hget(f'{env.key_prefix}history_summaries', '1:2')
+            await env.clear_environment()
+        await release_environment(game_id)
+        return summary
+
+    summary = asyncio.run(main())
+    for pid in SPEAKERS:
+        assert pid in summary
+
+
+def test_token_budget_is_read_at_call_time(monkeypatch):
+    monkeypatch.setenv('HISTORY_TOKEN_BUDGET', '120')
+    assert history_token_budget() == 120
+    monkeypatch.delenv('HISTORY_TOKEN_BUDGET')
+    assert history_token_budget() == 0
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+from llm.cache import CachedLLM, CompletionCache
+from llm.responses import TextStream
+
+
+class SlowStreamLLM:
+    """流式回复，每个分块之间等待 delay 秒"""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **params):
+        return TextStream(self.chunks, token_latency=self.delay)
+
+    async def close(self):
+        pass
+
+
+async def read(client, messages, stop_at=None):
+    stream = await client.chat.completions.create(model='m', messages=messages, stream=True)
+    text = ''
+    try:
+        async for chunk in stream:
+            if chunk.choices:
+                text += chunk.choices[0].delta.content
+            if stop_at is not None and stop_at in text:
+                break
+    finally:
+        await stream.close()
+    return text
+
+
+def test_cancelled_stream_is_not_cached(tmp_path):
+    async def main():
+        chunks = ['<thought>想一想</thought>', '<final_answer>', 'Vote:playerA', '</final_answer>']
+        client = CachedLLM(SlowStreamLLM(chunks, delay=0.05), CompletionCache(str(tmp_path / 'c.db')), 'record')
+        messages = [{'role': 'user', 'content': 'Vote:请投票'}]
+        try:
+            await asyncio.wait_for(read(client, messages), 0.08)   #超过截止时间，流被取消
+        except asyncio.TimeoutError:
+            pass
+        replay = CachedLLM(None, CompletionCache(str(tmp_path / 'c.db')), 'replay')
+        try:
+            await read(replay, messages)
+        except Exception as e:
+            return type(e).__name__
+        return 'hit'
+
+    assert asyncio.run(main()) == 'ReplayMissError'
+
+
+def test_early_stopped_stream_is_cached(tmp_path):
+    async def main():
+        chunks = ['<thought>想一想</thought>', '<action>check_alive_players()</action>', '<observation>编造</observation>']
+        client = CachedLLM(SlowStreamLLM(chunks), CompletionCache(str(tmp_path / 'c.db')), 'record')
+        messages = [{'role': 'user', 'content': 'Execute:请行动'}]
+        recorded = await read(client, messages, stop_at='</action>')
+        replay = CachedLLM(None, CompletionCache(str(tmp_path / 'c.db')), 'replay')
+        return recorded, await read(replay, messages)
+
+    recorded, replayed = asyncio.run(main())
+    assert replayed == recorded
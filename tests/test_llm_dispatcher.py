@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from llm.dispatcher import LLMDispatcher
+from llm.mock import MockLLM
+
+MESSAGES = [{'role': 'user', 'content': 'Vote:请投票'}]
+
+
+def test_cancelled_request_releases_slot():
+    async def main():
+        dispatcher = LLMDispatcher(MockLLM(latency=10.0), max_concurrency=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(dispatcher.chat.completions.create(model='m', messages=MESSAGES), 0.01)
+        assert dispatcher.metrics()['in_flight'] == 0
+
+        dispatcher.backend.latency = 0.0
+        await asyncio.wait_for(dispatcher.chat.completions.create(model='m', messages=MESSAGES), 1.0)
+        return dispatcher.metrics()
+
+    metrics = asyncio.run(main())
+    assert metrics['in_flight'] == 0 and metrics['requests'] == 2
+
+
+def test_cancelled_stream_releases_slot():
+    async def main():
+        dispatcher = LLMDispatcher(MockLLM(latency=10.0), max_concurrency=1)
+        stream = await dispatcher.chat.completions.create(model='m', messages=MESSAGES, stream=True)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(stream.__anext__(), 0.01)
+
+        dispatcher.backend.latency = 0.0
+        stream = await asyncio.wait_for(
+            dispatcher.chat.completions.create(model='m', messages=MESSAGES, stream=True), 1.0)
+        await stream.close()
+        return dispatcher.metrics()
+
+    assert asyncio.run(main())['in_flight'] == 0
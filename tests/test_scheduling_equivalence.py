@@ -0,0 +1,54 @@
+"""同一种子下，并行投票与逐个投票、按依赖调度的夜晚与逐个执行的夜晚得到完全相同的对局"""
+import asyncio
+import uuid
+
+import pytest
+
+from engine.game_engine import GameEngine
+from engine.local import PLAYERS, LocalGameIO
+from engine.policies import RandomPolicy
+from engine.scheduler import NIGHT_DEPENDENCIES, NightScheduler
+from environment.environment import game_context, release_environment
+
+#按 Action6 顺序逐个执行夜晚行动
+SEQUENTIAL_NIGHT = {action: tuple(NIGHT_DEPENDENCIES)[index - 1:index] for index, action in enumerate(NIGHT_DEPENDENCIES)}
+
+
+async def play(seed: int, vote_mode: str, night: dict) -> dict:
+    #排在后面的玩家思考更快，让并行的请求以与发言顺序不同的顺序完成
+    policies = {pid: RandomPolicy(pid, seed=seed * len(PLAYERS) + j, think_time=(len(PLAYERS) - j) * 0.0005)
+                for j, pid in enumerate(PLAYERS)}
+    game_id = f'test-{uuid.uuid4().hex[:8]}'
+    with game_context(game_id) as env:
+        engine = GameEngine(env, LocalGameIO(game_id, policies), max_players_num=len(PLAYERS), seed=seed,
+                            max_rounds=20, vote_mode=vote_mode)
+        engine._night_scheduler = NightScheduler(night)
+        await engine.reset()
+        for player_id in policies:
+            await engine.add_player(player_id)
+        result = await engine.run()
+        outcome = {
+            'winner': result.winner,
+            'rounds': result.rounds,
+            'alive': await env.get_alive_players(),
+            'potions': (await env.get_cure_status(), await env.get_poison_status()),
+            'history': await env.get_history(),
+            'memories': {pid: await env.get_player_memory(pid) for pid in policies},
+        }
+        await env.clear_environment()
+    await release_environment(game_id)
+    return outcome
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_parallel_vote_matches_sequential(seed):
+    sequential = asyncio.run(play(seed, 'sequential', SEQUENTIAL_NIGHT))
+    parallel = asyncio.run(play(seed, 'parallel', SEQUENTIAL_NIGHT))
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_scheduled_night_matches_sequential(seed):
+    sequential = asyncio.run(play(seed, 'sequential', SEQUENTIAL_NIGHT))
+    scheduled = asyncio.run(play(seed, 'sequential', NIGHT_DEPENDENCIES))
+    assert scheduled == sequential
@@ -0,0 +1,82 @@
+"""environment/scripts.py 中的 Lua 脚本与 MemoryBackend 中的 Python 实现在 fakeredis 上逐项比对"""
+import asyncio
+
+import pytest
+
+#需要 requirements-dev.txt 中的 fakeredis[lua]（通过 lupa 执行 Lua 脚本）
+pytest.importorskip('fakeredis')
+pytest.importorskip('lupa')
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from environment.memory_backend import MemoryBackend, MemoryStore
+from environment.scripts import READ_HISTORY, RESOLVE_DAWN
+
+DAWN_KEYS = ['phase', 'killed', 'witch', 'alive', 'version', 'events']
+
+
+def lua_backend() -> FakeAsyncRedis:
+    #每个用例一个独立的 server，fakeredis 默认的连接之间共享数据
+    return FakeAsyncRedis(server=FakeServer(), decode_responses=True)
+
+
+def python_backend() -> MemoryBackend:
+    return MemoryBackend(MemoryStore())
+
+
+async def snapshot(r) -> dict:
+    """脚本涉及的所有键的内容，流只比较字段（id 由时间生成）"""
+    return {
+        'phase': await r.get('phase'),
+        'killed': await r.get('killed'),
+        'witch': await r.hgetall('witch'),
+        'alive': sorted(await r.smembers('alive')),
+        'version': await r.get('version'),
+        'events': [fields for _, fields in reversed(await r.xrevrange('events'))],
+        'history': await r.lrange('history', 0, -1),
+        'cursors': await r.hgetall('cursors'),
+    }
+
+
+async def run_dawn(r, killed, poisoned):
+    await r.sadd('alive', 'playerA', 'playerB', 'playerC')
+    await r.set('phase', 'night')
+    await r.hset('witch', mapping={'cure': 'unused', 'cure_tonight': 'True'})
+    if killed is not None:
+        await r.set('killed', killed)
+    if poisoned is not None:
+        await r.hset('witch', 'player_posioned_tonight', poisoned)
+    dead, alive, version = await r.register_script(RESOLVE_DAWN)(keys=DAWN_KEYS, args=['day'])
+    return [list(dead), sorted(alive), int(version)], await snapshot(r)
+
+
+async def run_history(r):
+    script = r.register_script(READ_HISTORY)
+    results = []
+    await r.rpush('history', 'round:1,world,a', 'round:1,playerA,b')
+    results.append(await script(keys=['history', 'cursors'], args=['playerA', '0']))
+    await r.rpush('history', 'round:2,world,c')
+    results.append(await script(keys=['history', 'cursors'], args=['playerA', '0']))
+    results.append(await script(keys=['history', 'cursors'], args=['playerA', '0']))
+    results.append(await script(keys=['history', 'cursors'], args=['playerB', '1']))
+    results.append(await script(keys=['history', 'cursors'], args=['playerA', '1']))
+    return [list(result) for result in results], await snapshot(r)
+
+
+@pytest.mark.parametrize('killed, poisoned', [
+    (None, None), ('playerA', None), (None, 'playerB'), ('playerA', 'playerB'), ('playerA', 'playerA'),
+])
+def test_resolve_dawn_parity(killed, poisoned):
+    lua = asyncio.run(run_dawn(lua_backend(), killed, poisoned))
+    python = asyncio.run(run_dawn(python_backend(), killed, poisoned))
+    assert python == lua
+
+
+def test_read_history_parity():
+    lua = asyncio.run(run_history(lua_backend()))
+    python = asyncio.run(run_history(python_backend()))
+    assert python == lua
+
+
+def test_unknown_script_is_named():
+    with pytest.raises(ValueError, match='return 1'):
+        python_backend().register_script('return 1')
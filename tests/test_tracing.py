@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+import uuid
+
+from benchmarks.bench_game import SpanCollector
+from engine.local import play_local_game, random_policies
+from logs.tracing import Span, SpanRecorder, read_spans, set_recorder
+
+
+def test_recorder_writes_in_background(tmp_path, monkeypatch):
+    path = tmp_path / 'spans.jsonl'
+    recorder = SpanRecorder(('jsonl', 'openmetrics'), str(path), str(tmp_path / 'spans.prom'), flush_every=2)
+    writers = []
+    write = recorder._write
+    monkeypatch.setattr(recorder, '_write', lambda spans: (writers.append(threading.current_thread()), write(spans)))
+    for i in range(5):
+        recorder.record(Span('tool', 'kill', 'game', float(i), 0.001 * i))
+    recorder.flush()
+
+    assert [span.start for span in read_spans(str(path))] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert writers and threading.main_thread() not in writers
+    metrics = (tmp_path / f'spans.{os.getpid()}.prom').read_text()
+    assert f'werewolf_span_seconds_count{{pid="{os.getpid()}",type="tool",name="kill"}} 5' in metrics
+
+
+def test_phase_spans_cover_whole_phases():
+    collector = SpanCollector()
+    previous = set_recorder(collector)
+    try:
+        result = asyncio.run(play_local_game(f'test-{uuid.uuid4().hex[:8]}', random_policies(3), seed=3, max_rounds=2))
+    finally:
+        set_recorder(previous)
+
+    phases = [span for span in collector.spans if span.type == 'phase']
+    requests = [span for span in collector.spans if span.type == 'request']
+    assert [span.attrs['round'] for span in phases if span.name == 'night'] == list(range(1, result.rounds + 1))
+    assert {span.name for span in phases} <= {'night', 'day', 'vote'}
+    assert {span.name for span in requests} >= {'WOLF1_KILL', 'SEER_SEE'}
+    #每个阶段包含其中的全部请求
+    nights = [span for span in phases if span.name == 'night']
+    for request in requests:
+        if request.name == 'SEER_SEE':
+            night = nights[request.attrs['round'] - 1]
+            assert night.start <= request.start and request.duration <= night.duration
+
+
+def test_forked_process_writes_its_own_metrics(tmp_path):
+    recorder = SpanRecorder(('openmetrics',), str(tmp_path / 'spans.jsonl'), str(tmp_path / 'spans.prom'))
+    recorder.record(Span('tool', 'kill', 'game', 0.0, 0.001))
+    recorder.flush()
+    pid = os.fork()
+    if pid == 0:
+        recorder.record(Span('tool', 'poison', 'game', 0.0, 0.001))
+        recorder.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    parent = (tmp_path / f'spans.{os.getpid()}.prom').read_text()
+    child = (tmp_path / f'spans.{pid}.prom').read_text()
+    assert 'name="kill"' in parent and 'name="poison"' not in parent
+    assert 'name="poison"' in child and 'name="kill"' not in child
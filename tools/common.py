@@ -1,4 +1,5 @@
-from environment.environment import environment
+from environment.environment import get_environment
+from environment.summary import history_token_budget
 from environment.settings import Role
 from typing import List
 
@@ -12,6 +13,7 @@ async def check_alive_players() -> str:
     Returns:
         str: 当前存活玩家
     '''
+    environment = get_environment()
     alive_players = await environment.get_alive_players()
     if not alive_players:
         return '你已经使用了check_alive_players工具，当前没有存活玩家'
@@ -19,20 +21,34 @@ async def check_alive_players() -> str:
     return '你已经使用了check_alive_players工具，当前存活玩家：' + ', '.join(alive_players)
 
 
-async def get_history() -> str:
+async def get_history(self_id: str, full: bool = False) -> str:
     '''
-    获取游戏历史记录，包括各个玩家的发言和行动
+    获取游戏历史记录，包括各个玩家的发言和行动。
+    默认只返回你上次查看之后新增的记录，需要完整记录时使用 get_history(full=True)。
 
     Args:
-        None
+        self_id: 玩家id(系统自动注入，无需手动传入)
+        full: 是否返回完整历史记录，默认为 False
 
     Returns:
         str: 历史记录
     '''
-    history = await environment.get_history()
+    environment = get_environment()
+    if isinstance(full, str):
+        # 处理字符串参数：full=True -> True
+        full = full.split('=', 1)[-1].strip().strip('"').strip("'").lower() == 'true'
+
+    history = await environment.read_history(self_id, full)
+    token_budget = history_token_budget()
+    if full and token_budget:
+        history = await environment.compact_history(history, token_budget)
+    if full:
+        if not history:
+            return '你已经使用了get_history工具，当前没有历史记录'
+        return f'你已经使用了get_history工具，完整游戏历史记录：\n' + '\n'.join(history)
     if not history:
-        return '你已经使用了get_history工具，当前没有历史记录'
-    return f'你已经使用了get_history工具，游戏历史记录：\n' + '\n'.join(history)
+        return '你已经使用了get_history工具，自你上次查看以来没有新的历史记录，如需完整记录请使用get_history(full=True)'
+    return f'你已经使用了get_history工具，自你上次查看以来新增的游戏历史记录：\n' + '\n'.join(history)
 
 async def get_player_memory(self_id: str) -> str:
     '''
@@ -44,6 +60,7 @@ async def get_player_memory(self_id: str) -> str:
     Returns:
         str: 玩家记忆
     '''
+    environment = get_environment()
     
     memory = await environment.get_player_memory(self_id)
     if not memory:
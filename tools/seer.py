@@ -1,5 +1,6 @@
-from environment.environment import environment
-from environment.settings import Role, GamePhase
+from environment.environment import get_environment
+from environment.events import EventType
+from environment.settings import Role, GamePhase, Action6
 from logs.logging_config import setup_logger
 
 logger = setup_logger('seer_tool')
@@ -16,6 +17,7 @@ async def check_identity(self_id: str, target_id: str) -> str:
     Returns:
         str: 目标id的身份
     '''
+    environment = get_environment()
 
     if '=' in target_id:
         # 处理键值对格式：target_id="playerA" -> playerA
@@ -30,10 +32,16 @@ async def check_identity(self_id: str, target_id: str) -> str:
         return '预言家的检查身份工具只能在夜晚使用'
 
     if target_id not in (await environment.get_alive_players()):
-        logger.error(f"目标id {target_id} 不存在")
+        logger.error('目标id %s 不存在', target_id)
         return f"目标id {target_id} 不存在"
 
+    if await environment.get_action(self_id) != Action6.SEER_SEE:
+        #请求已超时或不是自己的行动回合，迟到的工具调用不能留下查验记录
+        logger.warning('%s当前没有查验的行动令牌，忽略查验%s', self_id, target_id)
+        return '当前不是你的查验回合，查验无效。'
+
     is_wolf = (await environment.get_role(target_id)) == Role.WOLF
+    await environment.record_event(EventType.SEE, actor=self_id, target=target_id, content='wolf' if is_wolf else 'good')
     if is_wolf:
         await environment.add_player_memory(self_id, f'你的预言结果是：{target_id}是狼人。')
         return f"目标id {target_id} 是狼人，你今晚已查看过身份，无法再次使用此工具，进入最终回答阶段。"
@@ -1,5 +1,9 @@
+import asyncio
 import importlib
-from typing import List, Callable
+import inspect
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from environment.settings import Role
 
@@ -38,3 +42,121 @@ def load_tools(role: Role) -> List[Callable]:
 
     return tools
 
+
+
+_JSON_TYPES = {str: 'string', bool: 'boolean', int: 'integer', float: 'number'}
+_ARG_PATTERN = re.compile(r'^\s*(\w+)\s*:\s*(.+)$')
+
+
+def tool_schema(func: Callable, signature: inspect.Signature) -> dict:
+    """
+    根据函数签名和 Google 风格的文档字符串生成函数调用（tools）使用的 JSON Schema。
+    self_id 由系统注入，不暴露给模型。
+    """
+    doc = inspect.getdoc(func) or ''
+    description, _, rest = doc.partition('Args:')
+    arg_docs = {}
+    for line in rest.partition('Returns:')[0].splitlines():
+        if (match := _ARG_PATTERN.match(line)) is not None:
+            arg_docs[match.group(1)] = match.group(2).strip()
+    properties, required = {}, []
+    for name, param in signature.parameters.items():
+        if name == 'self_id':
+            continue
+        properties[name] = {'type': _JSON_TYPES.get(param.annotation, 'string')}
+        if name in arg_docs:
+            properties[name]['description'] = arg_docs[name]
+        if param.default is inspect.Parameter.empty:
+            required.append(name)
+    return {
+        'type': 'function',
+        'function': {
+            'name': func.__name__,
+            'description': description.strip(),
+            'parameters': {'type': 'object', 'properties': properties, 'required': required},
+        },
+    }
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """预先解析好的工具：签名、self_id 的注入位置、是否为协程和提示词中的说明只计算一次"""
+    name: str
+    func: Callable
+    param_names: Tuple[str, ...]
+    self_index: Optional[int]   #self_id 参数的位置，没有时为 None
+    is_coroutine: bool
+    description: str
+    schema: dict    #函数调用模式使用的 JSON Schema
+
+    @classmethod
+    def from_function(cls, func: Callable) -> 'ToolSpec':
+        signature = inspect.signature(func)
+        param_names = list(signature.parameters)
+        return cls(
+            name=func.__name__,
+            func=func,
+            param_names=tuple(param_names),
+            self_index=param_names.index('self_id') if 'self_id' in param_names else None,
+            is_coroutine=asyncio.iscoroutinefunction(func),
+            description=f'- {func.__name__}{signature}: {inspect.getdoc(func)}',
+            schema=tool_schema(func, signature),
+        )
+
+    def bind(self, self_id: str, args: Sequence) -> tuple:
+        """
+        把调用方的 id 注入 self_id 参数：模型没有传 self_id 时插入到对应位置，传了则覆盖，
+        防止模型冒充其他玩家行动。
+        """
+        if self.self_index is None:
+            return tuple(args)
+        args = list(args)
+        if not args:
+            args.append(self_id)
+        elif len(args) < len(self.param_names):
+            args.insert(self.self_index, self_id)
+        else:
+            args[self.self_index] = self_id
+        return tuple(args)
+
+    def bind_kwargs(self, self_id: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """函数调用模式下按参数名绑定，忽略未知参数，self_id 始终由系统注入"""
+        bound = {name: value for name, value in kwargs.items() if name in self.param_names}
+        if self.self_index is not None:
+            bound['self_id'] = self_id
+        return bound
+
+    async def call(self, self_id: str, args: Sequence = (), kwargs: Optional[Dict[str, Any]] = None):
+        if kwargs is not None:
+            result = self.func(**self.bind_kwargs(self_id, kwargs))
+        else:
+            result = self.func(*self.bind(self_id, args))
+        if self.is_coroutine:
+            return await result
+        return result
+
+
+class ToolRegistry:
+    """一个角色可用的全部工具，按名称查找"""
+
+    def __init__(self, tools: List[Callable]):
+        self.tools: Dict[str, ToolSpec] = {func.__name__: ToolSpec.from_function(func) for func in tools}
+        self.tool_list = '\n'.join(spec.description for spec in self.tools.values())   #渲染提示词用的工具列表
+        self.schemas = [spec.schema for spec in self.tools.values()]   #函数调用模式的 tools 参数
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self.tools.get(name)
+
+    def __iter__(self):
+        return iter(self.tools.values())
+
+
+_registries: Dict[Role, ToolRegistry] = {}
+
+
+def load_tool_registry(role: Role) -> ToolRegistry:
+    """返回角色的工具注册表，同一进程内每个角色只构建一次"""
+    registry = _registries.get(role)
+    if registry is None:
+        registry = _registries[role] = ToolRegistry(load_tools(role))
+    return registry
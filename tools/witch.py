@@ -1,5 +1,5 @@
-from environment.environment import environment
-from environment.settings import Role, GamePhase
+from environment.environment import get_environment
+from environment.settings import Role, GamePhase, Action6
 from logs.logging_config import setup_logger
 
 logger = setup_logger('witch')
@@ -15,6 +15,7 @@ async def cure(self_id: str) -> str:
     Returns:
         str: 使用解药的结果
     '''
+    environment = get_environment()
 
     phase = await environment.get_phase()
     if phase != GamePhase.NIGHT:
@@ -33,8 +34,12 @@ async def cure(self_id: str) -> str:
     if target_id == self_id:
         logger.info('女巫不能解救自己，当前玩家%s的target_id为%s', self_id, target_id)
         return '女巫不能解救自己，放弃使用解药，进入最终回答阶段，你只能回答不使用解药。'
-    
-    await environment.use_cure()
+    if await environment.get_action(self_id) != Action6.WITCH_CURE:
+        #请求已超时或当前是毒药回合，迟到的工具调用不能改变结果
+        logger.warning('%s当前没有解药的行动令牌，忽略解药', self_id)
+        return '当前不是你使用解药的回合，解药无效。'
+
+    await environment.use_cure(actor=self_id, target=target_id)
     await environment.set_cure_tonight(True)
     await environment.set_player_killed_tonight(None)
     await environment.add_player_memory(self_id, f'你已使用了解药，解救了{target_id}。')
@@ -51,6 +56,7 @@ async def poison(self_id: str, target_id: str) -> str:
     Returns:
         str: 使用毒药的结果
     '''
+    environment = get_environment()
 
     phase = await environment.get_phase()
     if phase != GamePhase.NIGHT:
@@ -68,7 +74,10 @@ async def poison(self_id: str, target_id: str) -> str:
     if poison_status == 'used':
         logger.error('毒药已使用，无法再次使用。')
         return '毒药已使用，无法再次使用。'
-    await environment.use_poison(target_id)
+    if await environment.get_action(self_id) != Action6.WITCH_POISON:
+        logger.warning('%s当前没有毒药的行动令牌，忽略毒杀%s', self_id, target_id)
+        return '当前不是你使用毒药的回合，毒药无效。'
+    await environment.use_poison(target_id, actor=self_id)
     await environment.set_player_posioned_tonight(target_id)
     await environment.add_player_memory(self_id, f'你已使用了毒药，杀害了{target_id}。')
     return f'你使用毒药杀害了{target_id}，进入最终回答阶段。'
\ No newline at end of file
@@ -1,5 +1,5 @@
-from environment.environment import environment
-from environment.settings import Role, GamePhase
+from environment.environment import get_environment
+from environment.settings import Role, GamePhase, Action6
 from logs.logging_config import setup_logger
 
 logger = setup_logger('wolf')
@@ -13,6 +13,7 @@ async def check_killed_player_tonight() -> str:
     Returns:
         str: 今晚被杀的玩家
     '''
+    environment = get_environment()
     phase = await environment.get_phase()
     if phase != GamePhase.NIGHT:
         logger.warning('狼人的检查今晚被杀的玩家工具只能在夜晚使用')
@@ -35,6 +36,7 @@ async def kill(self_id: str, target_id: str) -> str:
     Returns:
         str: 杀害目标的结果
     '''
+    environment = get_environment()
     phase = await environment.get_phase()
     if phase != GamePhase.NIGHT:
         logger.warning('狼人的杀害目标工具只能在夜晚使用')
@@ -46,6 +48,10 @@ async def kill(self_id: str, target_id: str) -> str:
     else:
         # 处理普通字符串，去除引号和空格
         target_id = target_id.strip().strip('"').strip("'")
-    await environment.set_player_killed_tonight(target_id)
+    if await environment.get_action(self_id) not in (Action6.WOLF1_KILL, Action6.WOLF2_KILL):
+        #请求已超时或不是自己的行动回合，迟到的工具调用不能改变结果
+        logger.warning('%s当前没有击杀的行动令牌，忽略击杀%s', self_id, target_id)
+        return '当前不是你的击杀回合，击杀无效。'
+    await environment.set_player_killed_tonight(target_id, actor=self_id)
     await environment.add_player_memory(self_id, f'你将{target_id}作为杀害目标。')
     return f'你今晚选择杀害的目标为{target_id}，进入最终回答阶段。'
\ No newline at end of file